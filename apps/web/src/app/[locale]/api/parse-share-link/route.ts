@@ -2,16 +2,59 @@ import {
   registerBuiltinAdapters,
   parseWithAdapters,
   canHandleShareLink,
+  getSharedHttpClient,
 } from "@chat2poster/core-adapters";
 import type { Conversation } from "@chat2poster/core-schema";
 import { createTranslator } from "@chat2poster/shared-ui/i18n/core";
 import { mergeAdjacentSameRoleMessages } from "@chat2poster/shared-ui/utils";
-import { type NextRequest, NextResponse } from "next/server";
+import { after, type NextRequest, NextResponse } from "next/server";
 import { z } from "zod";
+import {
+  MemoryParseCacheStore,
+  ShareLinkParseCache,
+  normalizeShareUrl,
+} from "~/lib/share-link-cache";
 
 // Register adapters at module load time
 registerBuiltinAdapters();
 
+/** Parsed conversations stay fresh for 10 minutes */
+const PARSE_CACHE_TTL_MS = 10 * 60 * 1000;
+/** Expired results may be served for another hour while refreshing */
+const PARSE_CACHE_STALE_MS = 60 * 60 * 1000;
+/** Memory budget for cached conversations */
+const PARSE_CACHE_MAX_BYTES = 32 * 1024 * 1024;
+
+interface CachedParseResult {
+  adapterId: string;
+  conversation: Conversation;
+}
+
+/**
+ * Parse results shared across requests handled by this server instance
+ */
+const parseCache = new ShareLinkParseCache<CachedParseResult>({
+  store: new MemoryParseCacheStore(PARSE_CACHE_MAX_BYTES),
+  ttlMs: PARSE_CACHE_TTL_MS,
+  staleWhileRevalidateMs: PARSE_CACHE_STALE_MS,
+});
+
+/**
+ * Fetch and parse a share link upstream
+ */
+async function loadShareLink(url: string): Promise<CachedParseResult> {
+  const result = await parseWithAdapters({
+    type: "share-link",
+    url,
+  });
+
+  return {
+    adapterId: result.adapterId,
+    // Merge adjacent messages with the same role
+    conversation: mergeAdjacentSameRoleMessages(result.conversation),
+  };
+}
+
 /**
  * Request body schema for parse-share-link API
  */
@@ -98,26 +141,23 @@ export async function POST(
       );
     }
 
-    // Use core-adapters to parse the share link
+    // Use core-adapters to parse the share link (cached per normalized URL)
     try {
-      const result = await parseWithAdapters({
-        type: "share-link",
-        url,
-      });
+      const { value, status } = await parseCache.getOrLoad(
+        normalizeShareUrl(url),
+        () => loadShareLink(url),
+        // Stale refreshes outlive the response (waitUntil on Workers)
+        { waitUntil: (promise) => after(promise) },
+      );
 
       const duration = Date.now() - startTime;
       console.log(
-        `[parse-share-link] Adapter: ${result.adapterId}, Duration: ${duration}ms, Status: success`,
-      );
-
-      // Merge adjacent messages with the same role
-      const mergedConversation = mergeAdjacentSameRoleMessages(
-        result.conversation,
+        `[parse-share-link] Adapter: ${value.adapterId}, Duration: ${duration}ms, Cache: ${status}, Status: success`,
       );
 
       return NextResponse.json({
         success: true,
-        conversation: mergedConversation,
+        conversation: value.conversation,
       });
     } catch (parseError: unknown) {
       console.error(parseError);
@@ -160,5 +200,7 @@ export async function GET(
     status: "ok",
     supportedProviders: ["chatgpt", "claude", "gemini"],
     message: t("api.parseShareLink.ready"),
+    cache: parseCache.getStats(),
+    upstream: getSharedHttpClient().getMetrics(),
   });
 }
@@ -10,6 +10,7 @@ import {
   XIcon,
   type NavItem,
   I18nProvider,
+  configureShiki,
   useI18n,
 } from "@chat2poster/shared-ui";
 import {
@@ -30,6 +31,17 @@ import {
   authorConfig,
 } from "~/lib/site-info";
 
+// Highlight code blocks off the main thread, persisting results across visits
+if (typeof window !== "undefined") {
+  configureShiki({
+    createWorker: () =>
+      new Worker(new URL("../workers/shiki.worker.ts", import.meta.url), {
+        type: "module",
+      }),
+    persistentCache: true,
+  });
+}
+
 const socialIconMap = {
   github: GitHubIcon,
   bilibili: BilibiliIcon,
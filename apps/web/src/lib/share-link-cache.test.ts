@@ -0,0 +1,243 @@
+import { describe, it, expect, vi, beforeEach, afterEach } from "vitest";
+import {
+  MemoryParseCacheStore,
+  ShareLinkParseCache,
+  isUpstreamGoneError,
+  normalizeShareUrl,
+  type ParseCacheEntry,
+} from "./share-link-cache";
+
+const TTL_MS = 1000;
+const STALE_MS = 5000;
+
+function createDeferred<T>() {
+  let resolve!: (value: T) => void;
+  const promise = new Promise<T>((res) => {
+    resolve = res;
+  });
+  return { promise, resolve };
+}
+
+function createCache(maxBytes = 1024 * 1024) {
+  return new ShareLinkParseCache<string>({
+    store: new MemoryParseCacheStore(maxBytes),
+    ttlMs: TTL_MS,
+    staleWhileRevalidateMs: STALE_MS,
+  });
+}
+
+function createEntry(size: number): ParseCacheEntry<string> {
+  return {
+    value: "x",
+    size,
+    storedAt: 0,
+    expiresAt: Infinity,
+    staleUntil: Infinity,
+  };
+}
+
+describe("ShareLinkParseCache", () => {
+  beforeEach(() => {
+    vi.useFakeTimers();
+    vi.setSystemTime(0);
+  });
+
+  afterEach(() => {
+    vi.useRealTimers();
+  });
+
+  it("should coalesce concurrent loads of the same key", async () => {
+    const cache = createCache();
+    const upstream = createDeferred<string>();
+    const loader = vi.fn(() => upstream.promise);
+
+    const first = cache.getOrLoad("a", loader);
+    const second = cache.getOrLoad("a", loader);
+    upstream.resolve("value");
+
+    await expect(first).resolves.toEqual({ value: "value", status: "miss" });
+    await expect(second).resolves.toEqual({
+      value: "value",
+      status: "coalesced",
+    });
+    expect(loader).toHaveBeenCalledTimes(1);
+  });
+
+  it("should serve fresh entries without loading", async () => {
+    const cache = createCache();
+    const loader = vi.fn(async () => "value");
+
+    await cache.getOrLoad("a", loader);
+    vi.setSystemTime(TTL_MS - 1);
+    const result = await cache.getOrLoad("a", loader);
+
+    expect(result.status).toBe("hit");
+    expect(loader).toHaveBeenCalledTimes(1);
+  });
+
+  it("should serve stale entries while one refresh runs", async () => {
+    const cache = createCache();
+    await cache.getOrLoad("a", async () => "old");
+    vi.setSystemTime(TTL_MS + 1);
+
+    const upstream = createDeferred<string>();
+    const loader = vi.fn(() => upstream.promise);
+    const waitUntil = vi.fn();
+
+    const first = await cache.getOrLoad("a", loader, { waitUntil });
+    const second = await cache.getOrLoad("a", loader, { waitUntil });
+
+    expect(first).toEqual({ value: "old", status: "stale" });
+    expect(second).toEqual({ value: "old", status: "stale" });
+    expect(loader).toHaveBeenCalledTimes(1);
+    expect(waitUntil).toHaveBeenCalledTimes(2);
+
+    upstream.resolve("new");
+    await waitUntil.mock.calls[0]![0];
+
+    await expect(cache.getOrLoad("a", loader)).resolves.toEqual({
+      value: "new",
+      status: "hit",
+    });
+  });
+
+  it("should refresh inline without waitUntil", async () => {
+    const cache = createCache();
+    await cache.getOrLoad("a", async () => "old");
+    vi.setSystemTime(TTL_MS + 1);
+
+    const result = await cache.getOrLoad("a", async () => "new");
+
+    expect(result).toEqual({ value: "old", status: "stale" });
+    const refreshed = await cache.getOrLoad("a", async () => "other");
+    expect(refreshed).toEqual({ value: "new", status: "hit" });
+  });
+
+  it("should keep serving stale entries when a refresh fails", async () => {
+    const cache = createCache();
+    await cache.getOrLoad("a", async () => "old");
+    vi.setSystemTime(TTL_MS + 1);
+
+    const result = await cache.getOrLoad("a", () =>
+      Promise.reject(new Error("upstream down")),
+    );
+
+    expect(result).toEqual({ value: "old", status: "stale" });
+    expect(cache.getStats().upstreamErrors).toBe(1);
+  });
+
+  it("should drop stale entries when the upstream share is gone", async () => {
+    const cache = createCache();
+    await cache.getOrLoad("a", async () => "old");
+    vi.setSystemTime(TTL_MS + 1);
+    const gone = new Error("HTTP 404: Not Found");
+
+    await expect(
+      cache.getOrLoad("a", () => Promise.reject(gone)),
+    ).rejects.toBe(gone);
+
+    const result = await cache.getOrLoad("a", async () => "new");
+    expect(result).toEqual({ value: "new", status: "miss" });
+  });
+
+  it("should drop gone entries after a background refresh", async () => {
+    const cache = createCache();
+    await cache.getOrLoad("a", async () => "old");
+    vi.setSystemTime(TTL_MS + 1);
+    const waitUntil = vi.fn();
+
+    const result = await cache.getOrLoad(
+      "a",
+      () => Promise.reject(new Error("HTTP 410: Gone")),
+      { waitUntil },
+    );
+    await waitUntil.mock.calls[0]![0];
+
+    expect(result).toEqual({ value: "old", status: "stale" });
+    expect(cache.getStats().entries).toBe(0);
+  });
+
+  it("should reload once the stale window has passed", async () => {
+    const cache = createCache();
+    await cache.getOrLoad("a", async () => "old");
+    vi.setSystemTime(TTL_MS + STALE_MS + 1);
+
+    const result = await cache.getOrLoad("a", async () => "new");
+
+    expect(result).toEqual({ value: "new", status: "miss" });
+  });
+
+  it("should not cache loader failures", async () => {
+    const cache = createCache();
+
+    await expect(
+      cache.getOrLoad("a", () => Promise.reject(new Error("boom"))),
+    ).rejects.toThrow("boom");
+    const result = await cache.getOrLoad("a", async () => "value");
+
+    expect(result.status).toBe("miss");
+  });
+});
+
+describe("isUpstreamGoneError", () => {
+  it("should detect not found and gone upstream responses", () => {
+    expect(isUpstreamGoneError(new Error("HTTP 404: Not Found"))).toBe(true);
+    expect(
+      isUpstreamGoneError({
+        code: "E-PARSE-005",
+        detail: "Failed to parse ChatGPT share page: HTTP 410: Gone.",
+      }),
+    ).toBe(true);
+    expect(isUpstreamGoneError({ status: 404 })).toBe(true);
+  });
+
+  it("should treat other failures as transient", () => {
+    expect(isUpstreamGoneError(new Error("HTTP 503: Unavailable"))).toBe(false);
+    expect(isUpstreamGoneError(new Error("fetch failed"))).toBe(false);
+    expect(isUpstreamGoneError(undefined)).toBe(false);
+  });
+});
+
+describe("MemoryParseCacheStore", () => {
+  it("should evict least recently used entries over the byte budget", async () => {
+    const store = new MemoryParseCacheStore<string>(100);
+    await store.set("a", createEntry(40));
+    await store.set("b", createEntry(40));
+    await store.get("a");
+    await store.set("c", createEntry(40));
+
+    expect(await store.get("a")).toBeDefined();
+    expect(await store.get("b")).toBeUndefined();
+    expect(await store.get("c")).toBeDefined();
+    expect(store.usage()).toEqual({ entries: 2, bytes: 80 });
+  });
+
+  it("should not store entries larger than the whole budget", async () => {
+    const store = new MemoryParseCacheStore<string>(100);
+    await store.set("a", createEntry(101));
+
+    expect(store.usage()).toEqual({ entries: 0, bytes: 0 });
+  });
+
+  it("should account for replaced entries", async () => {
+    const store = new MemoryParseCacheStore<string>(100);
+    await store.set("a", createEntry(40));
+    await store.set("a", createEntry(60));
+
+    expect(store.usage()).toEqual({ entries: 1, bytes: 60 });
+  });
+});
+
+describe("normalizeShareUrl", () => {
+  it("should ignore tracking parameters, fragments and trailing slashes", () => {
+    expect(
+      normalizeShareUrl("https://ChatGPT.com/share/abc/?utm_source=x#top"),
+    ).toBe("https://chatgpt.com/share/abc");
+  });
+
+  it("should sort remaining query parameters", () => {
+    expect(normalizeShareUrl("https://example.com/s?b=2&a=1")).toBe(
+      "https://example.com/s?a=1&b=2",
+    );
+  });
+});
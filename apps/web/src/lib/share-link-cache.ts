@@ -0,0 +1,328 @@
+/**
+ * Share-link parse cache
+ *
+ * Caches parsed share-link results by normalized URL so popular links are
+ * fetched and decoded once. Concurrent requests for the same URL share one
+ * upstream fetch, and expired entries can be served stale while a single
+ * background refresh runs.
+ *
+ * Storage sits behind ParseCacheStore; MemoryParseCacheStore is per-instance.
+ */
+
+/**
+ * A cached value with its freshness window
+ */
+export interface ParseCacheEntry<T> {
+  value: T;
+  /** Approximate serialized size in bytes */
+  size: number;
+  storedAt: number;
+  /** After this time the entry is stale */
+  expiresAt: number;
+  /** After this time the entry must not be served at all */
+  staleUntil: number;
+}
+
+/**
+ * Storage backend for the parse cache
+ */
+export interface ParseCacheStore<T> {
+  get(key: string): Promise<ParseCacheEntry<T> | undefined>;
+  set(key: string, entry: ParseCacheEntry<T>): Promise<void>;
+  delete(key: string): Promise<void>;
+  /** Number of entries and total bytes, if the store can report them */
+  usage(): { entries: number; bytes: number };
+}
+
+/**
+ * In-memory store with LRU eviction bounded by total byte size
+ */
+export class MemoryParseCacheStore<T> implements ParseCacheStore<T> {
+  /** Insertion-ordered map doubles as the LRU list */
+  private readonly entries = new Map<string, ParseCacheEntry<T>>();
+  private bytes = 0;
+
+  constructor(private readonly maxBytes: number) {}
+
+  get(key: string): Promise<ParseCacheEntry<T> | undefined> {
+    const entry = this.entries.get(key);
+    if (entry) {
+      // Refresh recency
+      this.entries.delete(key);
+      this.entries.set(key, entry);
+    }
+    return Promise.resolve(entry);
+  }
+
+  set(key: string, entry: ParseCacheEntry<T>): Promise<void> {
+    this.remove(key);
+
+    // Entries larger than the whole budget are never cached
+    if (entry.size > this.maxBytes) {
+      return Promise.resolve();
+    }
+
+    this.entries.set(key, entry);
+    this.bytes += entry.size;
+
+    for (const oldestKey of this.entries.keys()) {
+      if (this.bytes <= this.maxBytes) break;
+      this.remove(oldestKey);
+    }
+    return Promise.resolve();
+  }
+
+  delete(key: string): Promise<void> {
+    this.remove(key);
+    return Promise.resolve();
+  }
+
+  usage(): { entries: number; bytes: number } {
+    return { entries: this.entries.size, bytes: this.bytes };
+  }
+
+  private remove(key: string): void {
+    const entry = this.entries.get(key);
+    if (entry) {
+      this.bytes -= entry.size;
+      this.entries.delete(key);
+    }
+  }
+}
+
+/**
+ * Parse cache options
+ */
+export interface ShareLinkParseCacheOptions<T> {
+  store: ParseCacheStore<T>;
+  /** How long a result is fresh */
+  ttlMs: number;
+  /** How long after expiry a result may still be served while refreshing */
+  staleWhileRevalidateMs: number;
+  /**
+   * Whether a loader error means the shared conversation is gone, so a
+   * failed refresh drops the stale entry instead of serving it.
+   * Defaults to `isUpstreamGoneError`.
+   */
+  isGoneError?: (error: unknown) => boolean;
+}
+
+/**
+ * Per-request options for getOrLoad
+ */
+export interface ParseCacheRequestOptions {
+  /**
+   * Keep the runtime alive for a background refresh after the response is
+   * sent (Next's `after`, or `ctx.waitUntil` on Workers). Without it, a
+   * stale hit refreshes inline before returning.
+   */
+  waitUntil?: (promise: Promise<unknown>) => void;
+}
+
+/**
+ * How a request was served
+ */
+export type ParseCacheStatus = "hit" | "stale" | "miss" | "coalesced";
+
+/**
+ * Cache counters and upstream latency, exposed on the health endpoint
+ */
+export interface ParseCacheStats {
+  hits: number;
+  staleHits: number;
+  misses: number;
+  coalesced: number;
+  upstreamErrors: number;
+  entries: number;
+  bytes: number;
+  upstream: {
+    count: number;
+    avgMs: number;
+    maxMs: number;
+    lastMs: number;
+  };
+}
+
+/** Upstream statuses in adapter error messages ("HTTP 404: ...") */
+const GONE_STATUS_PATTERN = /\b(?:HTTP|responded with) (?:404|410)\b/;
+
+/**
+ * Whether a loader error reports that the upstream share is not found or
+ * gone (404/410), as opposed to a transient failure
+ */
+export function isUpstreamGoneError(error: unknown): boolean {
+  if (!error || typeof error !== "object") {
+    return false;
+  }
+  const { status, message, detail } = error as {
+    status?: unknown;
+    message?: unknown;
+    detail?: unknown;
+  };
+  if (status === 404 || status === 410) {
+    return true;
+  }
+  // Errors and AppErrors carry the upstream status in their text
+  return [message, detail].some(
+    (text) => typeof text === "string" && GONE_STATUS_PATTERN.test(text),
+  );
+}
+
+/**
+ * Estimate the size of a value from its JSON encoding
+ */
+function estimateSize(value: unknown): number {
+  return new TextEncoder().encode(JSON.stringify(value)).byteLength;
+}
+
+/**
+ * Parse-result cache with request coalescing and stale-while-revalidate
+ */
+export class ShareLinkParseCache<T> {
+  private readonly inflight = new Map<string, Promise<T>>();
+  private readonly counters = {
+    hits: 0,
+    staleHits: 0,
+    misses: 0,
+    coalesced: 0,
+    upstreamErrors: 0,
+  };
+  private readonly latency = { count: 0, totalMs: 0, maxMs: 0, lastMs: 0 };
+
+  constructor(private readonly options: ShareLinkParseCacheOptions<T>) {}
+
+  /**
+   * Return the cached value for `key`, or load it once via `loader`.
+   * Loader failures are not cached; a refresh that finds the upstream
+   * share gone drops the stale entry and fails with the loader error.
+   */
+  async getOrLoad(
+    key: string,
+    loader: () => Promise<T>,
+    options: ParseCacheRequestOptions = {},
+  ): Promise<{ value: T; status: ParseCacheStatus }> {
+    const now = Date.now();
+    const entry = await this.options.store.get(key);
+
+    if (entry && now < entry.expiresAt) {
+      this.counters.hits++;
+      return { value: entry.value, status: "hit" };
+    }
+
+    if (entry && now < entry.staleUntil) {
+      this.counters.staleHits++;
+      const refresh = (this.inflight.get(key) ?? this.load(key, loader)).then(
+        () => undefined,
+        async (error: unknown) => {
+          // Transient failures keep serving the stale value
+          if (!this.isGoneError(error)) return;
+          await this.options.store.delete(key);
+          throw error;
+        },
+      );
+      if (options.waitUntil) {
+        // Already answering with the stale value; later requests miss
+        options.waitUntil(refresh.catch(() => undefined));
+      } else {
+        await refresh;
+      }
+      return { value: entry.value, status: "stale" };
+    }
+
+    // Join an upstream fetch that is already running for this key
+    const pending = this.inflight.get(key);
+    if (pending) {
+      this.counters.coalesced++;
+      return { value: await pending, status: "coalesced" };
+    }
+
+    this.counters.misses++;
+    return { value: await this.load(key, loader), status: "miss" };
+  }
+
+  /**
+   * Snapshot of cache counters and upstream latency
+   */
+  getStats(): ParseCacheStats {
+    const { count, totalMs, maxMs, lastMs } = this.latency;
+    return {
+      ...this.counters,
+      ...this.options.store.usage(),
+      upstream: {
+        count,
+        avgMs: count > 0 ? Math.round(totalMs / count) : 0,
+        maxMs,
+        lastMs,
+      },
+    };
+  }
+
+  private isGoneError(error: unknown): boolean {
+    return (this.options.isGoneError ?? isUpstreamGoneError)(error);
+  }
+
+  private load(key: string, loader: () => Promise<T>): Promise<T> {
+    const startTime = Date.now();
+
+    const promise = loader()
+      .then(async (value) => {
+        this.recordLatency(Date.now() - startTime);
+        const storedAt = Date.now();
+        await this.options.store.set(key, {
+          value,
+          size: estimateSize(value),
+          storedAt,
+          expiresAt: storedAt + this.options.ttlMs,
+          staleUntil:
+            storedAt + this.options.ttlMs + this.options.staleWhileRevalidateMs,
+        });
+        return value;
+      })
+      .catch((error: unknown) => {
+        this.recordLatency(Date.now() - startTime);
+        this.counters.upstreamErrors++;
+        throw error;
+      })
+      .finally(() => {
+        this.inflight.delete(key);
+      });
+
+    this.inflight.set(key, promise);
+    return promise;
+  }
+
+  private recordLatency(durationMs: number): void {
+    this.latency.count++;
+    this.latency.totalMs += durationMs;
+    this.latency.maxMs = Math.max(this.latency.maxMs, durationMs);
+    this.latency.lastMs = durationMs;
+  }
+}
+
+/** Query parameters that never affect which conversation is shared */
+const IGNORED_QUERY_PARAMS = /^(utm_[a-z]+|ref|fbclid|gclid)$/i;
+
+/**
+ * Normalize a share URL into a cache key.
+ * Lowercases the host, drops the fragment, tracking parameters and trailing
+ * slashes, and sorts the remaining query parameters.
+ */
+export function normalizeShareUrl(url: string): string {
+  let parsed: URL;
+  try {
+    parsed = new URL(url.trim());
+  } catch {
+    return url.trim();
+  }
+
+  parsed.hash = "";
+  for (const name of Array.from(parsed.searchParams.keys())) {
+    if (IGNORED_QUERY_PARAMS.test(name)) {
+      parsed.searchParams.delete(name);
+    }
+  }
+  parsed.searchParams.sort();
+  parsed.pathname = parsed.pathname.replace(/\/+$/, "") || "/";
+
+  return parsed.toString();
+}
@@ -0,0 +1,7 @@
+/**
+ * Shiki highlighting worker, spawned by the shared-ui highlighter pool
+ */
+
+import { startShikiWorker } from "@chat2poster/shared-ui/utils/shiki-worker";
+
+startShikiWorker();
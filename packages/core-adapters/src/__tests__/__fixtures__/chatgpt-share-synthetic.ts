@@ -0,0 +1,171 @@
+/**
+ * Synthetic ChatGPT share pages
+ *
+ * Builds modern (React Flight) share pages of arbitrary size in the same
+ * flattened loader format as the real `chatgpt-share-modern.html` fixture.
+ */
+
+type Encodable =
+  | string
+  | number
+  | boolean
+  | null
+  | Encodable[]
+  | { [key: string]: Encodable };
+
+/**
+ * Flatten a value into the loader format: strings are deduplicated,
+ * object keys become `_<index>` references and all values are indices.
+ */
+function encodeLoader(root: { [key: string]: Encodable }): unknown[] {
+  const loader: unknown[] = [];
+  const strings = new Map<string, number>();
+
+  function encode(value: Encodable): number {
+    if (typeof value === "string") {
+      const existing = strings.get(value);
+      if (existing !== undefined) return existing;
+      strings.set(value, loader.length);
+      loader.push(value);
+      return loader.length - 1;
+    }
+
+    if (value === null || typeof value !== "object") {
+      loader.push(value);
+      return loader.length - 1;
+    }
+
+    const index = loader.length;
+    loader.push(null);
+
+    if (Array.isArray(value)) {
+      loader[index] = value.map(encode);
+    } else {
+      const encoded: Record<string, number> = {};
+      for (const [key, item] of Object.entries(value)) {
+        encoded[`_${encode(key)}`] = encode(item);
+      }
+      loader[index] = encoded;
+    }
+    return index;
+  }
+
+  encode(root);
+  return loader;
+}
+
+const SAMPLE_TEXT = [
+  "Can you explain how the export pipeline works?",
+  "Sure. The export runs in three stages: render, capture and encode.\n\n```ts\nconst result = await exportToPng(canvas, { scale: 2 });\n```",
+  "What about \"quoted\" text, back\\slashes and (parentheses)?",
+  "Unicode works too: 日本語, emoji 🎉 and accents é.",
+];
+
+/**
+ * Create a share page HTML document with `messageCount` messages
+ */
+export function createSyntheticShareHtml(messageCount: number): string {
+  const mapping: Record<string, Encodable> = {};
+  const linear: Encodable[] = [];
+
+  for (let i = 0; i < messageCount; i++) {
+    const id = `node-${i}`;
+    const role = i % 2 === 0 ? "user" : "assistant";
+    mapping[id] = {
+      id,
+      message: {
+        id: `msg-${i}`,
+        author: { role },
+        content: {
+          content_type: "text",
+          parts: [`${SAMPLE_TEXT[i % SAMPLE_TEXT.length]} (#${i})`],
+        },
+        create_time: 1770026034.203676 + i,
+        weight: 1,
+        metadata: { is_visually_hidden_from_conversation: false },
+      },
+      parent: i > 0 ? `node-${i - 1}` : null,
+      children: i < messageCount - 1 ? [`node-${i + 1}`] : [],
+    };
+    linear.push({ id });
+  }
+
+  const loader = encodeLoader({
+    loaderData: {
+      root: { dd: { traceId: "0" } },
+      "routes/share.$shareId.($action)": {
+        sharedConversationId: "synthetic-share",
+        serverResponse: {
+          type: "data",
+          data: {
+            title: "Synthetic conversation",
+            mapping,
+            linear_conversation: linear,
+          },
+        },
+      },
+    },
+  });
+
+  const payload = JSON.stringify(JSON.stringify(loader));
+  return [
+    "<!DOCTYPE html><html><head><title>Synthetic share</title></head><body>",
+    `<div id="root">${"<p>prerendered</p>".repeat(200)}</div>`,
+    `<script>window.__reactRouterContext.streamController.enqueue(${payload});</script>`,
+    "<script>window.__reactRouterContext.streamController.close();</script>",
+    "</body></html>",
+  ].join("");
+}
+
+/**
+ * Create a legacy (__NEXT_DATA__) share page with `messageCount` messages
+ */
+export function createLegacyShareHtml(messageCount: number): string {
+  const mapping: Record<string, unknown> = {};
+  const linear: { id: string }[] = [];
+
+  for (let i = 0; i < messageCount; i++) {
+    const id = `node-${i}`;
+    mapping[id] = {
+      id,
+      message: {
+        id: `msg-${i}`,
+        author: { role: i % 2 === 0 ? "user" : "assistant" },
+        content: { content_type: "text", parts: [`Legacy message ${i}`] },
+      },
+    };
+    linear.push({ id });
+  }
+
+  const nextData = JSON.stringify({
+    props: {
+      pageProps: {
+        serverResponse: { data: { mapping, linear_conversation: linear } },
+        sharedConversationId: "legacy-share",
+      },
+    },
+  });
+  return `<html><body><script id="__NEXT_DATA__" type="application/json">${nextData}</script></body></html>`;
+}
+
+/**
+ * Stream a string as UTF-8 chunks of `chunkSize` bytes
+ */
+export function toByteStream(
+  text: string,
+  chunkSize = 16 * 1024,
+): ReadableStream<Uint8Array> {
+  const bytes = new TextEncoder().encode(text);
+  let offset = 0;
+
+  return new ReadableStream<Uint8Array>({
+    pull(controller) {
+      if (offset >= bytes.length) {
+        controller.close();
+        return;
+      }
+      controller.enqueue(bytes.subarray(offset, offset + chunkSize));
+      offset += chunkSize;
+    },
+  });
+}
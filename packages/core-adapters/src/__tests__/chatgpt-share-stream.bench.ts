@@ -0,0 +1,65 @@
+/**
+ * ChatGPT Share Page Decoding Benchmarks
+ *
+ * Compares buffering the whole page and decoding the full loader graph
+ * against streaming the page and decoding only the share route.
+ *
+ * Run with `pnpm bench`.
+ */
+
+import { readFileSync } from "node:fs";
+import { join } from "node:path";
+import { bench, describe } from "vitest";
+import {
+  decodeLoader,
+  extractLoaderPayload,
+  resolveLoaderPath,
+  scanShareHtmlStream,
+} from "../adapters/chatgpt/share-link-adapter";
+import {
+  createSyntheticShareHtml,
+  toByteStream,
+} from "./__fixtures__/chatgpt-share-synthetic";
+
+const DATA_PATH = [
+  "loaderData",
+  "routes/share.$shareId.($action)",
+  "serverResponse",
+  "data",
+];
+
+const PAGES = {
+  "fixture (chatgpt-share-modern.html)": readFileSync(
+    join(__dirname, "__fixtures__", "chatgpt-share-modern.html"),
+    "utf-8",
+  ),
+  "synthetic (10k messages)": createSyntheticShareHtml(10_000),
+};
+
+/** Previous path: buffer the body, then decode the whole loader */
+async function decodeBuffered(html: string): Promise<unknown> {
+  const text = await new Response(toByteStream(html)).text();
+  const loader = extractLoaderPayload(text);
+  return loader
+    ? decodeLoader(loader).loaderData?.["routes/share.$shareId.($action)"]
+        ?.serverResponse?.data
+    : undefined;
+}
+
+/** Streaming path: scan the body incrementally, decode only the route */
+async function decodeStreamed(html: string): Promise<unknown> {
+  const { loader } = await scanShareHtmlStream(toByteStream(html));
+  return loader ? resolveLoaderPath(loader, DATA_PATH) : undefined;
+}
+
+for (const [name, html] of Object.entries(PAGES)) {
+  describe(`decode share data: ${name}`, () => {
+    bench("buffered + full decode", async () => {
+      await decodeBuffered(html);
+    });
+
+    bench("streamed + selective decode", async () => {
+      await decodeStreamed(html);
+    });
+  });
+}
@@ -0,0 +1,176 @@
+// @vitest-environment node
+/**
+ * ChatGPT Share Link Streaming Parser Tests
+ *
+ * Tests for the incremental loader scanner, selective loader decoding and
+ * stream-based share page parsing.
+ */
+
+import { readFileSync } from "node:fs";
+import { join } from "node:path";
+import { describe, it, expect } from "vitest";
+import {
+  FlightPayloadScanner,
+  decodeLoader,
+  extractLoaderPayload,
+  parseShareHtml,
+  parseShareStream,
+  resolveLoaderPath,
+  scanShareHtmlStream,
+  type JsonValue,
+} from "../adapters/chatgpt/share-link-adapter";
+import {
+  createLegacyShareHtml,
+  createSyntheticShareHtml,
+  toByteStream,
+} from "./__fixtures__/chatgpt-share-synthetic";
+
+const SHARE_ROUTE = ["loaderData", "routes/share.$shareId.($action)"];
+
+function loadFixture(name: string): string {
+  return readFileSync(join(__dirname, "__fixtures__", name), "utf-8");
+}
+
+describe("FlightPayloadScanner", () => {
+  it.each([1, 7, 24, 25, 4096])(
+    "should find the payload with %i-character chunks",
+    (size) => {
+      const html = loadFixture("chatgpt-share-modern.html");
+      const scanner = new FlightPayloadScanner();
+
+      for (let i = 0; i < html.length && !scanner.loader; i += size) {
+        scanner.push(html.slice(i, i + size));
+      }
+
+      expect(scanner.finish()).toEqual(extractLoaderPayload(html));
+    },
+  );
+
+  it("should skip enqueue calls that are not loader arrays", () => {
+    const scanner = new FlightPayloadScanner();
+
+    scanner.push('streamController.enqueue("P21:[1]");');
+    scanner.push('streamController.enqueue("[\\"a\\", \\"(b\\"]");');
+
+    expect(scanner.finish()).toEqual(["a", "(b"]);
+  });
+
+  it("should return null when there is no payload", () => {
+    const scanner = new FlightPayloadScanner();
+    scanner.push("<html><body>nothing here</body></html>");
+    expect(scanner.finish()).toBeNull();
+  });
+});
+
+describe("resolveLoaderPath", () => {
+  it("should match the fully decoded loader", () => {
+    const loader = extractLoaderPayload(
+      loadFixture("chatgpt-share-modern.html"),
+    )!;
+    const decoded = decodeLoader(loader);
+    const route = decoded.loaderData?.["routes/share.$shareId.($action)"];
+
+    expect(
+      resolveLoaderPath(loader, [...SHARE_ROUTE, "serverResponse", "data"]),
+    ).toEqual(route?.serverResponse?.data);
+    expect(
+      resolveLoaderPath(loader, [...SHARE_ROUTE, "sharedConversationId"]),
+    ).toBe(route?.sharedConversationId);
+  });
+
+  it("should return undefined for missing paths", () => {
+    const loader = extractLoaderPayload(
+      loadFixture("chatgpt-share-modern.html"),
+    )!;
+
+    expect(resolveLoaderPath(loader, ["missing"])).toBeUndefined();
+    expect(
+      resolveLoaderPath(loader, [...SHARE_ROUTE, "serverResponse", "nope"]),
+    ).toBeUndefined();
+  });
+
+  it("should keep primitive entries as literal values", () => {
+    // { loaderData: { count: 0, flag: false } }
+    const loader: JsonValue[] = [
+      { _1: 2 },
+      "loaderData",
+      { _3: 4, _5: 6 },
+      "count",
+      0,
+      "flag",
+      false,
+    ];
+
+    expect(resolveLoaderPath(loader, ["loaderData", "count"])).toBe(0);
+    expect(decodeLoader(loader)).toEqual({
+      loaderData: { count: 0, flag: false },
+    });
+  });
+});
+
+describe("parseShareStream", () => {
+  it("should match parseShareHtml on the modern fixture", async () => {
+    const html = loadFixture("chatgpt-share-modern.html");
+
+    const fromStream = await parseShareStream(toByteStream(html, 1000));
+
+    expect(fromStream).toEqual(await parseShareHtml(html));
+  });
+
+  it("should parse a large synthetic share page", async () => {
+    const html = createSyntheticShareHtml(2000);
+
+    const messages = await parseShareStream(toByteStream(html));
+
+    expect(messages).toHaveLength(2000);
+    expect(messages[0]?.role).toBe("user");
+    expect(messages[1]?.role).toBe("assistant");
+    expect(messages[1999]?.content).toContain("(#1999)");
+  });
+
+  it("should fall back to the legacy __NEXT_DATA__ format", async () => {
+    const html = createLegacyShareHtml(3);
+
+    const messages = await parseShareStream(toByteStream(html, 16));
+
+    expect(messages.map((m) => m.content)).toEqual([
+      "Legacy message 0",
+      "Legacy message 1",
+      "Legacy message 2",
+    ]);
+  });
+
+  it("should read __NEXT_DATA__ after a payload without share data", async () => {
+    const html = `<script>streamController.enqueue("[\\"unrelated\\"]");</script>${createLegacyShareHtml(2)}`;
+
+    const messages = await parseShareStream(toByteStream(html, 16));
+
+    expect(messages.map((m) => m.content)).toEqual([
+      "Legacy message 0",
+      "Legacy message 1",
+    ]);
+  });
+
+  it("should stop reading once the payload is found", async () => {
+    const html = `${createSyntheticShareHtml(10)}${"<p>trailing</p>".repeat(10000)}`;
+    let pulled = 0;
+    const source = toByteStream(html, 1024);
+    const reader = source.getReader();
+    const stream = new ReadableStream<Uint8Array>({
+      async pull(controller) {
+        const { done, value } = await reader.read();
+        if (done) {
+          controller.close();
+          return;
+        }
+        pulled += value.length;
+        controller.enqueue(value);
+      },
+    });
+
+    const scan = await scanShareHtmlStream(stream);
+
+    expect(scan.loader).not.toBeNull();
+    expect(pulled).toBeLessThan(html.length / 2);
+  });
+});
@@ -0,0 +1,373 @@
+// @vitest-environment node
+/**
+ * Shared HTTP Client Tests
+ *
+ * Runs against a local HTTP server standing in for upstream providers.
+ */
+
+import {
+  createServer,
+  type IncomingMessage,
+  type Server,
+  type ServerResponse,
+} from "node:http";
+import type { AddressInfo } from "node:net";
+import { describe, it, expect, beforeAll, afterAll, beforeEach } from "vitest";
+import { fetchExternal } from "../network";
+import {
+  HttpClient,
+  computeBackoffDelay,
+  parseRetryAfter,
+} from "../network/http-client";
+
+type Handler = (req: IncomingMessage, res: ServerResponse) => void;
+
+let server: Server;
+let baseUrl: string;
+let handler: Handler;
+let active = 0;
+let maxActive = 0;
+
+function delay(ms: number): Promise<void> {
+  return new Promise((resolve) => setTimeout(resolve, ms));
+}
+
+beforeAll(async () => {
+  server = createServer((req, res) => {
+    active++;
+    maxActive = Math.max(maxActive, active);
+    res.on("close", () => {
+      active--;
+    });
+    handler(req, res);
+  });
+  await new Promise<void>((resolve) => server.listen(0, "127.0.0.1", resolve));
+  baseUrl = `http://127.0.0.1:${(server.address() as AddressInfo).port}`;
+});
+
+afterAll(async () => {
+  await new Promise<void>((resolve) => server.close(() => resolve()));
+});
+
+beforeEach(() => {
+  active = 0;
+  maxActive = 0;
+  handler = (_req, res) => res.end("ok");
+});
+
+describe("HttpClient", () => {
+  it("should cap concurrent requests per host", async () => {
+    handler = (_req, res) => {
+      setTimeout(() => res.end("ok"), 30);
+    };
+    const client = new HttpClient({ maxConcurrentPerHost: 2 });
+
+    await Promise.all(
+      Array.from({ length: 6 }, async () =>
+        (await client.fetch(baseUrl)).text(),
+      ),
+    );
+
+    expect(maxActive).toBeLessThanOrEqual(2);
+    const [metrics] = client.getMetrics();
+    expect(metrics?.requests).toBe(6);
+    expect(metrics?.maxQueued).toBe(4);
+    expect(metrics?.inFlight).toBe(0);
+    expect(metrics?.queued).toBe(0);
+  });
+
+  it("should apply per-host overrides", async () => {
+    handler = (_req, res) => {
+      setTimeout(() => res.end("ok"), 20);
+    };
+    const host = new URL(baseUrl).host;
+    const client = new HttpClient({
+      maxConcurrentPerHost: 8,
+      hostConcurrency: { [host]: 1 },
+    });
+
+    await Promise.all(
+      Array.from({ length: 3 }, async () =>
+        (await client.fetch(baseUrl)).text(),
+      ),
+    );
+
+    expect(maxActive).toBe(1);
+  });
+
+  it("should hold the slot while slow bodies stream", async () => {
+    handler = (_req, res) => {
+      res.writeHead(200);
+      res.write("a");
+      setTimeout(() => res.write("b"), 20);
+      setTimeout(() => res.end("c"), 40);
+    };
+    const client = new HttpClient({ maxConcurrentPerHost: 2 });
+
+    const bodies = await Promise.all(
+      Array.from({ length: 6 }, async () =>
+        (await client.fetch(baseUrl)).text(),
+      ),
+    );
+
+    expect(bodies).toEqual(Array.from({ length: 6 }, () => "abc"));
+    expect(maxActive).toBeLessThanOrEqual(2);
+    expect(client.getMetrics()[0]?.inFlight).toBe(0);
+  });
+
+  it("should count unread bodies as in flight", async () => {
+    handler = (_req, res) => {
+      res.writeHead(200);
+      res.write("a");
+      setTimeout(() => res.end("b"), 50);
+    };
+    const client = new HttpClient();
+
+    const response = await client.fetch(baseUrl);
+    expect(client.getMetrics()[0]?.inFlight).toBe(1);
+
+    await response.text();
+    expect(client.getMetrics()[0]?.inFlight).toBe(0);
+  });
+
+  it("should release the slot when a body is cancelled", async () => {
+    handler = (_req, res) => {
+      res.writeHead(200);
+      res.write("a");
+      setTimeout(() => res.end("b"), 200);
+    };
+    const client = new HttpClient({ maxConcurrentPerHost: 1 });
+
+    const first = await client.fetch(baseUrl);
+    await first.body?.cancel();
+    const second = client.fetch(baseUrl);
+
+    expect(client.getMetrics()[0]?.queued).toBe(0);
+    await (await second).body?.cancel();
+  });
+
+  it("should release the slot when a body stalls", async () => {
+    let stalled: ServerResponse | undefined;
+    handler = (_req, res) => {
+      stalled = res;
+      res.writeHead(200);
+      res.write("a");
+    };
+    const client = new HttpClient({ maxConcurrentPerHost: 1 });
+
+    const response = await client.fetch(baseUrl, { bodyTimeout: 50 });
+
+    await expect(response.text()).rejects.toThrow("idle");
+    expect(client.getMetrics()[0]?.inFlight).toBe(0);
+    stalled?.end();
+  });
+
+  it("should release the slot when a body is never read", async () => {
+    handler = (_req, res) => {
+      res.writeHead(200);
+      res.write("a");
+      setTimeout(() => res.end("b"), 200);
+    };
+    const client = new HttpClient({ maxConcurrentPerHost: 1 });
+
+    await client.fetch(baseUrl, { bodyTimeout: 30 });
+    await delay(60);
+    expect(client.getMetrics()[0]?.inFlight).toBe(0);
+
+    handler = (_req, res) => res.end("ok");
+    const next = await client.fetch(baseUrl, { queueTimeout: 10 });
+    expect(await next.text()).toBe("ok");
+  });
+
+  it("should reject requests that wait too long for a slot", async () => {
+    handler = (_req, res) => {
+      res.writeHead(200);
+      res.write("a");
+      setTimeout(() => res.end("b"), 200);
+    };
+    const client = new HttpClient({ maxConcurrentPerHost: 1 });
+
+    const first = await client.fetch(baseUrl);
+    await expect(
+      client.fetch(baseUrl, { queueTimeout: 20 }),
+    ).rejects.toThrow("No connection slot");
+
+    expect(client.getMetrics()[0]?.queued).toBe(0);
+    await first.body?.cancel();
+  });
+
+  it("should keep the final URL of wrapped responses", async () => {
+    const client = new HttpClient();
+
+    const response = await client.fetch(`${baseUrl}/page`);
+
+    expect(response.url).toBe(`${baseUrl}/page`);
+    expect(await response.text()).toBe("ok");
+  });
+
+  it("should retry retryable statuses and honor Retry-After", async () => {
+    let calls = 0;
+    handler = (_req, res) => {
+      calls++;
+      if (calls === 1) {
+        res.writeHead(429, { "Retry-After": "0" });
+        res.end("slow down");
+        return;
+      }
+      res.end("ok");
+    };
+    const client = new HttpClient();
+
+    const response = await client.fetch(baseUrl, {
+      retries: 2,
+      retryDelay: 5000,
+    });
+
+    expect(response.status).toBe(200);
+    expect(await response.text()).toBe("ok");
+    expect(calls).toBe(2);
+    expect(client.getMetrics()[0]?.retries).toBe(1);
+  });
+
+  it("should return the response when Retry-After exceeds the cap", async () => {
+    handler = (_req, res) => {
+      res.writeHead(503, { "Retry-After": "120" });
+      res.end();
+    };
+    const client = new HttpClient({ maxRetryDelay: 1000 });
+
+    const response = await client.fetch(baseUrl, { retries: 3 });
+    await response.body?.cancel();
+
+    expect(response.status).toBe(503);
+    expect(client.getMetrics()[0]?.requests).toBe(1);
+  });
+
+  it("should not retry statuses when retries are disabled", async () => {
+    handler = (_req, res) => {
+      res.writeHead(503);
+      res.end();
+    };
+    const client = new HttpClient();
+
+    const response = await client.fetch(baseUrl);
+    await response.body?.cancel();
+
+    expect(response.status).toBe(503);
+    expect(client.getMetrics()[0]?.requests).toBe(1);
+  });
+
+  it("should retry timeouts with backoff", async () => {
+    let calls = 0;
+    handler = (_req, res) => {
+      calls++;
+      if (calls === 1) {
+        setTimeout(() => res.end("late"), 200);
+        return;
+      }
+      res.end("ok");
+    };
+    const client = new HttpClient();
+
+    const response = await client.fetch(baseUrl, {
+      timeout: 50,
+      retries: 1,
+      retryDelay: 10,
+    });
+
+    expect(await response.text()).toBe("ok");
+    const [metrics] = client.getMetrics();
+    expect(metrics?.failures).toBe(1);
+    expect(metrics?.retries).toBe(1);
+  });
+
+  it("should throw after exhausting retries", async () => {
+    handler = (_req, res) => {
+      setTimeout(() => res.end("late"), 200);
+    };
+    const client = new HttpClient();
+
+    await expect(
+      client.fetch(baseUrl, { timeout: 20, retries: 1, retryDelay: 1 }),
+    ).rejects.toThrow();
+    expect(client.getMetrics()[0]?.requests).toBe(2);
+  });
+
+  it("should drop queued requests when aborted", async () => {
+    handler = (_req, res) => {
+      setTimeout(() => res.end("ok"), 50);
+    };
+    const client = new HttpClient({ maxConcurrentPerHost: 1 });
+    const controller = new AbortController();
+
+    const first = client.fetch(baseUrl);
+    const second = client.fetch(baseUrl, { signal: controller.signal });
+    await delay(5);
+    expect(client.getMetrics()[0]?.queued).toBe(1);
+
+    controller.abort();
+
+    await expect(second).rejects.toThrow();
+    await (await first).text();
+    expect(client.getMetrics()[0]?.requests).toBe(1);
+  });
+
+  it("should record latency in histogram buckets", async () => {
+    handler = (_req, res) => {
+      setTimeout(() => res.end("ok"), 30);
+    };
+    const client = new HttpClient({ latencyBucketsMs: [10, 1000] });
+
+    await (await client.fetch(baseUrl)).text();
+    await (await client.fetch(baseUrl)).text();
+
+    const latency = client.getMetrics()[0]?.latency;
+    expect(latency?.count).toBe(2);
+    expect(latency?.counts).toEqual([0, 2, 0]);
+    expect(latency?.maxMs).toBeGreaterThanOrEqual(25);
+  });
+});
+
+describe("fetchExternal", () => {
+  it("should send requests through the given client", async () => {
+    handler = (req, res) => {
+      res.setHeader("Set-Cookie", ["a=1; Path=/", "b=2; HttpOnly"]);
+      res.end(req.headers["user-agent"] ? "with-ua" : "no-ua");
+    };
+    const client = new HttpClient();
+
+    const result = await fetchExternal(baseUrl, { client });
+
+    expect(await result.text()).toBe("with-ua");
+    expect(result.cookies).toBe("a=1; b=2");
+    expect(client.getMetrics()[0]?.requests).toBe(1);
+  });
+});
+
+describe("parseRetryAfter", () => {
+  it("should parse delta-seconds", () => {
+    expect(parseRetryAfter("3")).toBe(3000);
+  });
+
+  it("should parse HTTP dates", () => {
+    const now = Date.parse("2025-01-01T00:00:00Z");
+    expect(parseRetryAfter("Wed, 01 Jan 2025 00:00:10 GMT", now)).toBe(10000);
+  });
+
+  it("should ignore invalid values", () => {
+    expect(parseRetryAfter(null)).toBeNull();
+    expect(parseRetryAfter("soon")).toBeNull();
+  });
+});
+
+describe("computeBackoffDelay", () => {
+  it("should grow exponentially within jitter bounds", () => {
+    expect(computeBackoffDelay(0, 100, 10000, () => 0)).toBe(50);
+    expect(computeBackoffDelay(2, 100, 10000, () => 0)).toBe(200);
+    expect(computeBackoffDelay(2, 100, 10000, () => 1)).toBe(400);
+  });
+
+  it("should cap at the maximum delay", () => {
+    expect(computeBackoffDelay(10, 100, 1000, () => 1)).toBe(1000);
+  });
+});
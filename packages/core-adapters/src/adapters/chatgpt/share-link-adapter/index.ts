@@ -19,9 +19,9 @@
 import type { Provider } from "@chat2poster/core-schema";
 import { createAppError } from "@chat2poster/core-schema";
 import { BaseShareLinkAdapter, type RawMessage } from "../../../base";
-import { fetchHtmlWithCookies } from "../../../network";
+import { fetchHtmlStreamWithCookies } from "../../../network";
 import { error as logError } from "../shared/logger";
-import { parseShareHtml } from "./parsing-strategies";
+import { parseShareStream } from "./parsing-strategies";
 
 // Re-export types for external use
 export type {
@@ -57,9 +57,16 @@ export { stripPrivateUse, stripCitationTokens } from "../shared/text-processor";
 // Re-export React Flight decoder utilities
 export {
   decodeLoader,
+  resolveLoaderPath,
   extractEnqueueContent,
   extractLoaderPayload,
+  FlightPayloadScanner,
 } from "./react-flight-decoder";
+export {
+  scanShareHtmlStream,
+  type ShareHtmlScan,
+  type ShareHtmlScanOptions,
+} from "./share-html-stream";
 
 // Re-export content flattener (now from content-flatteners directory)
 export {
@@ -77,6 +84,7 @@ export {
   parseModernShare,
   parseLegacyShare,
   parseShareHtml,
+  parseShareStream,
 } from "./parsing-strategies";
 
 // Re-export message converter
@@ -105,8 +113,8 @@ export class ChatGPTShareLinkAdapter extends BaseShareLinkAdapter {
     const normalizedUrl = url.replace("chat.openai.com", "chatgpt.com");
 
     try {
-      const { html, cookies } = await fetchHtmlWithCookies(normalizedUrl);
-      const messages = await parseShareHtml(html, cookies);
+      const { body, cookies } = await fetchHtmlStreamWithCookies(normalizedUrl);
+      const messages = await parseShareStream(body, cookies);
 
       if (messages.length === 0) {
         throw createAppError(
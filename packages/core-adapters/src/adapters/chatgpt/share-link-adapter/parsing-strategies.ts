@@ -8,34 +8,80 @@
 import type { RawMessage } from "../../../base";
 import { createScopedLogger } from "../shared/logger";
 import { convertShareDataToMessages } from "../shared/message-converter";
-import type { ShareData } from "../shared/types";
-import { decodeLoader, extractLoaderPayload } from "./react-flight-decoder";
+import type { JsonValue, ShareData } from "../shared/types";
+import {
+  extractLoaderPayload,
+  resolveLoaderPath,
+} from "./react-flight-decoder";
+import { scanShareHtmlStream } from "./share-html-stream";
 
 const logger = createScopedLogger("ParsingStrategies");
 
 /**
- * Extract share data from modern format (React Flight)
+ * Loader path of the share route; only this part of the payload is decoded
+ */
+const SHARE_ROUTE_PATH = ["loaderData", "routes/share.$shareId.($action)"];
+
+/**
+ * Share data extracted by a strategy
+ */
+interface ExtractedShareData {
+  data: ShareData;
+  sharedConversationId?: string;
+}
+
+/**
+ * Whether a decoded value looks like share data
+ */
+function isShareData(value: unknown): value is ShareData {
+  return (
+    typeof value === "object" &&
+    value !== null &&
+    !Array.isArray(value) &&
+    Boolean((value as ShareData).mapping)
+  );
+}
+
+/**
+ * Extract share data from a React Flight loader payload
  *
  * @returns The share data and shared conversation ID, or null if not found
  */
-function extractModernShareData(
-  html: string,
-): { data: ShareData; sharedConversationId?: string } | null {
-  const loader = extractLoaderPayload(html);
-  if (!loader) {
+function extractShareDataFromLoader(
+  loader: JsonValue[],
+): ExtractedShareData | null {
+  const data = resolveLoaderPath(loader, [
+    ...SHARE_ROUTE_PATH,
+    "serverResponse",
+    "data",
+  ]);
+
+  if (!isShareData(data)) {
     return null;
   }
 
-  const decoded = decodeLoader(loader);
-  const route = decoded.loaderData?.["routes/share.$shareId.($action)"];
-  const data = route?.serverResponse?.data;
-  const sharedConversationId = route?.sharedConversationId;
+  const sharedConversationId = resolveLoaderPath(loader, [
+    ...SHARE_ROUTE_PATH,
+    "sharedConversationId",
+  ]);
 
-  if (!data?.mapping) {
-    return null;
-  }
+  return {
+    data,
+    sharedConversationId:
+      typeof sharedConversationId === "string"
+        ? sharedConversationId
+        : undefined,
+  };
+}
 
-  return { data, sharedConversationId };
+/**
+ * Extract share data from modern format (React Flight)
+ *
+ * @returns The share data and shared conversation ID, or null if not found
+ */
+function extractModernShareData(html: string): ExtractedShareData | null {
+  const loader = extractLoaderPayload(html);
+  return loader ? extractShareDataFromLoader(loader) : null;
 }
 
 /**
@@ -43,9 +89,7 @@ function extractModernShareData(
  *
  * @returns The share data and shared conversation ID, or null if not found
  */
-function extractLegacyShareData(
-  html: string,
-): { data: ShareData; sharedConversationId?: string } | null {
+function extractLegacyShareData(html: string): ExtractedShareData | null {
   const match = /<script id="__NEXT_DATA__"[^>]*>([^<]+)<\/script>/.exec(html);
   if (!match?.[1]) {
     return null;
@@ -164,3 +208,61 @@ export async function parseShareHtml(
   logger.debug("No messages extracted from either strategy");
   return [];
 }
+
+/**
+ * Parse a share page from its response body as it streams in.
+ *
+ * Only the loader payload (or the legacy __NEXT_DATA__ script) is kept in
+ * memory, and only the share route of the payload is decoded. Produces the
+ * same messages as `parseShareHtml` on the full HTML.
+ */
+export async function parseShareStream(
+  stream: ReadableStream<Uint8Array>,
+  cookies?: string,
+): Promise<RawMessage[]> {
+  let modern: ExtractedShareData | null | undefined;
+  const { loader, nextDataScript } = await scanShareHtmlStream(stream, {
+    // Keep scanning for __NEXT_DATA__ when the payload has no share data
+    acceptLoader: (payload) => {
+      modern = extractShareDataFromLoader(payload);
+      return modern !== null;
+    },
+  });
+
+  const strategies: [string, () => ExtractedShareData | null][] = [
+    [
+      "modern",
+      // Payloads only completed at the end of the stream are not checked yet
+      () =>
+        modern !== undefined
+          ? modern
+          : loader && extractShareDataFromLoader(loader),
+    ],
+    [
+      "legacy",
+      () => (nextDataScript ? extractLegacyShareData(nextDataScript) : null),
+    ],
+  ];
+
+  for (const [name, extract] of strategies) {
+    const extracted = extract();
+    if (!extracted) continue;
+
+    try {
+      const messages = await convertShareDataToMessages(
+        extracted.data,
+        extracted.sharedConversationId,
+        cookies,
+      );
+      if (messages.length > 0) {
+        logger.debug(`Parsed using ${name} strategy`, messages.length);
+        return messages;
+      }
+    } catch {
+      // Fall through to the next strategy
+    }
+  }
+
+  logger.debug("No messages extracted from either strategy");
+  return [];
+}
@@ -6,85 +6,123 @@
 
 import type { JsonValue, DecodedLoader } from "../shared/types";
 
+/** Loader key references look like "_123" */
+const KEY_REFERENCE = /^_\d+$/;
+
+/** Resolution states; entries start at 0 (unresolved) */
+const IN_PROGRESS = 1;
+const RESOLVED = 2;
+
 /**
- * Decode a flattened React Flight loader array into structured data.
+ * Resolves loader values on demand, caching each index once resolved.
  *
- * The loader format is a flat array where:
- * - Odd indices contain keys (strings)
- * - Even indices contain values (which may be integers referencing other indices)
- * - Objects use keys like "_1", "_2" that reference other indices
+ * Resolution state lives in flat arrays indexed like the loader, and
+ * decoded keys are memoized, since the same few keys repeat on every node.
  */
-export function decodeLoader(loader: JsonValue[]): DecodedLoader {
-  const cache = new Map<number, JsonValue>();
+function createLoaderResolver(loader: JsonValue[]) {
+  const status = new Uint8Array(loader.length);
+  const values = new Array<JsonValue>(loader.length);
+  const keys = new Map<string, string>();
 
   /**
    * Decode a key that might be a reference (e.g., "_1" -> loader[1])
    */
-  function decodeKey(rawKey: JsonValue): string {
-    if (
-      typeof rawKey === "string" &&
-      rawKey.startsWith("_") &&
-      /^\d+$/.test(rawKey.slice(1))
-    ) {
-      const idx = parseInt(rawKey.slice(1), 10);
-      if (idx >= 0 && idx < loader.length) {
-        const candidate = loader[idx];
-        if (typeof candidate === "string") {
-          return candidate;
-        }
+  function decodeKey(rawKey: string): string {
+    let key = keys.get(rawKey);
+    if (key !== undefined) {
+      return key;
+    }
+
+    key = rawKey;
+    if (KEY_REFERENCE.test(rawKey)) {
+      const candidate = loader[Number(rawKey.slice(1))];
+      if (typeof candidate === "string") {
+        key = candidate;
       }
     }
-    return typeof rawKey === "object" && rawKey !== null
-      ? JSON.stringify(rawKey)
-      : String(rawKey);
+    keys.set(rawKey, key);
+    return key;
   }
 
   /**
-   * Resolve a value, following integer references
+   * Resolve a reference to a loader index.
+   * Values outside the loader are returned as-is; cycles resolve to null.
    */
   function resolve(value: JsonValue): JsonValue {
-    // Integer reference to another index
-    if (typeof value === "number" && Number.isInteger(value)) {
-      if (cache.has(value)) {
-        return cache.get(value)!;
-      }
-      if (value < 0 || value >= loader.length) {
-        return value;
-      }
-      cache.set(value, null);
-      const loaderValue = loader[value];
-      if (loaderValue === undefined) return value;
-      const resolved = resolve(loaderValue);
-      cache.set(value, resolved);
-      return resolved;
+    if (typeof value !== "number" || !Number.isInteger(value)) {
+      return resolveEntry(value);
+    }
+    if (value < 0 || value >= loader.length) {
+      return value;
     }
 
+    const state = status[value];
+    if (state === RESOLVED) {
+      return values[value]!;
+    }
+    if (state === IN_PROGRESS) {
+      return null;
+    }
+
+    status[value] = IN_PROGRESS;
+    const resolved = resolveEntry(loader[value]!);
+    values[value] = resolved;
+    status[value] = RESOLVED;
+    return resolved;
+  }
+
+  /**
+   * Resolve a loader entry. Primitives are literal values; array items and
+   * object values are references to other indices.
+   */
+  function resolveEntry(entry: JsonValue): JsonValue {
     // Array - resolve each element
-    if (Array.isArray(value)) {
-      return value.map((item) => resolve(item));
+    if (Array.isArray(entry)) {
+      const result = new Array<JsonValue>(entry.length);
+      for (let i = 0; i < entry.length; i++) {
+        result[i] = resolve(entry[i]!);
+      }
+      return result;
     }
 
     // Object - resolve values and decode keys
-    if (typeof value === "object" && value !== null) {
+    if (typeof entry === "object" && entry !== null) {
       const result: Record<string, JsonValue> = {};
-      for (const [k, v] of Object.entries(value)) {
-        result[decodeKey(k)] = resolve(v);
+      for (const rawKey in entry) {
+        result[decodeKey(rawKey)] = resolve(entry[rawKey]!);
       }
       return result;
     }
 
-    return value;
+    return entry;
   }
 
-  // Build the result by iterating through key-value pairs
+  return { decodeKey, resolve, resolveEntry };
+}
+
+/**
+ * Decode a flattened React Flight loader array into structured data.
+ *
+ * The loader format is a flat array where:
+ * - Odd indices contain keys (strings)
+ * - Even indices contain values (which may be integers referencing other indices)
+ * - Objects use keys like "_1", "_2" that reference other indices
+ * - Array items and object values are always references; primitives stored
+ *   in the array are literal values (a stored `0` is the number 0)
+ *
+ * Prefer `resolveLoaderPath` when only part of the payload is needed.
+ */
+export function decodeLoader(loader: JsonValue[]): DecodedLoader {
+  const { resolveEntry } = createLoaderResolver(loader);
+
+  // Build the result by iterating through key-value pairs after index 0
   const resolved: Record<string, JsonValue> = {};
-  const iter = loader.slice(1);
 
-  for (let i = 0; i < iter.length - 1; i += 2) {
-    const key = iter[i];
-    const value = iter[i + 1];
+  for (let i = 1; i < loader.length - 1; i += 2) {
+    const key = loader[i];
+    const value = loader[i + 1];
     if (typeof key === "string" && !(key in resolved) && value !== undefined) {
-      resolved[key] = resolve(value);
+      resolved[key] = resolveEntry(value);
     }
   }
 
@@ -92,27 +130,113 @@ export function decodeLoader(loader: JsonValue[]): DecodedLoader {
 }
 
 /**
- * Extract content from streamController.enqueue() call
+ * Resolve a single path of a loader payload.
  *
- * Handles nested parentheses and quoted strings properly.
+ * Walks `path` through unresolved loader entries and only fully decodes the
+ * value at the end of it, so the rest of the payload is never materialized.
+ * Returns the same value `decodeLoader` would produce at that path.
+ *
+ * @example
+ * ```ts
+ * const data = resolveLoaderPath(loader, [
+ *   "loaderData",
+ *   "routes/share.$shareId.($action)",
+ *   "serverResponse",
+ *   "data",
+ * ]);
+ * ```
  */
-export function extractEnqueueContent(
-  html: string,
-  startPos: number,
-): string | null {
-  let pos = startPos;
-  let depth = 1;
-  let inString = false;
-  let escape = false;
+export function resolveLoaderPath(
+  loader: JsonValue[],
+  path: readonly string[],
+): JsonValue | undefined {
+  const [rootKey, ...rest] = path;
+  if (rootKey === undefined) {
+    return undefined;
+  }
+
+  let entry: JsonValue | undefined;
+  for (let i = 1; i < loader.length - 1; i += 2) {
+    if (loader[i] === rootKey) {
+      entry = loader[i + 1];
+      break;
+    }
+  }
+  if (entry === undefined) {
+    return undefined;
+  }
+
+  const { decodeKey, resolve, resolveEntry } = createLoaderResolver(loader);
+  if (rest.length === 0) {
+    return resolveEntry(entry);
+  }
+
+  for (let depth = 0; depth < rest.length; depth++) {
+    const segment = rest[depth]!;
+    let ref: JsonValue | undefined;
+
+    if (Array.isArray(entry)) {
+      ref = /^\d+$/.test(segment) ? entry[Number(segment)] : undefined;
+    } else if (typeof entry === "object" && entry !== null) {
+      // Later keys win, matching decodeLoader's object construction
+      for (const [k, v] of Object.entries(entry)) {
+        if (decodeKey(k) === segment) {
+          ref = v;
+        }
+      }
+    }
+
+    if (ref === undefined) {
+      return undefined;
+    }
+    if (depth === rest.length - 1) {
+      return resolve(ref);
+    }
+    entry =
+      typeof ref === "number" &&
+      Number.isInteger(ref) &&
+      ref >= 0 &&
+      ref < loader.length
+        ? loader[ref]
+        : ref;
+  }
+
+  return undefined;
+}
 
-  while (pos < html.length && depth > 0) {
-    const char = html[pos];
+const ENQUEUE_MARKER = "streamController.enqueue(";
+
+/**
+ * Scanner state inside a streamController.enqueue() call
+ */
+interface EnqueueScanState {
+  depth: number;
+  inString: boolean;
+  escape: boolean;
+}
+
+/**
+ * Advance the scanner from `from` over one chunk of text.
+ *
+ * @returns The position just after the closing parenthesis, or -1 if the
+ * text ended first (the state is kept for the next chunk)
+ */
+function scanEnqueueCall(
+  text: string,
+  from: number,
+  state: EnqueueScanState,
+): number {
+  let { depth, inString, escape } = state;
+  let pos = from;
+
+  while (pos < text.length && depth > 0) {
+    const char = text[pos];
 
     if (escape) {
       escape = false;
     } else if (char === "\\") {
       escape = true;
-    } else if (char === '"' && !escape) {
+    } else if (char === '"') {
       inString = !inString;
     } else if (!inString) {
       if (char === "(") {
@@ -124,73 +248,175 @@ export function extractEnqueueContent(
     pos++;
   }
 
-  if (depth === 0) {
-    return html.slice(startPos, pos - 1).trim();
+  state.depth = depth;
+  state.inString = inString;
+  state.escape = escape;
+  return depth === 0 ? pos : -1;
+}
+
+/**
+ * Extract content from streamController.enqueue() call
+ *
+ * Handles nested parentheses and quoted strings properly.
+ */
+export function extractEnqueueContent(
+  html: string,
+  startPos: number,
+): string | null {
+  const end = scanEnqueueCall(html, startPos, {
+    depth: 1,
+    inString: false,
+    escape: false,
+  });
+
+  if (end !== -1) {
+    return html.slice(startPos, end - 1).trim();
   }
   return null;
 }
 
 /**
- * Extract React Flight loader payload from HTML
+ * Parse the argument of an enqueue() call into a loader array
  */
-export function extractLoaderPayload(html: string): JsonValue[] | null {
-  const marker = "streamController.enqueue(";
-  let searchStart = 0;
+function parseEnqueueChunk(rawChunk: string): JsonValue[] | null {
+  let chunk = rawChunk;
 
-  while (true) {
-    const markerPos = html.indexOf(marker, searchStart);
-    if (markerPos === -1) break;
+  // Remove outer quotes and unescape JSON string
+  if (chunk.startsWith('"') && chunk.endsWith('"')) {
+    try {
+      chunk = JSON.parse(chunk) as string;
+    } catch {
+      // Continue with raw string
+    }
+  }
+
+  chunk = chunk.trim();
 
-    const contentStart = markerPos + marker.length;
-    const rawChunk = extractEnqueueContent(html, contentStart);
+  // Try to parse as JSON array
+  if (!chunk.startsWith("[")) {
+    return null;
+  }
 
-    if (!rawChunk) {
-      searchStart = contentStart;
-      continue;
+  try {
+    const parsed = JSON.parse(chunk) as unknown;
+    if (Array.isArray(parsed)) {
+      return parsed as JsonValue[];
     }
+  } catch {
+    // Try to fix common escape issues
+    try {
+      const fixed = chunk
+        .replace(/\\x([0-9A-Fa-f]{2})/g, (_match: string, hex: string) =>
+          String.fromCharCode(parseInt(hex, 16)),
+        )
+        .replace(/\\u([0-9A-Fa-f]{4})/g, (_match: string, hex: string) =>
+          String.fromCharCode(parseInt(hex, 16)),
+        );
+      const parsedFixed = JSON.parse(fixed) as unknown;
+      if (Array.isArray(parsedFixed)) {
+        return parsedFixed as JsonValue[];
+      }
+    } catch {
+      // Not a loader payload
+    }
+  }
 
-    let chunk = rawChunk;
+  return null;
+}
 
-    // Remove outer quotes and unescape JSON string
-    if (chunk.startsWith('"') && chunk.endsWith('"')) {
-      try {
-        chunk = JSON.parse(chunk) as string;
-      } catch {
-        // Continue with raw string
-      }
+/**
+ * Incremental extractor for the React Flight loader payload.
+ *
+ * Text can be pushed in arbitrary chunks (e.g. as a response body streams
+ * in). Each chunk is scanned once with the scanner state carried over, so
+ * the cost stays linear in the page size. Only the pieces of the enqueue()
+ * call currently being scanned are kept; text between calls is dropped.
+ */
+export class FlightPayloadScanner {
+  /** End of the previous chunk, in case a marker straddles two chunks */
+  private tail = "";
+  /** Non-null while inside an enqueue() call */
+  private state: EnqueueScanState | null = null;
+  /** Pieces of the current enqueue() argument */
+  private parts: string[] = [];
+  private result: JsonValue[] | null = null;
+
+  /**
+   * The loader payload, once found
+   */
+  get loader(): JsonValue[] | null {
+    return this.result;
+  }
+
+  /**
+   * Feed the next chunk of HTML.
+   *
+   * @returns The loader payload as soon as it has been found
+   */
+  push(text: string): JsonValue[] | null {
+    if (!this.result) {
+      this.scan(text);
+    }
+    return this.result;
+  }
+
+  /**
+   * Signal the end of input and return the loader payload, if any
+   */
+  finish(): JsonValue[] | null {
+    // An unterminated call may still contain later markers
+    while (!this.result && this.state) {
+      const unterminated = this.parts.join("");
+      this.state = null;
+      this.parts = [];
+      this.tail = "";
+      this.scan(unterminated);
     }
+    this.tail = "";
+    this.parts = [];
+    return this.result;
+  }
 
-    chunk = chunk.trim();
+  private scan(chunk: string): void {
+    let text = chunk;
+    let pos = 0;
 
-    // Try to parse as JSON array
-    if (chunk.startsWith("[")) {
-      try {
-        const parsed = JSON.parse(chunk) as unknown;
-        if (Array.isArray(parsed)) {
-          return parsed as JsonValue[];
-        }
-      } catch {
-        // Try to fix common escape issues
-        try {
-          const fixed = chunk
-            .replace(/\\x([0-9A-Fa-f]{2})/g, (_match: string, hex: string) =>
-              String.fromCharCode(parseInt(hex, 16)),
-            )
-            .replace(/\\u([0-9A-Fa-f]{4})/g, (_match: string, hex: string) =>
-              String.fromCharCode(parseInt(hex, 16)),
-            );
-          const parsedFixed = JSON.parse(fixed) as unknown;
-          if (Array.isArray(parsedFixed)) {
-            return parsedFixed as JsonValue[];
-          }
-        } catch {
-          // Continue to next match
+    while (!this.result) {
+      if (!this.state) {
+        text = this.tail + text.slice(pos);
+        const markerPos = text.indexOf(ENQUEUE_MARKER);
+        if (markerPos === -1) {
+          this.tail = text.slice(-(ENQUEUE_MARKER.length - 1));
+          return;
         }
+        this.tail = "";
+        this.state = { depth: 1, inString: false, escape: false };
+        pos = markerPos + ENQUEUE_MARKER.length;
+      }
+
+      const end = scanEnqueueCall(text, pos, this.state);
+      if (end === -1) {
+        this.parts.push(text.slice(pos));
+        return;
       }
-    }
 
-    searchStart = contentStart + rawChunk.length;
+      this.parts.push(text.slice(pos, end - 1));
+      const rawChunk = this.parts.join("").trim();
+      this.parts = [];
+      this.state = null;
+      pos = end;
+      if (rawChunk) {
+        this.result = parseEnqueueChunk(rawChunk);
+      }
+    }
   }
+}
 
-  return null;
+/**
+ * Extract React Flight loader payload from HTML
+ */
+export function extractLoaderPayload(html: string): JsonValue[] | null {
+  const scanner = new FlightPayloadScanner();
+  scanner.push(html);
+  return scanner.finish();
 }
@@ -0,0 +1,134 @@
+/**
+ * Share Page Stream Scanner
+ *
+ * Reads a ChatGPT share page body incrementally and keeps only what the
+ * parsing strategies need: the React Flight loader payload (modern pages)
+ * and the __NEXT_DATA__ script (legacy pages). Everything else is dropped
+ * as it streams past, and reading stops once a usable loader payload is
+ * found.
+ */
+
+import type { JsonValue } from "../shared/types";
+import { FlightPayloadScanner } from "./react-flight-decoder";
+
+const NEXT_DATA_START = '<script id="__NEXT_DATA__"';
+const SCRIPT_END = "</script>";
+
+/**
+ * Parts of a share page used by the parsing strategies
+ */
+export interface ShareHtmlScan {
+  /** React Flight loader payload, if present */
+  loader: JsonValue[] | null;
+  /** The complete `<script id="__NEXT_DATA__">` element, if present */
+  nextDataScript: string | null;
+}
+
+/**
+ * Options for scanShareHtmlStream
+ */
+export interface ShareHtmlScanOptions {
+  /**
+   * Whether a loader payload has what the caller needs. Rejected payloads
+   * keep the scan going so the __NEXT_DATA__ script can still be captured.
+   * @default accepts every payload
+   */
+  acceptLoader?: (loader: JsonValue[]) => boolean;
+}
+
+/**
+ * Incrementally captures the __NEXT_DATA__ script element
+ */
+class NextDataCapture {
+  private tail = "";
+  private captured: string | null = null;
+  private searchFrom = 0;
+  private done = false;
+
+  get script(): string | null {
+    return this.done ? this.captured : null;
+  }
+
+  push(text: string): void {
+    if (this.done) return;
+
+    if (this.captured === null) {
+      const combined = this.tail + text;
+      const start = combined.indexOf(NEXT_DATA_START);
+      if (start === -1) {
+        // Keep a tail in case the marker straddles two chunks
+        this.tail = combined.slice(-(NEXT_DATA_START.length - 1));
+        return;
+      }
+      this.tail = "";
+      this.captured = combined.slice(start);
+    } else {
+      this.captured += text;
+    }
+
+    const end = this.captured.indexOf(SCRIPT_END, this.searchFrom);
+    if (end === -1) {
+      this.searchFrom = Math.max(
+        0,
+        this.captured.length - SCRIPT_END.length + 1,
+      );
+      return;
+    }
+    this.captured = this.captured.slice(0, end + SCRIPT_END.length);
+    this.done = true;
+  }
+}
+
+/**
+ * Scan a share page body stream.
+ *
+ * The stream is cancelled as soon as an accepted loader payload is found,
+ * when a rejected payload is followed by the __NEXT_DATA__ script, or when
+ * scanning fails.
+ */
+export async function scanShareHtmlStream(
+  stream: ReadableStream<Uint8Array>,
+  options: ShareHtmlScanOptions = {},
+): Promise<ShareHtmlScan> {
+  const { acceptLoader = () => true } = options;
+  const reader = stream.getReader();
+  const decoder = new TextDecoder();
+  const flight = new FlightPayloadScanner();
+  const nextData = new NextDataCapture();
+  let loaderAccepted: boolean | null = null;
+
+  try {
+    while (true) {
+      const { done, value } = await reader.read();
+      const text = done
+        ? decoder.decode()
+        : decoder.decode(value, { stream: true });
+
+      const loader = flight.push(text);
+      if (loader && loaderAccepted === null) {
+        loaderAccepted = acceptLoader(loader);
+      }
+      if (!loaderAccepted) {
+        nextData.push(text);
+      }
+
+      const complete =
+        loaderAccepted === true ||
+        (loaderAccepted === false && nextData.script !== null);
+      if (complete || done) {
+        if (!done) {
+          await reader.cancel().catch(() => undefined);
+        }
+        break;
+      }
+    }
+  } catch (error) {
+    // Stop the download (and free its connection slot) on scan errors
+    await reader.cancel().catch(() => undefined);
+    throw error;
+  } finally {
+    reader.releaseLock();
+  }
+
+  return { loader: flight.finish(), nextDataScript: nextData.script };
+}
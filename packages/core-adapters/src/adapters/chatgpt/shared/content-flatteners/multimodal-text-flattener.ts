@@ -66,6 +66,7 @@ async function fetchDownloadUrl(
 
     if (!result.ok) {
       logger.debug("Response not ok");
+      await result.response.body?.cancel().catch(() => undefined);
       return null;
     }
 
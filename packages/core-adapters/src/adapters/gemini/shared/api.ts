@@ -52,6 +52,7 @@ export async function fetchBatchExecutePayload(
   );
 
   if (!result.ok) {
+    await result.response.body?.cancel().catch(() => undefined);
     throw createAppError(
       "E-PARSE-005",
       `Gemini API responded with ${result.status}`,
@@ -100,12 +100,17 @@ export {
   fetchJson,
   isUrlReachable,
   getRedirectUrl,
+  HttpClient,
+  getSharedHttpClient,
+  configureSharedHttpClient,
 } from "./network";
 export type {
   HeaderPreset,
   HeaderOptions,
   FetchOptions,
   FetchResult,
+  HttpClientConfig,
+  HostMetrics,
 } from "./network";
 
 // Adapter implementations
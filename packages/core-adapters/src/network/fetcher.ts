@@ -5,7 +5,8 @@
  * - Automatic header generation
  * - Error handling
  * - Response type helpers
- * - Retry support
+ * - Retry support with backoff and per-host concurrency limits
+ *   (via the shared HttpClient)
  */
 
 import {
@@ -15,6 +16,7 @@ import {
   getRequestHeaders,
   type HeaderOptions,
 } from "./headers";
+import { getSharedHttpClient, type HttpClient } from "./http-client";
 
 /**
  * Configuration for fetch requests
@@ -31,6 +33,19 @@ export interface FetchOptions extends Omit<RequestInit, "headers"> {
    */
   timeout?: number;
 
+  /**
+   * Maximum wait for a free per-host connection slot in milliseconds
+   * @default 30000
+   */
+  queueTimeout?: number;
+
+  /**
+   * Maximum time in milliseconds the response body may go without
+   * delivering a chunk before it errors
+   * @default 30000
+   */
+  bodyTimeout?: number;
+
   /**
    * Number of retry attempts on failure
    * @default 0
@@ -38,10 +53,16 @@ export interface FetchOptions extends Omit<RequestInit, "headers"> {
   retries?: number;
 
   /**
-   * Delay between retries in milliseconds
+   * Base delay for exponential backoff between retries in milliseconds
    * @default 1000
    */
   retryDelay?: number;
+
+  /**
+   * Client to send the request through
+   * @default getSharedHttpClient()
+   */
+  client?: HttpClient;
 }
 
 /**
@@ -134,13 +155,6 @@ function resolveHeaders(
   return headers;
 }
 
-/**
- * Sleep for a specified duration
- */
-function sleep(ms: number): Promise<void> {
-  return new Promise((resolve) => setTimeout(resolve, ms));
-}
-
 /**
  * Perform a fetch request with automatic headers and error handling
  *
@@ -156,7 +170,7 @@ function sleep(ms: number): Promise<void> {
  * });
  * const data = await result.json<MyType>();
  *
- * // With retry
+ * // With retry (exponential backoff, honors Retry-After on 429/503)
  * const result = await fetchExternal('https://api.example.com/data', {
  *   retries: 3,
  *   retryDelay: 2000
@@ -167,63 +181,32 @@ export async function fetchExternal(
   url: string,
   options: FetchOptions = {},
 ): Promise<FetchResult> {
-  const {
-    headers,
-    timeout = 30000,
-    retries = 0,
-    retryDelay = 1000,
-    ...fetchOptions
-  } = options;
-
-  const resolvedHeaders = resolveHeaders(headers);
-  let lastError: Error | null = null;
-  let attempt = 0;
-
-  while (attempt <= retries) {
-    try {
-      const controller = new AbortController();
-      const timeoutId = setTimeout(() => controller.abort(), timeout);
-
-      const response = await fetch(url, {
-        ...fetchOptions,
-        headers: resolvedHeaders,
-        signal: controller.signal,
-      });
-
-      clearTimeout(timeoutId);
-
-      // Extract cookies from set-cookie headers
-      const setCookieHeaders = response.headers.getSetCookie?.() ?? [];
-      const cookies = setCookieHeaders
-        .map((cookie) => cookie.split(";")[0]) // Get just the name=value part
-        .join("; ");
-
-      return {
-        response,
-        text: () => response.text(),
-        json: <T>() => response.json() as Promise<T>,
-        arrayBuffer: () => response.arrayBuffer(),
-        blob: () => response.blob(),
-        ok: response.ok,
-        status: response.status,
-        statusText: response.statusText,
-        url: response.url,
-        cookies,
-      };
-    } catch (error) {
-      lastError = error instanceof Error ? error : new Error(String(error));
-
-      if (attempt < retries) {
-        await sleep(retryDelay);
-        attempt++;
-        continue;
-      }
-
-      throw lastError;
-    }
-  }
+  const { headers, client = getSharedHttpClient(), ...requestOptions } =
+    options;
+
+  const response = await client.fetch(url, {
+    ...requestOptions,
+    headers: resolveHeaders(headers),
+  });
 
-  throw lastError ?? new Error("Fetch failed");
+  // Extract cookies from set-cookie headers
+  const setCookieHeaders = response.headers.getSetCookie?.() ?? [];
+  const cookies = setCookieHeaders
+    .map((cookie) => cookie.split(";")[0]) // Get just the name=value part
+    .join("; ");
+
+  return {
+    response,
+    text: () => response.text(),
+    json: <T>() => response.json() as Promise<T>,
+    arrayBuffer: () => response.arrayBuffer(),
+    blob: () => response.blob(),
+    ok: response.ok,
+    status: response.status,
+    statusText: response.statusText,
+    url: response.url,
+    cookies,
+  };
 }
 
 /**
@@ -268,6 +251,7 @@ export async function fetchHtmlWithCookies(
   });
 
   if (!result.ok) {
+    await result.response.body?.cancel().catch(() => undefined);
     throw new Error(`HTTP ${result.status}: ${result.statusText}`);
   }
 
@@ -277,6 +261,43 @@ export async function fetchHtmlWithCookies(
   };
 }
 
+/**
+ * Result of fetching HTML as a stream with cookies
+ */
+export interface FetchHtmlStreamResult {
+  body: ReadableStream<Uint8Array>;
+  cookies: string;
+}
+
+/**
+ * Fetch an HTML page and return its body as a stream, for parsers that
+ * only need part of the page and should not buffer all of it
+ *
+ * @example
+ * ```ts
+ * const { body, cookies } = await fetchHtmlStreamWithCookies(url);
+ * ```
+ */
+export async function fetchHtmlStreamWithCookies(
+  url: string,
+  options: Omit<FetchOptions, "headers"> = {},
+): Promise<FetchHtmlStreamResult> {
+  const result = await fetchExternal(url, {
+    ...options,
+    headers: getHtmlHeaders(),
+  });
+
+  if (!result.ok) {
+    await result.response.body?.cancel().catch(() => undefined);
+    throw new Error(`HTTP ${result.status}: ${result.statusText}`);
+  }
+
+  return {
+    body: result.response.body ?? new Blob([]).stream(),
+    cookies: result.cookies,
+  };
+}
+
 /**
  * Fetch JSON data with appropriate headers
  *
@@ -295,6 +316,7 @@ export async function fetchJson<T = unknown>(
   });
 
   if (!result.ok) {
+    await result.response.body?.cancel().catch(() => undefined);
     throw new Error(`HTTP ${result.status}: ${result.statusText}`);
   }
 
@@ -0,0 +1,552 @@
+/**
+ * Shared HTTP Client
+ *
+ * Wraps the runtime `fetch` for upstream calls with:
+ * - Per-host concurrency limits with a FIFO queue
+ * - Exponential backoff with jitter that honors `Retry-After`
+ * - Per-host latency histograms and queue-depth metrics
+ *
+ * Connection pooling is owned by the runtime: Node's fetch (undici) and
+ * Cloudflare Workers keep one keep-alive pool per origin. The client keeps
+ * that pool effective by capping concurrent requests per host (so bursts
+ * queue instead of opening new sockets) and by cancelling the bodies of
+ * responses it discards before a retry, which returns their sockets.
+ *
+ * A request holds its host slot until the response body has been fully
+ * read, cancelled or has errored, so body downloads count against the
+ * limit too. Callers that drop a response without reading it should cancel
+ * its body; otherwise the slot is freed once the body has been idle for
+ * `bodyTimeout`. Waiting for a slot is bounded by `queueTimeout`, so a
+ * stuck host fails requests instead of queueing them forever.
+ */
+
+/**
+ * Client-wide configuration
+ */
+export interface HttpClientConfig {
+  /**
+   * Maximum concurrent requests per host
+   * @default 4
+   */
+  maxConcurrentPerHost: number;
+
+  /**
+   * Per-host overrides of `maxConcurrentPerHost`, keyed by host
+   * (e.g. `{ "chatgpt.com": 2 }`)
+   */
+  hostConcurrency: Record<string, number>;
+
+  /**
+   * Upper bound for a single backoff delay in milliseconds.
+   * A `Retry-After` longer than this is not waited for; the response
+   * is returned as-is.
+   * @default 30000
+   */
+  maxRetryDelay: number;
+
+  /**
+   * Response statuses that are retried (when retries are enabled)
+   * @default [429, 502, 503, 504]
+   */
+  retryStatuses: number[];
+
+  /**
+   * Upper bounds of the latency histogram buckets in milliseconds
+   */
+  latencyBucketsMs: number[];
+}
+
+/**
+ * Default client configuration
+ */
+export const DEFAULT_HTTP_CLIENT_CONFIG: HttpClientConfig = {
+  maxConcurrentPerHost: 4,
+  hostConcurrency: {},
+  maxRetryDelay: 30000,
+  retryStatuses: [429, 502, 503, 504],
+  latencyBucketsMs: [50, 100, 250, 500, 1000, 2500, 5000, 10000],
+};
+
+/**
+ * Options for a single request
+ */
+export interface HttpRequestOptions extends RequestInit {
+  /**
+   * Timeout per attempt in milliseconds, until response headers arrive
+   * @default 30000
+   */
+  timeout?: number;
+
+  /**
+   * Maximum wait for a free host slot in milliseconds, per attempt
+   * @default 30000
+   */
+  queueTimeout?: number;
+
+  /**
+   * Maximum time in milliseconds the response body may go without
+   * delivering a chunk, whether the upstream stalled or the caller stopped
+   * reading. The body then errors and its host slot is released.
+   * @default 30000
+   */
+  bodyTimeout?: number;
+
+  /**
+   * Number of retry attempts on network errors and retryable statuses
+   * @default 0
+   */
+  retries?: number;
+
+  /**
+   * Base delay for exponential backoff in milliseconds
+   * @default 1000
+   */
+  retryDelay?: number;
+}
+
+/**
+ * Latency histogram; `counts[i]` counts requests at or below
+ * `bucketsMs[i]`, and the last count holds everything slower
+ */
+export interface LatencyHistogram {
+  bucketsMs: number[];
+  counts: number[];
+  count: number;
+  sumMs: number;
+  maxMs: number;
+}
+
+/**
+ * Metrics for a single host
+ */
+export interface HostMetrics {
+  host: string;
+  /** Attempts sent upstream, including retries */
+  requests: number;
+  /** Attempts that failed with a network error or timeout */
+  failures: number;
+  /** Attempts that were retried */
+  retries: number;
+  /** Requests currently holding a connection slot (including body reads) */
+  inFlight: number;
+  /** Requests waiting for a connection slot */
+  queued: number;
+  /** Highest queue depth observed */
+  maxQueued: number;
+  latency: LatencyHistogram;
+}
+
+/**
+ * FIFO concurrency limiter for one host
+ */
+class HostLimiter {
+  active = 0;
+  maxQueued = 0;
+  private readonly waiting: (() => void)[] = [];
+
+  constructor(private readonly limit: number) {}
+
+  get queued(): number {
+    return this.waiting.length;
+  }
+
+  /**
+   * Wait for a free slot. Rejects if `signal` aborts or `timeout` elapses
+   * while queued.
+   */
+  acquire(timeout: number, signal?: AbortSignal | null): Promise<void> {
+    if (signal?.aborted) {
+      return Promise.reject(toAbortError(signal));
+    }
+    if (this.active < this.limit) {
+      this.active++;
+      return Promise.resolve();
+    }
+
+    return new Promise((resolve, reject) => {
+      const cleanup = () => {
+        clearTimeout(timeoutId);
+        signal?.removeEventListener("abort", onAbort);
+      };
+      const grant = () => {
+        cleanup();
+        this.active++;
+        resolve();
+      };
+      const dequeue = (error: Error) => {
+        cleanup();
+        const index = this.waiting.indexOf(grant);
+        if (index !== -1) {
+          this.waiting.splice(index, 1);
+        }
+        reject(error);
+      };
+      const onAbort = () => dequeue(toAbortError(signal));
+      const timeoutId = setTimeout(
+        () => dequeue(new Error(`No connection slot free after ${timeout}ms`)),
+        timeout,
+      );
+
+      signal?.addEventListener("abort", onAbort, { once: true });
+      this.waiting.push(grant);
+      this.maxQueued = Math.max(this.maxQueued, this.waiting.length);
+    });
+  }
+
+  release(): void {
+    this.active--;
+    this.waiting.shift()?.();
+  }
+}
+
+function toAbortError(signal?: AbortSignal | null): Error {
+  const reason: unknown = signal?.reason;
+  return reason instanceof Error ? reason : new Error("Request aborted");
+}
+
+/**
+ * Wrap a response so `release` runs once its body has been fully read,
+ * cancelled or has errored (immediately if there is no body).
+ *
+ * A body that delivers no chunk for `idleTimeout` ms, because the upstream
+ * stalled or nobody reads it, is errored and cancelled upstream.
+ */
+function releaseAfterBody(
+  response: Response,
+  release: () => void,
+  idleTimeout: number,
+): Response {
+  const source = response.body;
+  if (!source) {
+    release();
+    return response;
+  }
+
+  let released = false;
+  let idleTimer: ReturnType<typeof setTimeout> | undefined;
+  const releaseOnce = () => {
+    clearTimeout(idleTimer);
+    if (!released) {
+      released = true;
+      release();
+    }
+  };
+
+  const reader = source.getReader();
+  const resetIdleTimer = (
+    controller: ReadableStreamDefaultController<Uint8Array>,
+  ) => {
+    clearTimeout(idleTimer);
+    idleTimer = setTimeout(() => {
+      const error = new Error(`Response body idle for ${idleTimeout}ms`);
+      controller.error(error);
+      reader.cancel(error).catch(() => undefined);
+      releaseOnce();
+    }, idleTimeout);
+  };
+
+  const body = new ReadableStream<Uint8Array>({
+    start(controller) {
+      resetIdleTimer(controller);
+    },
+    async pull(controller) {
+      try {
+        const { done, value } = await reader.read();
+        if (done) {
+          releaseOnce();
+          controller.close();
+        } else {
+          resetIdleTimer(controller);
+          controller.enqueue(value);
+        }
+      } catch (error) {
+        // Also reached when the idle timer already errored the stream
+        releaseOnce();
+        controller.error(error);
+      }
+    },
+    async cancel(reason) {
+      try {
+        await reader.cancel(reason);
+      } finally {
+        releaseOnce();
+      }
+    },
+  });
+
+  const wrapped = new Response(body, {
+    status: response.status,
+    statusText: response.statusText,
+    headers: response.headers,
+  });
+  // Not settable through the constructor
+  Object.defineProperties(wrapped, {
+    url: { value: response.url },
+    redirected: { value: response.redirected },
+  });
+  return wrapped;
+}
+
+/**
+ * Sleep for a duration; rejects early if `signal` aborts
+ */
+function sleep(ms: number, signal?: AbortSignal | null): Promise<void> {
+  return new Promise((resolve, reject) => {
+    if (signal?.aborted) {
+      reject(toAbortError(signal));
+      return;
+    }
+    const onAbort = () => {
+      clearTimeout(timeoutId);
+      reject(toAbortError(signal));
+    };
+    const timeoutId = setTimeout(() => {
+      signal?.removeEventListener("abort", onAbort);
+      resolve();
+    }, ms);
+    signal?.addEventListener("abort", onAbort, { once: true });
+  });
+}
+
+/**
+ * Parse a `Retry-After` header (delta-seconds or HTTP date) into milliseconds
+ */
+export function parseRetryAfter(
+  value: string | null,
+  now = Date.now(),
+): number | null {
+  if (!value) {
+    return null;
+  }
+
+  const trimmed = value.trim();
+  if (/^\d+$/.test(trimmed)) {
+    return Number(trimmed) * 1000;
+  }
+
+  const date = Date.parse(trimmed);
+  if (Number.isNaN(date)) {
+    return null;
+  }
+  return Math.max(0, date - now);
+}
+
+/**
+ * Exponential backoff with equal jitter: half of the exponential delay is
+ * fixed, the other half is random, so concurrent clients spread out while
+ * delays still grow with each attempt.
+ */
+export function computeBackoffDelay(
+  attempt: number,
+  baseDelay: number,
+  maxDelay: number,
+  random: () => number = Math.random,
+): number {
+  const exponential = Math.min(maxDelay, baseDelay * 2 ** attempt);
+  return exponential / 2 + random() * (exponential / 2);
+}
+
+function createHistogram(bucketsMs: number[]): LatencyHistogram {
+  return {
+    bucketsMs: bucketsMs.slice(),
+    counts: new Array<number>(bucketsMs.length + 1).fill(0),
+    count: 0,
+    sumMs: 0,
+    maxMs: 0,
+  };
+}
+
+function recordLatency(histogram: LatencyHistogram, durationMs: number): void {
+  let bucket = histogram.bucketsMs.findIndex((bound) => durationMs <= bound);
+  if (bucket === -1) {
+    bucket = histogram.bucketsMs.length;
+  }
+  histogram.counts[bucket]!++;
+  histogram.count++;
+  histogram.sumMs += durationMs;
+  histogram.maxMs = Math.max(histogram.maxMs, durationMs);
+}
+
+/**
+ * Per-host state
+ */
+interface HostState {
+  limiter: HostLimiter;
+  requests: number;
+  failures: number;
+  retries: number;
+  latency: LatencyHistogram;
+}
+
+/**
+ * HTTP client shared by all upstream requests of a process
+ */
+export class HttpClient {
+  private readonly config: HttpClientConfig;
+  private readonly hosts = new Map<string, HostState>();
+
+  constructor(config: Partial<HttpClientConfig> = {}) {
+    this.config = { ...DEFAULT_HTTP_CLIENT_CONFIG, ...config };
+  }
+
+  /**
+   * Perform a request through the host's limiter, retrying network errors
+   * and retryable statuses when `retries` > 0
+   */
+  async fetch(
+    url: string,
+    options: HttpRequestOptions = {},
+  ): Promise<Response> {
+    const {
+      timeout = 30000,
+      queueTimeout = 30000,
+      bodyTimeout = 30000,
+      retries = 0,
+      retryDelay = 1000,
+      signal,
+      ...init
+    } = options;
+    const host = this.getHost(new URL(url).host);
+
+    for (let attempt = 0; ; attempt++) {
+      await host.limiter.acquire(queueTimeout, signal);
+
+      const startTime = performance.now();
+      let response: Response;
+      try {
+        host.requests++;
+        response = await this.fetchAttempt(url, init, timeout, signal);
+      } catch (error) {
+        host.failures++;
+        recordLatency(host.latency, performance.now() - startTime);
+        host.limiter.release();
+
+        if (signal?.aborted || attempt >= retries) {
+          throw error instanceof Error ? error : new Error(String(error));
+        }
+        host.retries++;
+        await sleep(
+          computeBackoffDelay(attempt, retryDelay, this.config.maxRetryDelay),
+          signal,
+        );
+        continue;
+      }
+
+      recordLatency(host.latency, performance.now() - startTime);
+
+      if (
+        attempt < retries &&
+        this.config.retryStatuses.includes(response.status)
+      ) {
+        const delay =
+          parseRetryAfter(response.headers.get("retry-after")) ??
+          computeBackoffDelay(attempt, retryDelay, this.config.maxRetryDelay);
+
+        if (delay <= this.config.maxRetryDelay) {
+          // Release the connection back to the pool before waiting
+          await response.body?.cancel().catch(() => undefined);
+          host.limiter.release();
+          host.retries++;
+          await sleep(delay, signal);
+          continue;
+        }
+      }
+
+      return releaseAfterBody(
+        response,
+        () => host.limiter.release(),
+        bodyTimeout,
+      );
+    }
+  }
+
+  /**
+   * Snapshot of per-host metrics
+   */
+  getMetrics(): HostMetrics[] {
+    return Array.from(this.hosts, ([host, state]) => ({
+      host,
+      requests: state.requests,
+      failures: state.failures,
+      retries: state.retries,
+      inFlight: state.limiter.active,
+      queued: state.limiter.queued,
+      maxQueued: state.limiter.maxQueued,
+      latency: {
+        ...state.latency,
+        bucketsMs: state.latency.bucketsMs.slice(),
+        counts: state.latency.counts.slice(),
+      },
+    }));
+  }
+
+  /**
+   * Reset metrics for hosts with no in-flight or queued requests
+   */
+  resetMetrics(): void {
+    for (const [host, state] of this.hosts) {
+      if (state.limiter.active === 0 && state.limiter.queued === 0) {
+        this.hosts.delete(host);
+      }
+    }
+  }
+
+  private getHost(host: string): HostState {
+    let state = this.hosts.get(host);
+    if (!state) {
+      state = {
+        limiter: new HostLimiter(
+          this.config.hostConcurrency[host] ?? this.config.maxConcurrentPerHost,
+        ),
+        requests: 0,
+        failures: 0,
+        retries: 0,
+        latency: createHistogram(this.config.latencyBucketsMs),
+      };
+      this.hosts.set(host, state);
+    }
+    return state;
+  }
+
+  /**
+   * Single attempt; the timeout covers the wait for response headers
+   */
+  private async fetchAttempt(
+    url: string,
+    init: RequestInit,
+    timeout: number,
+    signal?: AbortSignal | null,
+  ): Promise<Response> {
+    const controller = new AbortController();
+    const onAbort = () => controller.abort(signal?.reason);
+    const timeoutId = setTimeout(() => controller.abort(), timeout);
+    signal?.addEventListener("abort", onAbort, { once: true });
+
+    try {
+      return await fetch(url, { ...init, signal: controller.signal });
+    } finally {
+      clearTimeout(timeoutId);
+      signal?.removeEventListener("abort", onAbort);
+    }
+  }
+}
+
+let sharedClient: HttpClient | null = null;
+
+/**
+ * Get the process-wide client used by `fetchExternal`
+ */
+export function getSharedHttpClient(): HttpClient {
+  sharedClient ??= new HttpClient();
+  return sharedClient;
+}
+
+/**
+ * Replace the process-wide client (e.g. to set per-host limits at startup)
+ */
+export function configureSharedHttpClient(
+  config: Partial<HttpClientConfig>,
+): HttpClient {
+  sharedClient = new HttpClient(config);
+  return sharedClient;
+}
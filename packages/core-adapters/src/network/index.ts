@@ -27,8 +27,30 @@ export {
   fetchExternal,
   fetchHtml,
   fetchHtmlWithCookies,
+  fetchHtmlStreamWithCookies,
   fetchJson,
   isUrlReachable,
   getRedirectUrl,
 } from "./fetcher";
-export type { FetchOptions, FetchResult, FetchHtmlResult } from "./fetcher";
+export type {
+  FetchOptions,
+  FetchResult,
+  FetchHtmlResult,
+  FetchHtmlStreamResult,
+} from "./fetcher";
+
+// Shared HTTP client
+export {
+  HttpClient,
+  DEFAULT_HTTP_CLIENT_CONFIG,
+  getSharedHttpClient,
+  configureSharedHttpClient,
+  parseRetryAfter,
+  computeBackoffDelay,
+} from "./http-client";
+export type {
+  HttpClientConfig,
+  HttpRequestOptions,
+  HostMetrics,
+  LatencyHistogram,
+} from "./http-client";
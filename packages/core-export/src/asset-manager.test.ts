@@ -0,0 +1,201 @@
+import { describe, it, expect, vi, beforeEach, afterEach } from "vitest";
+import { ExportAssetManager } from "./asset-manager";
+
+function imageResponse(bytes: number, type = "image/png") {
+  return {
+    ok: true,
+    blob: async () => new Blob([new Uint8Array(bytes)], { type }),
+  };
+}
+
+describe("ExportAssetManager", () => {
+  const fetchMock = vi.fn();
+
+  beforeEach(() => {
+    fetchMock.mockReset();
+    fetchMock.mockImplementation(async () => imageResponse(30));
+    vi.stubGlobal("fetch", fetchMock);
+  });
+
+  afterEach(() => {
+    vi.unstubAllGlobals();
+    vi.useRealTimers();
+  });
+
+  it("should inline preflighted images as data URLs", async () => {
+    const assets = new ExportAssetManager();
+
+    const result = await assets.preflight({
+      imageUrls: ["https://example.com/a.png", "https://example.com/b.png"],
+      embedFonts: false,
+    });
+
+    expect(result.imagesReady).toBe(2);
+    expect(result.imagesFailed).toBe(0);
+    expect(assets.get("https://example.com/a.png")).toMatch(
+      /^data:image\/png;base64,/,
+    );
+  });
+
+  it("should serve repeated preflights from the cache", async () => {
+    const assets = new ExportAssetManager();
+    const request = {
+      imageUrls: ["https://example.com/a.png"],
+      embedFonts: false,
+    };
+
+    await assets.preflight(request);
+    const second = await assets.preflight(request);
+
+    expect(fetchMock).toHaveBeenCalledTimes(1);
+    expect(second.cacheHits).toBe(1);
+  });
+
+  it("should fetch a URL once when requested concurrently", async () => {
+    const assets = new ExportAssetManager();
+    const request = {
+      imageUrls: ["https://example.com/a.png", "https://example.com/a.png"],
+      embedFonts: false,
+    };
+
+    await Promise.all([assets.preflight(request), assets.preflight(request)]);
+
+    expect(fetchMock).toHaveBeenCalledTimes(1);
+  });
+
+  it("should not retry or inline recently failed images", async () => {
+    fetchMock.mockImplementation(async () => ({ ok: false }));
+    const assets = new ExportAssetManager();
+    const request = {
+      imageUrls: ["https://example.com/missing.png"],
+      embedFonts: false,
+    };
+
+    const first = await assets.preflight(request);
+    await assets.preflight(request);
+
+    expect(first.imagesFailed).toBe(1);
+    expect(fetchMock).toHaveBeenCalledTimes(1);
+    expect(assets.get("https://example.com/missing.png")).toBeNull();
+  });
+
+  it("should retry failed images once the failure expires", async () => {
+    vi.useFakeTimers({ toFake: ["Date"] });
+    vi.setSystemTime(0);
+    fetchMock.mockImplementationOnce(async () => ({ ok: false }));
+    const assets = new ExportAssetManager({ failureTtlMs: 1000 });
+    const request = {
+      imageUrls: ["https://example.com/flaky.png"],
+      embedFonts: false,
+    };
+
+    await assets.preflight(request);
+    vi.setSystemTime(999);
+    await assets.preflight(request);
+    expect(fetchMock).toHaveBeenCalledTimes(1);
+
+    vi.setSystemTime(1000);
+    const retried = await assets.preflight(request);
+
+    expect(fetchMock).toHaveBeenCalledTimes(2);
+    expect(retried.imagesReady).toBe(1);
+    expect(assets.get("https://example.com/flaky.png")).not.toBeNull();
+  });
+
+  it("should stop fetching images once the signal aborts", async () => {
+    const controller = new AbortController();
+    fetchMock.mockImplementation(
+      (_url: string, init: { signal: AbortSignal }) =>
+        new Promise((_resolve, reject) => {
+          init.signal.addEventListener("abort", () =>
+            reject(init.signal.reason),
+          );
+        }),
+    );
+    const assets = new ExportAssetManager({ concurrency: 1 });
+    const request = {
+      imageUrls: ["https://example.com/a.png", "https://example.com/b.png"],
+      embedFonts: false,
+      signal: controller.signal,
+    };
+
+    const preflight = assets.preflight(request);
+    await vi.waitFor(() => expect(fetchMock).toHaveBeenCalledTimes(1));
+    controller.abort();
+    const result = await preflight;
+
+    expect(result.imagesReady).toBe(0);
+    expect(fetchMock).toHaveBeenCalledTimes(1);
+
+    // Cancelled images are not remembered as failed
+    fetchMock.mockImplementation(async () => imageResponse(30));
+    const retried = await assets.preflight({ ...request, signal: undefined });
+    expect(retried.imagesReady).toBe(2);
+  });
+
+  it("should skip responses that are not images", async () => {
+    fetchMock.mockImplementation(async () => imageResponse(30, "text/html"));
+    const assets = new ExportAssetManager();
+
+    const result = await assets.preflight({
+      imageUrls: ["https://example.com/page"],
+      embedFonts: false,
+    });
+
+    expect(result.imagesFailed).toBe(1);
+  });
+
+  it("should evict least recently used images over the byte budget", async () => {
+    const assets = new ExportAssetManager({ maxBytes: 150 });
+    const urls = ["a", "b", "c"].map((name) => `https://example.com/${name}`);
+
+    await assets.preflight({ imageUrls: urls.slice(0, 2), embedFonts: false });
+    // Touch the first image so the second is evicted
+    assets.get(urls[0]!);
+    await assets.preflight({ imageUrls: urls.slice(2), embedFonts: false });
+
+    expect(assets.get(urls[0]!)).not.toBeNull();
+    expect(assets.get(urls[1]!)).toBeNull();
+    expect(assets.getStats().evictions).toBe(1);
+    expect(assets.getStats().bytes).toBeLessThanOrEqual(150);
+  });
+
+  it("should reset statistics on clear", async () => {
+    const assets = new ExportAssetManager();
+    await assets.preflight({
+      imageUrls: ["https://example.com/a.png"],
+      embedFonts: false,
+    });
+    assets.get("https://example.com/a.png");
+    assets.get("https://example.com/b.png");
+
+    assets.clear();
+
+    expect(assets.getStats()).toEqual({
+      entries: 0,
+      bytes: 0,
+      hits: 0,
+      misses: 0,
+      evictions: 0,
+    });
+  });
+
+  it("should swap in cached images for capture and restore them", async () => {
+    const assets = new ExportAssetManager();
+    await assets.preflight({
+      imageUrls: ["https://example.com/a.png"],
+      embedFonts: false,
+    });
+
+    const element = document.createElement("div");
+    const img = document.createElement("img");
+    img.setAttribute("src", "https://example.com/a.png");
+    element.appendChild(img);
+
+    const prepared = await assets.prepare(element);
+    expect(img.getAttribute("src")).toMatch(/^data:image\/png;base64,/);
+
+    prepared.restore();
+    expect(img.getAttribute("src")).toBe("https://example.com/a.png");
+  });
+});
@@ -0,0 +1,438 @@
+/**
+ * Export session asset manager
+ *
+ * Preflights fonts and images once for a whole export, decodes images ahead
+ * of capture and keeps inlined image data in a size-bounded cache, so every
+ * page and every later export reuses the same work.
+ */
+
+import { blobToDataUrl } from "./exporter";
+import { waitForFonts, waitForImages } from "./resource-loader";
+
+/**
+ * Asset manager configuration
+ */
+export interface AssetManagerConfig {
+  /** Maximum total size of inlined image data (data URL characters) */
+  maxBytes: number;
+  /** Images larger than this are not inlined (loaded and decoded only) */
+  maxImageBytes: number;
+  /** Concurrent image fetches during preflight */
+  concurrency: number;
+  /** How long a failed image is skipped before preflight tries it again */
+  failureTtlMs: number;
+}
+
+/**
+ * Default asset manager configuration
+ */
+export const DEFAULT_ASSET_MANAGER_CONFIG: AssetManagerConfig = {
+  maxBytes: 64 * 1024 * 1024,
+  maxImageBytes: 8 * 1024 * 1024,
+  concurrency: 6,
+  failureTtlMs: 60 * 1000,
+};
+
+/**
+ * What to preflight for an export
+ */
+export interface AssetPreflightRequest {
+  /** Image URLs used anywhere in the selection, including unrendered pages */
+  imageUrls?: string[];
+  /** Elements already rendered; their images are collected too */
+  roots?: HTMLElement[];
+  /** Prime SnapDOM's font embedding cache (default: true) */
+  embedFonts?: boolean;
+  /** Font loading timeout in ms */
+  fontTimeout?: number;
+  /** Image loading timeout in ms */
+  imageTimeout?: number;
+  /** Stop fetching images once aborted */
+  signal?: AbortSignal;
+}
+
+/**
+ * Preflight outcome
+ */
+export interface AssetPreflightResult {
+  fontsReady: boolean;
+  /** Images inlined or found in the cache */
+  imagesReady: number;
+  /** Images not inlined (fetch failed or too large), left to SnapDOM */
+  imagesFailed: number;
+  /** Images served from the cache without fetching */
+  cacheHits: number;
+  /** Time spent in preflight */
+  durationMs: number;
+}
+
+/**
+ * Resources prepared for one capture
+ */
+export interface PreparedCapture {
+  resourceStatus: {
+    fontsReady: boolean;
+    imagesLoaded: number;
+    imagesFailed: number;
+  };
+  /** Put back the original image sources */
+  restore: () => void;
+}
+
+/**
+ * Cache statistics
+ */
+export interface AssetCacheStats {
+  entries: number;
+  bytes: number;
+  hits: number;
+  misses: number;
+  evictions: number;
+}
+
+/**
+ * Decode an image ahead of capture (best effort)
+ */
+async function decodeImage(src: string): Promise<void> {
+  if (typeof Image === "undefined") return;
+  const img = new Image();
+  img.src = src;
+  try {
+    await img.decode();
+  } catch {
+    // Decoding is only an optimization; capture will load it again
+  }
+}
+
+/**
+ * Whether a source needs inlining (remote or object URLs)
+ */
+function isInlinable(src: string): boolean {
+  return src.length > 0 && !src.startsWith("data:");
+}
+
+/**
+ * Collect image sources within elements
+ */
+function collectImageUrls(roots: HTMLElement[]): string[] {
+  const urls: string[] = [];
+  for (const root of roots) {
+    for (const img of root.querySelectorAll("img")) {
+      if (img.src) urls.push(img.src);
+    }
+  }
+  return urls;
+}
+
+/**
+ * Export asset manager.
+ *
+ * Inlined images are cached by absolute URL in an LRU bounded by
+ * `maxBytes`. Font embedding is delegated to SnapDOM, whose session cache
+ * (`cache: "full"`) is primed once here instead of on the first capture.
+ */
+export class ExportAssetManager {
+  private readonly config: AssetManagerConfig;
+  private images = new Map<string, string>();
+  private pending = new Map<string, Promise<string | null>>();
+  /** When each failed URL last failed */
+  private failed = new Map<string, number>();
+  private bytes = 0;
+  private fontsReady = false;
+  private fontsEmbedded = false;
+  private stats = { hits: 0, misses: 0, evictions: 0 };
+
+  constructor(config: Partial<AssetManagerConfig> = {}) {
+    this.config = { ...DEFAULT_ASSET_MANAGER_CONFIG, ...config };
+  }
+
+  /**
+   * Load fonts and fetch, inline and decode every image of an export.
+   * Already cached images are not fetched again.
+   */
+  async preflight(
+    request: AssetPreflightRequest = {},
+  ): Promise<AssetPreflightResult> {
+    const start = performance.now();
+    const {
+      imageUrls = [],
+      roots = [],
+      embedFonts = true,
+      fontTimeout,
+      imageTimeout = 10000,
+      signal,
+    } = request;
+
+    const urls = new Set<string>();
+    for (const url of [...imageUrls, ...collectImageUrls(roots)]) {
+      const resolved = this.resolveUrl(url);
+      if (resolved && isInlinable(resolved)) urls.add(resolved);
+    }
+
+    let cacheHits = 0;
+    const toFetch: string[] = [];
+    for (const url of urls) {
+      if (this.images.has(url)) {
+        cacheHits++;
+      } else if (!this.hasRecentFailure(url)) {
+        toFetch.push(url);
+      }
+    }
+
+    const [fontsReady, fetched] = await Promise.all([
+      this.ensureFonts(fontTimeout, embedFonts),
+      this.fetchAll(toFetch, imageTimeout, signal),
+    ]);
+
+    const imagesReady = cacheHits + fetched.filter(Boolean).length;
+    return {
+      fontsReady,
+      imagesReady,
+      imagesFailed: urls.size - imagesReady,
+      cacheHits,
+      durationMs: performance.now() - start,
+    };
+  }
+
+  /**
+   * Prepare an element for capture: swap image sources for cached inline
+   * data and wait for whatever is still loading.
+   */
+  async prepare(
+    element: HTMLElement,
+    options: {
+      waitForFonts?: boolean;
+      waitForImages?: boolean;
+      fontTimeout?: number;
+      imageTimeout?: number;
+    } = {},
+  ): Promise<PreparedCapture> {
+    const swapped: [HTMLImageElement, string][] = [];
+    for (const img of element.querySelectorAll("img")) {
+      const original = img.getAttribute("src");
+      const dataUrl =
+        original && isInlinable(img.src) ? this.get(img.src) : null;
+      if (original && dataUrl) {
+        swapped.push([img, original]);
+        img.src = dataUrl;
+      }
+    }
+
+    const restore = () => {
+      for (const [img, original] of swapped) {
+        img.setAttribute("src", original);
+      }
+    };
+
+    try {
+      const [fontsReady, images] = await Promise.all([
+        options.waitForFonts
+          ? this.ensureFonts(options.fontTimeout, false)
+          : true,
+        options.waitForImages
+          ? waitForImages(element, options.imageTimeout)
+          : { loaded: 0, failed: 0 },
+      ]);
+
+      return {
+        resourceStatus: {
+          fontsReady,
+          imagesLoaded: images.loaded,
+          imagesFailed: images.failed,
+        },
+        restore,
+      };
+    } catch (error) {
+      restore();
+      throw error;
+    }
+  }
+
+  /**
+   * Get inlined data for an image URL
+   */
+  get(url: string): string | null {
+    const dataUrl = this.images.get(url);
+    if (dataUrl === undefined) {
+      this.stats.misses++;
+      return null;
+    }
+    this.stats.hits++;
+    // Move to most recently used
+    this.images.delete(url);
+    this.images.set(url, dataUrl);
+    return dataUrl;
+  }
+
+  getStats(): AssetCacheStats {
+    return { entries: this.images.size, bytes: this.bytes, ...this.stats };
+  }
+
+  /**
+   * Drop all cached data, forget failures and reset statistics
+   */
+  clear(): void {
+    this.images.clear();
+    this.failed.clear();
+    this.bytes = 0;
+    this.fontsReady = false;
+    this.fontsEmbedded = false;
+    this.stats = { hits: 0, misses: 0, evictions: 0 };
+  }
+
+  /**
+   * Whether a URL failed within the failure TTL. Expired failures are
+   * forgotten so the image is fetched again.
+   */
+  private hasRecentFailure(url: string): boolean {
+    const failedAt = this.failed.get(url);
+    if (failedAt === undefined) return false;
+    if (Date.now() - failedAt < this.config.failureTtlMs) return true;
+    this.failed.delete(url);
+    return false;
+  }
+
+  private resolveUrl(url: string): string | null {
+    try {
+      return typeof document === "undefined"
+        ? new URL(url).href
+        : new URL(url, document.baseURI).href;
+    } catch {
+      return null;
+    }
+  }
+
+  private async ensureFonts(
+    timeoutMs: number | undefined,
+    embedFonts: boolean,
+  ): Promise<boolean> {
+    if (typeof document === "undefined") return true;
+
+    // Fonts only need waiting on again when new faces started loading
+    if (!this.fontsReady || document.fonts.status !== "loaded") {
+      this.fontsReady = await waitForFonts(timeoutMs);
+    }
+
+    if (this.fontsReady && embedFonts && !this.fontsEmbedded) {
+      this.fontsEmbedded = true;
+      try {
+        const { preCache } = await import("@zumer/snapdom");
+        await preCache(document, { embedFonts: true });
+      } catch {
+        // SnapDOM embeds fonts on first capture instead
+        this.fontsEmbedded = false;
+      }
+    }
+
+    return this.fontsReady;
+  }
+
+  private async fetchAll(
+    urls: string[],
+    timeoutMs: number,
+    signal: AbortSignal | undefined,
+  ): Promise<boolean[]> {
+    const results = new Array<boolean>(urls.length).fill(false);
+    let next = 0;
+
+    const worker = async () => {
+      while (next < urls.length && !signal?.aborted) {
+        const index = next++;
+        const dataUrl = await this.inline(urls[index]!, timeoutMs, signal);
+        results[index] = dataUrl !== null;
+      }
+    };
+
+    await Promise.all(
+      Array.from(
+        { length: Math.min(this.config.concurrency, urls.length) },
+        worker,
+      ),
+    );
+    return results;
+  }
+
+  /**
+   * Fetch, inline and decode one image (deduplicated while in flight, so a
+   * fetch may run under the signal of the preflight that started it)
+   */
+  private inline(
+    url: string,
+    timeoutMs: number,
+    signal: AbortSignal | undefined,
+  ): Promise<string | null> {
+    let pending = this.pending.get(url);
+    if (!pending) {
+      pending = this.fetchDataUrl(url, timeoutMs, signal)
+        .then(async (dataUrl) => {
+          // Cancelled, not failed: fetch it again next time
+          if (dataUrl === null && signal?.aborted) return null;
+          if (dataUrl === null) {
+            this.failed.set(url, Date.now());
+            // Still warm the browser cache for SnapDOM's own fetch
+            await decodeImage(url);
+            return null;
+          }
+          this.store(url, dataUrl);
+          await decodeImage(dataUrl);
+          return dataUrl;
+        })
+        .finally(() => this.pending.delete(url));
+      this.pending.set(url, pending);
+    }
+    return pending;
+  }
+
+  private async fetchDataUrl(
+    url: string,
+    timeoutMs: number,
+    signal: AbortSignal | undefined,
+  ): Promise<string | null> {
+    const timeout = AbortSignal.timeout(timeoutMs);
+    try {
+      const response = await fetch(url, {
+        signal: signal ? AbortSignal.any([signal, timeout]) : timeout,
+      });
+      if (!response.ok) return null;
+
+      const blob = await response.blob();
+      if (!blob.type.startsWith("image/")) return null;
+      // Base64 grows data by a third
+      if ((blob.size * 4) / 3 > this.config.maxImageBytes) return null;
+
+      return await blobToDataUrl(blob);
+    } catch {
+      // CORS, network errors, timeouts and cancellation
+      return null;
+    }
+  }
+
+  private store(url: string, dataUrl: string): void {
+    if (dataUrl.length > this.config.maxBytes) return;
+
+    const existing = this.images.get(url);
+    if (existing !== undefined) {
+      this.bytes -= existing.length;
+      this.images.delete(url);
+    }
+    this.images.set(url, dataUrl);
+    this.bytes += dataUrl.length;
+
+    for (const [oldest, data] of this.images) {
+      if (this.bytes <= this.config.maxBytes) break;
+      this.images.delete(oldest);
+      this.bytes -= data.length;
+      this.stats.evictions++;
+    }
+  }
+}
+
+let sharedAssetManager: ExportAssetManager | null = null;
+
+/**
+ * Get the asset manager shared by all exports in this page
+ */
+export function getSharedAssetManager(): ExportAssetManager {
+  sharedAssetManager ??= new ExportAssetManager();
+  return sharedAssetManager;
+}
@@ -11,8 +11,12 @@ import {
   type PaginationResult,
 } from "@chat2poster/core-schema";
 import type { ExportResult } from "./exporter";
-import type { MultiPageExportResult } from "./multi-page-exporter";
-import type { ZipResult } from "./zip-packager";
+import type {
+  MultiPageExportOptions,
+  MultiPageExportResult,
+  PageStageTimings,
+} from "./multi-page-exporter";
+import type { StreamingZipResult, ZipResult } from "./zip-packager";
 
 /**
  * Event types emitted by the ExportJobManager
@@ -33,9 +37,17 @@ export interface ExportJobEventData {
     previousStatus: ExportJobStatus;
     currentStatus: ExportJobStatus;
   };
-  "progress-update": { current: number; total: number; percentage: number };
+  "progress-update": {
+    current: number;
+    total: number;
+    percentage: number;
+    timings?: PageStageTimings;
+  };
   "page-complete": { pageIndex: number; result: ExportResult };
-  complete: { result: MultiPageExportResult | ExportResult; zip?: ZipResult };
+  complete: {
+    result: MultiPageExportResult | ExportResult;
+    zip?: ZipResult | StreamingZipResult;
+  };
   error: { error: Error; code: string };
   cancelled: { partialResult?: MultiPageExportResult };
 }
@@ -147,7 +159,11 @@ export class ExportJobManager {
   /**
    * Update progress
    */
-  updateProgress(current: number, total: number): void {
+  updateProgress(
+    current: number,
+    total: number,
+    timings?: PageStageTimings,
+  ): void {
     if (!this.isRunning()) {
       return;
     }
@@ -160,7 +176,12 @@ export class ExportJobManager {
       updatedAt: new Date().toISOString(),
     };
 
-    this.emit("progress-update", { current, total, percentage });
+    this.emit(
+      "progress-update",
+      timings
+        ? { current, total, percentage, timings }
+        : { current, total, percentage },
+    );
   }
 
   /**
@@ -174,12 +195,29 @@ export class ExportJobManager {
     this.emit("page-complete", { pageIndex, result });
   }
 
+  /**
+   * Get exportPages callbacks that report progress and page completion
+   * to this job and honor its cancellation
+   */
+  getExportCallbacks(): Pick<
+    MultiPageExportOptions,
+    "onProgress" | "onPageComplete" | "abortSignal"
+  > {
+    return {
+      onProgress: ({ current, total, timings }) =>
+        this.updateProgress(current, total, timings),
+      onPageComplete: (pageIndex, result) =>
+        this.reportPageComplete(pageIndex, result),
+      abortSignal: this.getAbortSignal(),
+    };
+  }
+
   /**
    * Mark job as successful
    */
   complete(
     result: MultiPageExportResult | ExportResult,
-    zip?: ZipResult,
+    zip?: ZipResult | StreamingZipResult,
   ): void {
     if (!this.isRunning()) {
       return;
@@ -8,6 +8,7 @@ import {
   type ExportFormat,
   type AppError,
 } from "@chat2poster/core-schema";
+import type { ExportAssetManager } from "./asset-manager";
 import { waitForResources } from "./resource-loader";
 
 // ============================================================================
@@ -51,6 +52,11 @@ export interface ExportOptions {
   backgroundColor?: string;
   /** Embed fonts for consistent rendering (default: true) */
   embedFonts?: boolean;
+  /**
+   * Asset manager to reuse preflighted fonts and inlined images across
+   * pages and exports (see getSharedAssetManager)
+   */
+  assets?: ExportAssetManager;
 }
 
 /**
@@ -67,6 +73,18 @@ export const DEFAULT_EXPORT_OPTIONS: ExportOptions = {
   embedFonts: true,
 };
 
+/**
+ * Time spent in each export stage, in milliseconds
+ */
+export interface ExportStageTimings {
+  /** Waiting for fonts and images */
+  resourceWaitMs: number;
+  /** SnapDOM capture into a canvas */
+  captureMs: number;
+  /** Canvas encoding into blob and data URL */
+  encodeMs: number;
+}
+
 /**
  * Export result
  */
@@ -89,9 +107,20 @@ export interface ExportResult {
       imagesLoaded: number;
       imagesFailed: number;
     };
+    /** Per-stage timings for this export */
+    timings?: ExportStageTimings;
   };
 }
 
+/**
+ * A captured canvas waiting to be encoded
+ */
+export interface CapturedCanvas {
+  canvas: HTMLCanvasElement;
+  resourceStatus: ExportResult["meta"]["resourceStatus"];
+  timings: Pick<ExportStageTimings, "resourceWaitMs" | "captureMs">;
+}
+
 /**
  * Get SnapDOM module
  */
@@ -176,15 +205,15 @@ function canvasToBlob(
 }
 
 /**
- * Convert canvas to data URL
+ * Read a blob as a data URL without blocking the main thread
  */
-function canvasToDataUrl(
-  canvas: HTMLCanvasElement,
-  format: ExportFormat,
-  quality?: number,
-): string {
-  const mimeType = format === "jpeg" ? "image/jpeg" : "image/png";
-  return canvas.toDataURL(mimeType, quality);
+export function blobToDataUrl(blob: Blob): Promise<string> {
+  return new Promise((resolve, reject) => {
+    const reader = new FileReader();
+    reader.onload = () => resolve(reader.result as string);
+    reader.onerror = () => reject(reader.error ?? new Error("Read failed"));
+    reader.readAsDataURL(blob);
+  });
 }
 
 /**
@@ -226,6 +255,20 @@ export async function exportElement(
   element: HTMLElement,
   options: ExportOptions,
 ): Promise<ExportResult> {
+  const captured = await captureElement(element, options);
+  return encodeCanvas(captured, options);
+}
+
+/**
+ * Capture stage: wait for resources and render the element into a canvas.
+ *
+ * Touches the live DOM, so callers must not mutate the element until the
+ * returned promise settles.
+ */
+export async function captureElement(
+  element: HTMLElement,
+  options: ExportOptions,
+): Promise<CapturedCanvas> {
   // Wait for resources if requested
   let resourceStatus = {
     fontsReady: true,
@@ -233,14 +276,24 @@ export async function exportElement(
     imagesFailed: 0,
   };
 
-  if (options.waitForFonts || options.waitForImages) {
+  const resourceStart = performance.now();
+  let restoreAssets: (() => void) | undefined;
+
+  if (options.assets) {
+    const prepared = await options.assets.prepare(element, options);
+    resourceStatus = prepared.resourceStatus;
+    restoreAssets = prepared.restore;
+  } else if (options.waitForFonts || options.waitForImages) {
     resourceStatus = await waitForResources(element, {
       fontTimeout: options.fontTimeout,
       imageTimeout: options.imageTimeout,
     });
+  }
 
+  if (options.waitForFonts || options.waitForImages) {
     // Check for critical failures
     if (!resourceStatus.fontsReady) {
+      restoreAssets?.();
       throw createAppError(
         "E-EXPORT-003",
         "Fonts failed to load within timeout",
@@ -255,6 +308,8 @@ export async function exportElement(
     }
   }
 
+  const captureStart = performance.now();
+
   // Export using SnapDOM
   let canvas: HTMLCanvasElement;
   try {
@@ -266,11 +321,37 @@ export async function exportElement(
   } catch (error) {
     const detail = error instanceof Error ? error.message : "Unknown error";
     throw createAppError("E-EXPORT-002", `SnapDOM render failed: ${detail}`);
+  } finally {
+    restoreAssets?.();
   }
 
-  // Convert to output format
+  return {
+    canvas,
+    resourceStatus,
+    timings: {
+      resourceWaitMs: captureStart - resourceStart,
+      captureMs: performance.now() - captureStart,
+    },
+  };
+}
+
+/**
+ * Encode stage: convert a captured canvas into the output format.
+ *
+ * Independent of the DOM, so it can overlap with the next page's capture.
+ */
+export async function encodeCanvas(
+  captured: CapturedCanvas,
+  options: ExportOptions,
+): Promise<ExportResult> {
+  const { canvas, resourceStatus } = captured;
+  const encodeStart = performance.now();
+
+  // Convert to output format. The data URL is read from the encoded blob
+  // rather than with a second, synchronous toDataURL() encode, so the next
+  // page can render and capture meanwhile.
   const blob = await canvasToBlob(canvas, options.format, options.quality);
-  const dataUrl = canvasToDataUrl(canvas, options.format, options.quality);
+  const dataUrl = await blobToDataUrl(blob);
 
   return {
     blob,
@@ -282,6 +363,10 @@ export async function exportElement(
       format: options.format,
       exportedAt: new Date().toISOString(),
       resourceStatus,
+      timings: {
+        ...captured.timings,
+        encodeMs: performance.now() - encodeStart,
+      },
     },
   };
 }
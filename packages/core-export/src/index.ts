@@ -14,15 +14,31 @@ export {
   preloadImages,
 } from "./resource-loader";
 
+// Export session assets
+export {
+  ExportAssetManager,
+  getSharedAssetManager,
+  type AssetManagerConfig,
+  type AssetPreflightRequest,
+  type AssetPreflightResult,
+  type AssetCacheStats,
+  type PreparedCapture,
+  DEFAULT_ASSET_MANAGER_CONFIG,
+} from "./asset-manager";
+
 // Single page export
 export {
   exportToPng,
   exportToJpeg,
   exportElement,
+  captureElement,
+  encodeCanvas,
   isCanvasSizeValid,
   validateExportParams,
   type ExportOptions,
   type ExportResult,
+  type ExportStageTimings,
+  type CapturedCanvas,
   DEFAULT_EXPORT_OPTIONS,
 } from "./exporter";
 
@@ -34,14 +50,22 @@ export {
   getTotalSize,
   formatFileSize,
   type ProgressCallback,
+  type PageCompleteCallback,
+  type PrepareCaptureCallback,
+  type PageStageTimings,
+  type ExportTimingSummary,
+  type PipelineOptions,
   type MultiPageExportOptions,
   type MultiPageExportResult,
   type PageRenderer,
+  DEFAULT_PIPELINE_OPTIONS,
 } from "./multi-page-exporter";
 
 // ZIP packaging
 export {
   packageAsZip,
+  StreamingZipPackager,
+  createStreamingZipPackager,
   generatePageFilename,
   generateZipFilename,
   triggerDownload,
@@ -49,6 +73,8 @@ export {
   downloadImage,
   type ZipOptions,
   type ZipResult,
+  type StreamingZipOptions,
+  type StreamingZipResult,
   DEFAULT_ZIP_OPTIONS,
 } from "./zip-packager";
 
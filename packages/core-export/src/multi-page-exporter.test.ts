@@ -0,0 +1,375 @@
+import { describe, it, expect, vi, beforeEach } from "vitest";
+import { ExportAssetManager } from "./asset-manager";
+import { createExportJobManager } from "./export-job-manager";
+import {
+  captureElement,
+  encodeCanvas,
+  type CapturedCanvas,
+  type ExportResult,
+} from "./exporter";
+import { exportPages } from "./multi-page-exporter";
+
+vi.mock("./exporter", async (importOriginal) => {
+  // eslint-disable-next-line @typescript-eslint/consistent-type-imports -- vi.mock factory needs typeof import()
+  const actual = await importOriginal<typeof import("./exporter")>();
+  return {
+    ...actual,
+    captureElement: vi.fn(),
+    encodeCanvas: vi.fn(),
+  };
+});
+
+const mockCapture = vi.mocked(captureElement);
+const mockEncode = vi.mocked(encodeCanvas);
+
+function createDeferred<T>() {
+  let resolve!: (value: T) => void;
+  const promise = new Promise<T>((res) => {
+    resolve = res;
+  });
+  return { promise, resolve };
+}
+
+function fakeCapture(width = 100, height = 100): CapturedCanvas {
+  const canvas = document.createElement("canvas");
+  canvas.width = width;
+  canvas.height = height;
+  return {
+    canvas,
+    resourceStatus: { fontsReady: true, imagesLoaded: 0, imagesFailed: 0 },
+    timings: { resourceWaitMs: 0, captureMs: 0 },
+  };
+}
+
+function fakeResult(captured: CapturedCanvas): ExportResult {
+  return {
+    blob: new Blob(["x"], { type: "image/png" }),
+    dataUrl: "data:image/png;base64,",
+    width: captured.canvas.width,
+    height: captured.canvas.height,
+    meta: {
+      scale: 2,
+      format: "png",
+      exportedAt: new Date().toISOString(),
+      resourceStatus: captured.resourceStatus,
+      timings: { ...captured.timings, encodeMs: 1 },
+    },
+  };
+}
+
+const renderPage = () => document.createElement("div");
+
+describe("exportPages", () => {
+  beforeEach(() => {
+    mockCapture.mockReset();
+    mockEncode.mockReset();
+    mockCapture.mockImplementation(async () => fakeCapture());
+    mockEncode.mockImplementation(async (captured) => fakeResult(captured));
+  });
+
+  it("should export all pages in order", async () => {
+    const result = await exportPages(3, renderPage, { pipeline: true });
+
+    expect(result.totalPages).toBe(3);
+    expect(result.cancelled).toBe(false);
+    expect(mockCapture).toHaveBeenCalledTimes(3);
+  });
+
+  it("should attach per-stage timings to each page", async () => {
+    const result = await exportPages(2, renderPage, { pipeline: true });
+
+    for (const page of result.pages) {
+      expect(page.meta.timings).toMatchObject({
+        resourceWaitMs: expect.any(Number),
+        captureMs: expect.any(Number),
+        encodeMs: expect.any(Number),
+        renderMs: expect.any(Number),
+        queueMs: expect.any(Number),
+      });
+    }
+  });
+
+  it("should summarize timings for the whole export", async () => {
+    const result = await exportPages(2, renderPage, { pipeline: true });
+
+    expect(result.timings).toMatchObject({
+      preflightMs: 0,
+      resourceWaitMs: expect.any(Number),
+      captureMs: expect.any(Number),
+      encodeMs: 2,
+      totalMs: expect.any(Number),
+    });
+  });
+
+  it("should preflight assets once before the first page", async () => {
+    const assets = new ExportAssetManager();
+    const preflight = vi.spyOn(assets, "preflight").mockResolvedValue({
+      fontsReady: true,
+      imagesReady: 1,
+      imagesFailed: 0,
+      cacheHits: 0,
+      durationMs: 0,
+    });
+
+    await exportPages(3, renderPage, {
+      assets,
+      preflight: { imageUrls: ["https://example.com/a.png"] },
+    });
+
+    expect(preflight).toHaveBeenCalledTimes(1);
+    expect(preflight).toHaveBeenCalledWith(
+      expect.objectContaining({ imageUrls: ["https://example.com/a.png"] }),
+    );
+    expect(preflight.mock.invocationCallOrder[0]).toBeLessThan(
+      mockCapture.mock.invocationCallOrder[0]!,
+    );
+  });
+
+  it("should pass the abort signal to the preflight", async () => {
+    const assets = new ExportAssetManager();
+    const preflight = vi.spyOn(assets, "preflight").mockResolvedValue({
+      fontsReady: true,
+      imagesReady: 0,
+      imagesFailed: 0,
+      cacheHits: 0,
+      durationMs: 0,
+    });
+    const controller = new AbortController();
+
+    await exportPages(1, renderPage, {
+      assets,
+      preflight: { imageUrls: [] },
+      abortSignal: controller.signal,
+    });
+
+    expect(preflight).toHaveBeenCalledWith(
+      expect.objectContaining({ signal: controller.signal }),
+    );
+  });
+
+  it("should not preflight an export that was already cancelled", async () => {
+    const assets = new ExportAssetManager();
+    const preflight = vi.spyOn(assets, "preflight");
+    const controller = new AbortController();
+    controller.abort();
+
+    const result = await exportPages(3, renderPage, {
+      assets,
+      preflight: { imageUrls: ["https://example.com/a.png"] },
+      abortSignal: controller.signal,
+    });
+
+    expect(result.cancelled).toBe(true);
+    expect(preflight).not.toHaveBeenCalled();
+    expect(mockCapture).not.toHaveBeenCalled();
+  });
+
+  it("should stop when cancelled during the preflight", async () => {
+    const assets = new ExportAssetManager();
+    const controller = new AbortController();
+    vi.spyOn(assets, "preflight").mockImplementation(async () => {
+      controller.abort();
+      return {
+        fontsReady: true,
+        imagesReady: 0,
+        imagesFailed: 0,
+        cacheHits: 0,
+        durationMs: 0,
+      };
+    });
+
+    const result = await exportPages(3, renderPage, {
+      assets,
+      preflight: { imageUrls: ["https://example.com/a.png"] },
+      abortSignal: controller.signal,
+    });
+
+    expect(result).toMatchObject({ cancelled: true, totalPages: 0 });
+    expect(mockCapture).not.toHaveBeenCalled();
+  });
+
+  it("should reject when the preflight fails", async () => {
+    const assets = new ExportAssetManager();
+    vi.spyOn(assets, "preflight").mockRejectedValue(new Error("offline"));
+
+    await expect(
+      exportPages(2, renderPage, {
+        assets,
+        preflight: { imageUrls: [] },
+      }),
+    ).rejects.toThrow("offline");
+    expect(mockCapture).not.toHaveBeenCalled();
+  });
+
+  it("should capture the next page while the previous one encodes", async () => {
+    const firstEncode = createDeferred<void>();
+    mockEncode.mockImplementationOnce(async (captured) => {
+      await firstEncode.promise;
+      return fakeResult(captured);
+    });
+
+    const exportPromise = exportPages(2, renderPage, {
+      pipeline: { concurrency: 2 },
+    });
+
+    await vi.waitFor(() => expect(mockCapture).toHaveBeenCalledTimes(2));
+    firstEncode.resolve();
+
+    const result = await exportPromise;
+    expect(result.totalPages).toBe(2);
+  });
+
+  it("should run stages sequentially without pipeline", async () => {
+    const firstEncode = createDeferred<void>();
+    mockEncode.mockImplementationOnce(async (captured) => {
+      await firstEncode.promise;
+      return fakeResult(captured);
+    });
+
+    const exportPromise = exportPages(2, renderPage);
+
+    await vi.waitFor(() => expect(mockEncode).toHaveBeenCalledTimes(1));
+    expect(mockCapture).toHaveBeenCalledTimes(1);
+    firstEncode.resolve();
+
+    await exportPromise;
+    expect(mockCapture).toHaveBeenCalledTimes(2);
+  });
+
+  it("should hold back captures above the pixel ceiling", async () => {
+    const firstEncode = createDeferred<void>();
+    mockEncode.mockImplementationOnce(async (captured) => {
+      await firstEncode.promise;
+      return fakeResult(captured);
+    });
+
+    const exportPromise = exportPages(2, renderPage, {
+      pipeline: { concurrency: 4, maxInFlightPixels: 5_000 },
+    });
+
+    await vi.waitFor(() => expect(mockEncode).toHaveBeenCalledTimes(1));
+    expect(mockCapture).toHaveBeenCalledTimes(1);
+    firstEncode.resolve();
+
+    await exportPromise;
+    expect(mockCapture).toHaveBeenCalledTimes(2);
+  });
+
+  it("should hold back captures until onPageComplete settles", async () => {
+    const firstWrite = createDeferred<void>();
+    const onPageComplete = vi.fn(async (pageIndex: number) => {
+      if (pageIndex === 0) {
+        await firstWrite.promise;
+      }
+    });
+
+    const exportPromise = exportPages(2, renderPage, {
+      pipeline: { concurrency: 1 },
+      onPageComplete,
+    });
+
+    await vi.waitFor(() => expect(onPageComplete).toHaveBeenCalledTimes(1));
+    expect(mockCapture).toHaveBeenCalledTimes(1);
+    firstWrite.resolve();
+
+    await exportPromise;
+    expect(mockCapture).toHaveBeenCalledTimes(2);
+  });
+
+  it("should stop and return completed pages when aborted", async () => {
+    const controller = new AbortController();
+    const onPageComplete = vi.fn((pageIndex: number) => {
+      if (pageIndex === 0) {
+        controller.abort();
+      }
+    });
+
+    const result = await exportPages(5, renderPage, {
+      abortSignal: controller.signal,
+      onPageComplete,
+    });
+
+    expect(result.cancelled).toBe(true);
+    expect(result.totalPages).toBe(1);
+    expect(mockCapture).toHaveBeenCalledTimes(1);
+  });
+
+  it("should propagate encode failures", async () => {
+    mockEncode.mockRejectedValueOnce(new Error("encode failed"));
+
+    await expect(
+      exportPages(3, renderPage, { pipeline: true }),
+    ).rejects.toThrow("encode failed");
+  });
+
+  it("should run prepareCapture cleanup after each capture", async () => {
+    const restore = vi.fn();
+    const prepareCapture = vi.fn(() => restore);
+
+    await exportPages(2, renderPage, { pipeline: true, prepareCapture });
+
+    expect(prepareCapture).toHaveBeenCalledTimes(2);
+    expect(restore).toHaveBeenCalledTimes(2);
+  });
+
+  it("should report progress with timings", async () => {
+    const onProgress = vi.fn();
+
+    await exportPages(2, renderPage, { pipeline: true, onProgress });
+
+    expect(onProgress).toHaveBeenLastCalledWith(
+      expect.objectContaining({
+        current: 2,
+        total: 2,
+        percentage: 100,
+        timings: expect.objectContaining({ renderMs: expect.any(Number) }),
+      }),
+    );
+  });
+});
+
+describe("exportPages with ExportJobManager", () => {
+  const TEST_CONVERSATION_ID = "00000000-0000-0000-0000-000000000000";
+
+  beforeEach(() => {
+    mockCapture.mockReset();
+    mockEncode.mockReset();
+    mockCapture.mockImplementation(async () => fakeCapture());
+    mockEncode.mockImplementation(async (captured) => fakeResult(captured));
+  });
+
+  it("should report progress and pages to the job", async () => {
+    const job = createExportJobManager(TEST_CONVERSATION_ID);
+    const onPage = vi.fn();
+    const onProgress = vi.fn();
+    job.on("page-complete", onPage);
+    job.on("progress-update", onProgress);
+    job.start();
+
+    const result = await exportPages(3, renderPage, {
+      pipeline: true,
+      ...job.getExportCallbacks(),
+    });
+    job.complete(result);
+
+    expect(onPage).toHaveBeenCalledTimes(3);
+    expect(onProgress).toHaveBeenLastCalledWith(
+      expect.objectContaining({ current: 3, total: 3, percentage: 100 }),
+    );
+    expect(job.getStatus()).toBe("success");
+  });
+
+  it("should stop exporting when the job is cancelled", async () => {
+    const job = createExportJobManager(TEST_CONVERSATION_ID);
+    job.on("page-complete", ({ pageIndex }) => {
+      if (pageIndex === 0) job.cancel();
+    });
+    job.start();
+
+    const result = await exportPages(5, renderPage, job.getExportCallbacks());
+
+    expect(result.cancelled).toBe(true);
+    expect(result.totalPages).toBe(1);
+    expect(job.getStatus()).toBe("failed");
+  });
+});
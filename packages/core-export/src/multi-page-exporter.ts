@@ -2,7 +2,16 @@
  * Multi-page export with progress tracking
  */
 
-import { exportToPng, type ExportOptions, type ExportResult } from "./exporter";
+import type { AssetPreflightRequest } from "./asset-manager";
+import {
+  captureElement,
+  DEFAULT_EXPORT_OPTIONS,
+  encodeCanvas,
+  type CapturedCanvas,
+  type ExportOptions,
+  type ExportResult,
+  type ExportStageTimings,
+} from "./exporter";
 
 /**
  * Progress callback for multi-page export
@@ -12,23 +21,114 @@ export type ProgressCallback = (progress: {
   total: number;
   percentage: number;
   currentPageResult?: ExportResult;
+  /** Stage timings of the page that just completed */
+  timings?: PageStageTimings;
 }) => void;
 
+/**
+ * Callback fired when a page finishes encoding. A returned promise holds the
+ * page's pipeline slot until it settles, so slow consumers (e.g. ZIP writes)
+ * hold back the next capture.
+ */
+export type PageCompleteCallback = (
+  pageIndex: number,
+  result: ExportResult,
+) => void | Promise<void>;
+
+/**
+ * Called right before a page is captured.
+ * The returned function (if any) runs once the capture has finished.
+ */
+export type PrepareCaptureCallback = (
+  element: HTMLElement,
+  pageIndex: number,
+) => (() => void) | void;
+
+/**
+ * Stage timings for a page within a multi-page export
+ */
+export interface PageStageTimings extends ExportStageTimings {
+  /** Time spent in the page renderer */
+  renderMs: number;
+  /** Time the page waited for a free pipeline slot before rendering */
+  queueMs: number;
+}
+
+/**
+ * Where the time of a whole multi-page export went
+ */
+export interface ExportTimingSummary {
+  /** Asset preflight before the first page */
+  preflightMs: number;
+  /** Per-page stage timings, summed over all exported pages */
+  resourceWaitMs: number;
+  captureMs: number;
+  encodeMs: number;
+  renderMs: number;
+  queueMs: number;
+  /** Wall-clock time of the whole export */
+  totalMs: number;
+}
+
+/**
+ * Pipeline options for multi-page export
+ */
+export interface PipelineOptions {
+  /**
+   * Maximum number of captured pages waiting to be encoded.
+   * 1 disables pipelining (render, capture and encode run strictly in order).
+   */
+  concurrency: number;
+  /**
+   * Ceiling on canvas pixels held by captured-but-not-encoded pages.
+   * A page is always allowed through when nothing else is in flight.
+   */
+  maxInFlightPixels: number;
+}
+
+/**
+ * Default pipeline options
+ */
+export const DEFAULT_PIPELINE_OPTIONS: PipelineOptions = {
+  concurrency: 2,
+  maxInFlightPixels: 100_000_000,
+};
+
 /**
  * Multi-page export options
  */
 export interface MultiPageExportOptions extends Partial<ExportOptions> {
   /** Callback for progress updates */
   onProgress?: ProgressCallback;
+  /** Callback fired as soon as each page is encoded */
+  onPageComplete?: PageCompleteCallback;
+  /** Hook around each page capture (e.g. to lock styles) */
+  prepareCapture?: PrepareCaptureCallback;
   /** Abort signal for cancellation */
   abortSignal?: AbortSignal;
+  /**
+   * Overlap page N's encoding with page N+1's render and capture.
+   * `true` uses DEFAULT_PIPELINE_OPTIONS; omitted runs sequentially.
+   */
+  pipeline?: boolean | Partial<PipelineOptions>;
+  /**
+   * Keep page results in the returned `pages` array (default: true).
+   * Set to false when consuming pages via `onPageComplete`, e.g. with a
+   * streaming ZIP packager, so finished pages can be garbage collected.
+   */
+  retainPages?: boolean;
+  /**
+   * Preflight fonts and images for every page before the first capture.
+   * Requires `assets`; later pages and exports reuse its cache.
+   */
+  preflight?: AssetPreflightRequest;
 }
 
 /**
  * Multi-page export result
  */
 export interface MultiPageExportResult {
-  /** Results for each page */
+  /** Results for each page (empty when `retainPages` is false) */
   pages: ExportResult[];
   /** Total number of pages exported */
   totalPages: number;
@@ -36,6 +136,8 @@ export interface MultiPageExportResult {
   cancelled: boolean;
   /** Timestamp when export completed */
   completedAt: string;
+  /** Resource wait vs capture and encode for the whole export */
+  timings?: ExportTimingSummary;
 }
 
 /**
@@ -45,9 +147,42 @@ export type PageRenderer = (
   pageIndex: number,
 ) => Promise<HTMLElement> | HTMLElement;
 
+/**
+ * Resolve pipeline options from the user-facing option value
+ */
+function resolvePipelineOptions(
+  pipeline: MultiPageExportOptions["pipeline"],
+): PipelineOptions {
+  if (!pipeline) {
+    return { ...DEFAULT_PIPELINE_OPTIONS, concurrency: 1 };
+  }
+
+  const opts =
+    pipeline === true
+      ? DEFAULT_PIPELINE_OPTIONS
+      : { ...DEFAULT_PIPELINE_OPTIONS, ...pipeline };
+
+  return {
+    concurrency: Math.max(1, Math.floor(opts.concurrency)),
+    maxInFlightPixels: Math.max(0, opts.maxInFlightPixels),
+  };
+}
+
+/**
+ * Release the canvas backing store as soon as it has been encoded
+ */
+function releaseCanvas(canvas: HTMLCanvasElement): void {
+  canvas.width = 0;
+  canvas.height = 0;
+}
+
 /**
  * Export multiple pages
  *
+ * Rendering and capture always run one page at a time because they share the
+ * live DOM. With `pipeline` enabled, encoding runs in the background so the
+ * next page can render and capture while earlier canvases are still encoding.
+ *
  * @param pageCount - Total number of pages to export
  * @param renderPage - Function that renders each page and returns the element
  * @param options - Export options
@@ -57,42 +192,189 @@ export async function exportPages(
   renderPage: PageRenderer,
   options: MultiPageExportOptions = {},
 ): Promise<MultiPageExportResult> {
-  const pages: ExportResult[] = [];
-  const { onProgress, abortSignal, ...exportOptions } = options;
-
-  for (let i = 0; i < pageCount; i++) {
-    // Check for cancellation
-    if (abortSignal?.aborted) {
-      return {
-        pages,
-        totalPages: pages.length,
-        cancelled: true,
-        completedAt: new Date().toISOString(),
-      };
+  const {
+    onProgress,
+    onPageComplete,
+    prepareCapture,
+    abortSignal,
+    pipeline,
+    retainPages = true,
+    preflight,
+    ...exportOptions
+  } = options;
+  const exportStart = performance.now();
+  const opts: ExportOptions = {
+    ...DEFAULT_EXPORT_OPTIONS,
+    ...exportOptions,
+    format: "png",
+  };
+  const { concurrency, maxInFlightPixels } = resolvePipelineOptions(pipeline);
+
+  const results: (ExportResult | undefined)[] = new Array(pageCount);
+  const done: boolean[] = new Array<boolean>(pageCount).fill(false);
+  const inFlight = new Set<Promise<void>>();
+  let inFlightPixels = 0;
+  let completed = 0;
+  let encodeError: unknown = null;
+  const summary: ExportTimingSummary = {
+    preflightMs: 0,
+    resourceWaitMs: 0,
+    captureMs: 0,
+    encodeMs: 0,
+    renderMs: 0,
+    queueMs: 0,
+    totalMs: 0,
+  };
+
+  const hasFreeSlot = () =>
+    inFlight.size === 0 ||
+    (inFlight.size < concurrency && inFlightPixels < maxInFlightPixels);
+
+  const startEncode = (
+    pageIndex: number,
+    captured: CapturedCanvas,
+    stageTimings: Pick<PageStageTimings, "renderMs" | "queueMs">,
+  ) => {
+    const pixels = captured.canvas.width * captured.canvas.height;
+    inFlightPixels += pixels;
+
+    const task = encodeCanvas(captured, opts)
+      .then(async (result) => {
+        const timings: PageStageTimings = {
+          resourceWaitMs: captured.timings.resourceWaitMs,
+          captureMs: captured.timings.captureMs,
+          encodeMs: result.meta.timings?.encodeMs ?? 0,
+          ...stageTimings,
+        };
+        summary.resourceWaitMs += timings.resourceWaitMs;
+        summary.captureMs += timings.captureMs;
+        summary.encodeMs += timings.encodeMs;
+        summary.renderMs += timings.renderMs;
+        summary.queueMs += timings.queueMs;
+
+        const pageResult: ExportResult = {
+          ...result,
+          meta: { ...result.meta, timings },
+        };
+        if (retainPages) {
+          results[pageIndex] = pageResult;
+        }
+        done[pageIndex] = true;
+        completed += 1;
+
+        await onPageComplete?.(pageIndex, pageResult);
+        onProgress?.({
+          current: completed,
+          total: pageCount,
+          percentage: Math.round((completed / pageCount) * 100),
+          currentPageResult: pageResult,
+          timings,
+        });
+      })
+      .catch((error: unknown) => {
+        encodeError ??= error;
+      })
+      .finally(() => {
+        inFlightPixels -= pixels;
+        releaseCanvas(captured.canvas);
+        inFlight.delete(task);
+      });
+
+    inFlight.add(task);
+  };
+
+  const buildResult = (cancelled: boolean): MultiPageExportResult => {
+    // Only keep the contiguous prefix so page numbering stays consistent
+    let exported = 0;
+    while (exported < pageCount && done[exported]) {
+      exported += 1;
     }
+    const pages = retainPages
+      ? (results.slice(0, exported) as ExportResult[])
+      : [];
 
-    // Render the page
-    const element = await renderPage(i);
+    return {
+      pages,
+      totalPages: exported,
+      cancelled,
+      completedAt: new Date().toISOString(),
+      timings: { ...summary, totalMs: performance.now() - exportStart },
+    };
+  };
+
+  try {
+    if (preflight && opts.assets) {
+      if (abortSignal?.aborted) {
+        return buildResult(true);
+      }
+
+      const preflightStart = performance.now();
+      await opts.assets.preflight({
+        embedFonts: opts.embedFonts,
+        fontTimeout: opts.fontTimeout,
+        imageTimeout: opts.imageTimeout,
+        signal: abortSignal,
+        ...preflight,
+      });
+      summary.preflightMs = performance.now() - preflightStart;
+
+      // Fetching every image can take a while; don't start on stale intent
+      if (abortSignal?.aborted) {
+        return buildResult(true);
+      }
+    }
+
+    for (let i = 0; i < pageCount; i++) {
+      // Wait for a pipeline slot
+      const queueStart = performance.now();
+      while (!hasFreeSlot() && encodeError === null) {
+        await Promise.race(inFlight);
+      }
+      const queueMs = performance.now() - queueStart;
+
+      if (encodeError !== null) {
+        throw encodeError;
+      }
+
+      // Check for cancellation
+      if (abortSignal?.aborted) {
+        await Promise.all(inFlight);
+        return buildResult(true);
+      }
 
-    // Export the page
-    const result = await exportToPng(element, exportOptions);
-    pages.push(result);
+      // Render the page
+      const renderStart = performance.now();
+      const element = await renderPage(i);
+      const renderMs = performance.now() - renderStart;
 
-    // Report progress
-    onProgress?.({
-      current: i + 1,
-      total: pageCount,
-      percentage: Math.round(((i + 1) / pageCount) * 100),
-      currentPageResult: result,
-    });
+      // Capture the page (must finish before the next render touches the DOM)
+      const restore = prepareCapture?.(element, i);
+      let captured: CapturedCanvas;
+      try {
+        captured = await captureElement(element, opts);
+      } finally {
+        restore?.();
+      }
+
+      if (abortSignal?.aborted) {
+        releaseCanvas(captured.canvas);
+        await Promise.all(inFlight);
+        return buildResult(true);
+      }
+
+      // Encode in the background and move on to the next page
+      startEncode(i, captured, { renderMs, queueMs });
+    }
+  } finally {
+    // Never leave encodes running past this call, even on failure
+    await Promise.all(inFlight);
   }
 
-  return {
-    pages,
-    totalPages: pages.length,
-    cancelled: false,
-    completedAt: new Date().toISOString(),
-  };
+  if (encodeError !== null) {
+    throw encodeError;
+  }
+
+  return buildResult(abortSignal?.aborted ?? false);
 }
 
 /**
@@ -1,5 +1,31 @@
+import { unzipSync, strFromU8 } from "fflate";
 import { describe, it, expect } from "vitest";
-import { generatePageFilename, generateZipFilename } from "./zip-packager";
+import type { ExportResult } from "./exporter";
+import {
+  createStreamingZipPackager,
+  generatePageFilename,
+  generateZipFilename,
+  packageAsZip,
+} from "./zip-packager";
+
+function createPage(bytes: number[]): ExportResult {
+  return {
+    blob: new Blob([new Uint8Array(bytes)], { type: "image/png" }),
+    dataUrl: "",
+    width: 10,
+    height: 20,
+    meta: {
+      scale: 2,
+      format: "png",
+      exportedAt: "2024-06-15T00:00:00.000Z",
+      resourceStatus: { fontsReady: true, imagesLoaded: 0, imagesFailed: 0 },
+    },
+  };
+}
+
+async function readZip(blob: Blob): Promise<Record<string, Uint8Array>> {
+  return unzipSync(new Uint8Array(await blob.arrayBuffer()));
+}
 
 describe("generatePageFilename", () => {
   it("should generate filename with correct padding for single digit", () => {
@@ -74,3 +100,104 @@ describe("generateZipFilename", () => {
     expect(filename).toContain("聊天记录");
   });
 });
+
+describe("StreamingZipPackager", () => {
+  it("should package pages added out of order", async () => {
+    const packager = createStreamingZipPackager({ totalPages: 2 });
+
+    await packager.addPage(1, createPage([4, 5, 6]));
+    await packager.addPage(0, createPage([1, 2, 3]));
+    const result = await packager.finalize();
+
+    const files = await readZip(result.blob!);
+    expect(Array.from(files["page_1.png"]!)).toEqual([1, 2, 3]);
+    expect(Array.from(files["page_2.png"]!)).toEqual([4, 5, 6]);
+    expect(result.files).toContain("metadata.json");
+  });
+
+  it("should order metadata pages by page index", async () => {
+    const packager = createStreamingZipPackager({ totalPages: 2 });
+
+    await packager.addPage(1, createPage([2]));
+    await packager.addPage(0, createPage([1]));
+    const result = await packager.finalize();
+
+    const files = await readZip(result.blob!);
+    const metadata = JSON.parse(strFromU8(files["metadata.json"]!)) as {
+      files: string[];
+    };
+    expect(metadata.files).toEqual(["page_1.png", "page_2.png"]);
+  });
+
+  it("should store page images without recompression", async () => {
+    const bytes = Array.from({ length: 4096 }, () => 0);
+    const packager = createStreamingZipPackager({
+      totalPages: 1,
+      includeMetadata: false,
+    });
+
+    await packager.addPage(0, createPage(bytes));
+    const result = await packager.finalize();
+
+    // Zero-filled data would deflate to a few bytes if compressed
+    expect(result.size).toBeGreaterThan(bytes.length);
+  });
+
+  it("should stream archive bytes to a sink", async () => {
+    const chunks: Uint8Array[] = [];
+    let closed = false;
+    const sink = new WritableStream<Uint8Array>({
+      write(chunk) {
+        chunks.push(chunk);
+      },
+      close() {
+        closed = true;
+      },
+    });
+
+    const packager = createStreamingZipPackager({ totalPages: 1, sink });
+    await packager.addPage(0, createPage([7, 8, 9]));
+    const result = await packager.finalize();
+
+    expect(result.blob).toBeUndefined();
+    expect(closed).toBe(true);
+    const written = chunks.reduce((total, chunk) => total + chunk.length, 0);
+    expect(written).toBe(result.size);
+  });
+
+  it("should reject finalize when no pages were added", async () => {
+    const packager = createStreamingZipPackager({ totalPages: 1 });
+
+    await expect(packager.finalize()).rejects.toMatchObject({
+      code: "E-EXPORT-005",
+    });
+  });
+
+  it("should reject pages added after finalize", async () => {
+    const packager = createStreamingZipPackager({ totalPages: 2 });
+    await packager.addPage(0, createPage([1]));
+    await packager.finalize();
+
+    await expect(packager.addPage(1, createPage([2]))).rejects.toMatchObject({
+      code: "E-EXPORT-005",
+    });
+  });
+});
+
+describe("packageAsZip", () => {
+  it("should package all pages from an export result", async () => {
+    const result = await packageAsZip({
+      pages: [createPage([1]), createPage([2])],
+      totalPages: 2,
+      cancelled: false,
+      completedAt: new Date().toISOString(),
+    });
+
+    const files = await readZip(result.blob);
+    expect(Object.keys(files).sort()).toEqual([
+      "metadata.json",
+      "page_1.png",
+      "page_2.png",
+    ]);
+  });
+});
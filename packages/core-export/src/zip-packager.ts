@@ -3,7 +3,8 @@
  */
 
 import { createAppError } from "@chat2poster/core-schema";
-import { zipSync, strToU8 } from "fflate";
+import { strToU8, Zip, ZipDeflate, ZipPassThrough } from "fflate";
+import type { ExportResult } from "./exporter";
 import type { MultiPageExportResult } from "./multi-page-exporter";
 
 /**
@@ -16,7 +17,11 @@ export interface ZipOptions {
   includeMetadata?: boolean;
   /** Custom metadata to include */
   customMetadata?: Record<string, unknown>;
-  /** Compression level (0-9, higher = more compression but slower) */
+  /**
+   * Compression level (0-9, higher = more compression but slower).
+   * Applies to metadata only; page images are already compressed and are
+   * stored as-is.
+   */
   compressionLevel?: number;
 }
 
@@ -76,27 +81,51 @@ async function blobToUint8Array(blob: Blob): Promise<Uint8Array> {
   return new Uint8Array(arrayBuffer);
 }
 
+/**
+ * Copy a chunk into a standalone ArrayBuffer (fflate may reuse input buffers)
+ */
+function toArrayBuffer(chunk: Uint8Array): ArrayBuffer {
+  const buffer = new ArrayBuffer(chunk.byteLength);
+  new Uint8Array(buffer).set(chunk);
+  return buffer;
+}
+
+/**
+ * Clamp compression level to fflate's valid range (0-9)
+ */
+function toDeflateLevel(
+  level: number | undefined,
+): 0 | 1 | 2 | 3 | 4 | 5 | 6 | 7 | 8 | 9 {
+  const clamped = Math.min(9, Math.max(0, Math.round(level ?? 6)));
+  return clamped as 0 | 1 | 2 | 3 | 4 | 5 | 6 | 7 | 8 | 9;
+}
+
+/**
+ * Per-page entry recorded for metadata.json
+ */
+interface PageEntry {
+  filename: string;
+  width: number;
+  height: number;
+  scale: ExportResult["meta"]["scale"];
+  format: string;
+  exportedAt: string;
+}
+
 /**
  * Create metadata JSON content
  */
 function createMetadataContent(
-  exportResult: MultiPageExportResult,
-  filenames: string[],
+  totalPages: number,
+  entries: PageEntry[],
   options: ZipOptions,
 ): string {
   const metadata = {
     version: "1.0",
     createdAt: new Date().toISOString(),
-    totalPages: exportResult.totalPages,
-    files: filenames,
-    pages: exportResult.pages.map((page, index) => ({
-      filename: filenames[index],
-      width: page.width,
-      height: page.height,
-      scale: page.meta.scale,
-      format: page.meta.format,
-      exportedAt: page.meta.exportedAt,
-    })),
+    totalPages,
+    files: entries.map((entry) => entry.filename),
+    pages: entries,
     ...options.customMetadata,
   };
 
@@ -104,92 +133,245 @@ function createMetadataContent(
 }
 
 /**
- * Package export result as a ZIP file
+ * Streaming ZIP packaging options
  */
-export async function packageAsZip(
-  exportResult: MultiPageExportResult,
-  options: Partial<ZipOptions> = {},
-): Promise<ZipResult> {
-  const opts: ZipOptions = { ...DEFAULT_ZIP_OPTIONS, ...options };
+export interface StreamingZipOptions extends ZipOptions {
+  /** Number of pages that will be added (used for filename padding) */
+  totalPages: number;
+  /**
+   * Destination for archive bytes, e.g. a File System Access API stream.
+   * When omitted, the archive is collected into a Blob.
+   */
+  sink?: WritableStream<Uint8Array>;
+}
 
-  if (exportResult.pages.length === 0) {
-    throw createAppError("E-EXPORT-005", "No pages to package");
+/**
+ * Streaming ZIP packaging result
+ * `blob` is only set when no sink was provided.
+ */
+export interface StreamingZipResult extends Omit<ZipResult, "blob"> {
+  blob?: Blob;
+}
+
+/**
+ * Incremental ZIP packager.
+ *
+ * Pages are written as soon as they are added, so only one page's bytes are
+ * held in memory at a time. Page images are stored without recompression,
+ * which keeps the main thread free of deflate work.
+ */
+export class StreamingZipPackager {
+  private readonly opts: StreamingZipOptions;
+  private readonly zip: Zip;
+  private readonly writer: WritableStreamDefaultWriter<Uint8Array> | null;
+  private readonly parts: Blob[] = [];
+  private readonly entries: (PageEntry | undefined)[] = [];
+  private queue: Promise<void> = Promise.resolve();
+  private writes: Promise<void> = Promise.resolve();
+  private readonly ended: Promise<void>;
+  private failure: { error: unknown } | null = null;
+  private finalized = false;
+  private size = 0;
+  private uncompressedSize = 0;
+
+  constructor(options: StreamingZipOptions) {
+    this.opts = { ...DEFAULT_ZIP_OPTIONS, ...options };
+    this.writer = this.opts.sink ? this.opts.sink.getWriter() : null;
+
+    let resolveEnded!: () => void;
+    this.ended = new Promise<void>((resolve) => {
+      resolveEnded = resolve;
+    });
+
+    this.zip = new Zip((err, chunk, final) => {
+      if (err) {
+        this.failure ??= { error: err };
+        resolveEnded();
+        return;
+      }
+
+      this.size += chunk.byteLength;
+      if (this.writer) {
+        const writer = this.writer;
+        const copy = new Uint8Array(toArrayBuffer(chunk));
+        this.writes = this.writes.then(() => writer.write(copy));
+      } else {
+        this.parts.push(new Blob([toArrayBuffer(chunk)]));
+      }
+
+      if (final) {
+        resolveEnded();
+      }
+    });
   }
 
-  try {
-    // Prepare files for ZIP
-    const files: Record<string, Uint8Array> = {};
-    const filenames: string[] = [];
-    let totalUncompressedSize = 0;
+  /**
+   * Add an exported page to the archive.
+   * Pages may arrive out of order; entries are serialized internally.
+   */
+  addPage(pageIndex: number, page: ExportResult): Promise<void> {
+    if (this.finalized) {
+      return Promise.reject(
+        createAppError("E-EXPORT-005", "Cannot add pages after finalize"),
+      );
+    }
+
+    const task = this.queue.then(async () => {
+      this.throwIfFailed();
 
-    // Add page images
-    for (let i = 0; i < exportResult.pages.length; i++) {
-      const page = exportResult.pages[i]!;
       const filename = generatePageFilename(
-        i,
-        exportResult.totalPages,
-        opts.baseFilename,
+        pageIndex,
+        this.opts.totalPages,
+        this.opts.baseFilename,
         page.meta.format,
       );
-      filenames.push(filename);
-
       const data = await blobToUint8Array(page.blob);
-      files[filename] = data;
-      totalUncompressedSize += data.length;
+
+      const file = new ZipPassThrough(filename);
+      this.zip.add(file);
+      file.push(data, true);
+
+      this.entries[pageIndex] = {
+        filename,
+        width: page.width,
+        height: page.height,
+        scale: page.meta.scale,
+        format: page.meta.format,
+        exportedAt: page.meta.exportedAt,
+      };
+      this.uncompressedSize += data.length;
+
+      // Backpressure: wait for the sink before accepting the next page
+      await this.writes;
+    });
+
+    // Keep the queue alive after a failure so finalize can report it
+    this.queue = task.catch((error: unknown) => {
+      this.failure ??= { error };
+    });
+
+    return task;
+  }
+
+  /**
+   * Write metadata, close the archive and flush the sink
+   */
+  async finalize(): Promise<StreamingZipResult> {
+    this.finalized = true;
+    await this.queue;
+
+    const entries = this.entries.filter(
+      (entry): entry is PageEntry => entry !== undefined,
+    );
+
+    try {
+      this.throwIfFailed();
+
+      if (entries.length === 0) {
+        throw createAppError("E-EXPORT-005", "No pages to package");
+      }
+
+      const filenames = entries.map((entry) => entry.filename);
+
+      // Add metadata if requested
+      if (this.opts.includeMetadata) {
+        const metadataContent = createMetadataContent(
+          this.opts.totalPages,
+          entries,
+          this.opts,
+        );
+        const metadataFilename = "metadata.json";
+        const file = new ZipDeflate(metadataFilename, {
+          level: toDeflateLevel(this.opts.compressionLevel),
+        });
+        this.zip.add(file);
+        file.push(strToU8(metadataContent), true);
+        filenames.push(metadataFilename);
+        this.uncompressedSize += metadataContent.length;
+      }
+
+      this.zip.end();
+      await this.ended;
+      await this.writes;
+      this.throwIfFailed();
+      await this.writer?.close();
+
+      return {
+        blob: this.writer
+          ? undefined
+          : new Blob(this.parts, { type: "application/zip" }),
+        size: this.size,
+        files: filenames,
+        meta: {
+          totalPages: this.opts.totalPages,
+          packagedAt: new Date().toISOString(),
+          compressionRatio:
+            this.uncompressedSize > 0
+              ? Number((this.size / this.uncompressedSize).toFixed(2))
+              : 1,
+        },
+      };
+    } catch (error) {
+      await this.abort();
+      if (error instanceof Error) {
+        throw createAppError(
+          "E-EXPORT-005",
+          `ZIP packaging failed: ${error.message}`,
+        );
+      }
+      throw error;
     }
+  }
 
-    // Add metadata if requested
-    if (opts.includeMetadata) {
-      const metadataContent = createMetadataContent(
-        exportResult,
-        filenames,
-        opts,
-      );
-      const metadataFilename = "metadata.json";
-      files[metadataFilename] = strToU8(metadataContent);
-      filenames.push(metadataFilename);
-      totalUncompressedSize += metadataContent.length;
+  /**
+   * Stop packaging and discard any output written so far
+   */
+  async abort(): Promise<void> {
+    this.finalized = true;
+    this.zip.terminate();
+    this.parts.length = 0;
+    await this.writer?.abort().catch(() => undefined);
+  }
+
+  private throwIfFailed(): void {
+    if (this.failure) {
+      throw this.failure.error;
     }
+  }
+}
 
-    // Create ZIP with fflate
-    // Cast compressionLevel to valid range (0-9)
-    const level = (opts.compressionLevel ?? 6) as
-      | 0
-      | 1
-      | 2
-      | 3
-      | 4
-      | 5
-      | 6
-      | 7
-      | 8
-      | 9;
-    const zipped = zipSync(files, {
-      level,
-    });
+/**
+ * Create a streaming ZIP packager
+ */
+export function createStreamingZipPackager(
+  options: StreamingZipOptions,
+): StreamingZipPackager {
+  return new StreamingZipPackager(options);
+}
+
+/**
+ * Package export result as a ZIP file
+ */
+export async function packageAsZip(
+  exportResult: MultiPageExportResult,
+  options: Partial<ZipOptions> = {},
+): Promise<ZipResult> {
+  if (exportResult.pages.length === 0) {
+    throw createAppError("E-EXPORT-005", "No pages to package");
+  }
 
-    // Create Blob - create a new ArrayBuffer from the Uint8Array for type safety
-    const buffer = new ArrayBuffer(zipped.byteLength);
-    new Uint8Array(buffer).set(zipped);
-    const blob = new Blob([buffer], { type: "application/zip" });
-
-    return {
-      blob,
-      size: blob.size,
-      files: filenames,
-      meta: {
-        totalPages: exportResult.totalPages,
-        packagedAt: new Date().toISOString(),
-        compressionRatio:
-          totalUncompressedSize > 0
-            ? Number((blob.size / totalUncompressedSize).toFixed(2))
-            : 1,
-      },
-    };
-  } catch (error) {
-    const detail = error instanceof Error ? error.message : "Unknown error";
-    throw createAppError("E-EXPORT-005", `ZIP packaging failed: ${detail}`);
+  const packager = new StreamingZipPackager({
+    ...options,
+    totalPages: exportResult.totalPages,
+  });
+
+  for (let i = 0; i < exportResult.pages.length; i++) {
+    // Failures are recorded by the packager and surfaced by finalize()
+    await packager.addPage(i, exportResult.pages[i]!).catch(() => undefined);
   }
+
+  const result = await packager.finalize();
+  return { ...result, blob: result.blob! };
 }
 
 /**
@@ -0,0 +1,27 @@
+import type { HeightContext, HeightSource } from "../height-source";
+
+/**
+ * Rendering context of the reference heights below
+ */
+export const MEASURED_HEIGHT_CONTEXT: HeightContext = {
+  themeId: "light",
+  deviceWidth: 768,
+};
+
+/**
+ * Preview heights in pixels of one cycle of `createFixtureMessages`, by
+ * message order. Re-record them from the preview height cache (the
+ * `offsetHeight` of each message slot) when the light theme changes.
+ */
+const MEASURED_HEIGHTS = [76, 188, 214, 348, 236, 296] as const;
+
+/**
+ * Reference height source for fixture messages, for use with
+ * `evaluateHeightAccuracy`
+ */
+export function createMeasuredReference(): HeightSource {
+  return {
+    getHeight: (message) =>
+      MEASURED_HEIGHTS[message.order % MEASURED_HEIGHTS.length]!,
+  };
+}
@@ -0,0 +1,44 @@
+import type { Message } from "@chat2poster/core-schema";
+
+const SAMPLES = [
+  "Can you explain how the export pipeline works?",
+  `Sure. The export runs in three stages:
+
+1. **Render** the page into the preview
+2. **Capture** it with SnapDOM
+3. **Encode** the canvas as PNG
+
+Each stage can be timed with \`performance.now()\`.`,
+  `Here is an example:
+
+\`\`\`ts
+const result = await exportToPng(canvas, { scale: 2 });
+downloadImage(result.blob, "chat2poster.png");
+\`\`\`
+
+Call it after the preview has settled.`,
+  "What about images? ![diagram](https://example.com/diagram.png)",
+  `| Stage | Cost |
+| --- | --- |
+| Render | low |
+| Capture | high |
+| Encode | medium |
+
+See [the docs](https://example.com/docs) for details.`,
+  "This is a much longer answer that spans several lines of prose. ".repeat(
+    12,
+  ),
+] as const;
+
+/**
+ * Build a deterministic conversation of `count` messages for tests and
+ * benchmarks. IDs are valid UUIDs derived from the index.
+ */
+export function createFixtureMessages(count: number): Message[] {
+  return Array.from({ length: count }, (_, index) => ({
+    id: `00000000-0000-4000-8000-${index.toString(16).padStart(12, "0")}`,
+    role: index % 2 === 0 ? ("user" as const) : ("assistant" as const),
+    contentMarkdown: SAMPLES[index % SAMPLES.length]!,
+    order: index,
+  }));
+}
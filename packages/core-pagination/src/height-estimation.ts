@@ -38,98 +38,134 @@ export const DEFAULT_HEIGHT_CONFIG: HeightEstimationConfig = {
 };
 
 /**
- * Count code blocks in markdown content
+ * Content metrics extracted from a message's markdown.
+ * Computed once per message; heights for any config derive from it.
  */
-function countCodeBlocks(markdown: string): {
-  count: number;
-  totalLines: number;
-} {
-  const codeBlockRegex = /```[\s\S]*?```/g;
-  const matches = markdown.match(codeBlockRegex) || [];
-  let totalLines = 0;
-
-  for (const match of matches) {
-    // Count lines in each code block (excluding the ``` markers)
-    const lines = match.split("\n").length - 2;
-    totalLines += Math.max(lines, 1);
-  }
-
-  return { count: matches.length, totalLines };
+export interface MessageMetrics {
+  /** Number of fenced code blocks */
+  codeBlockCount: number;
+  /** Total lines inside code blocks (excluding fence markers) */
+  codeLineCount: number;
+  /** Number of inline code segments outside code blocks */
+  inlineCodeCount: number;
+  /** Number of markdown images */
+  imageCount: number;
+  /** Characters of prose (code, images and link targets removed) */
+  textChars: number;
 }
 
+const CODE_BLOCK_REGEX = /```[\s\S]*?```/g;
+const INLINE_CODE_REGEX = /`[^`]+`/g;
+const LINK_REGEX = /\[([^\]]+)\]\([^)]+\)/g;
+
 /**
- * Count inline code segments (for slight height adjustment)
+ * Markdown image, capturing its target: the URL, optionally in angle
+ * brackets and followed by a title
  */
-function countInlineCode(markdown: string): number {
-  // Match inline code but not code blocks
-  const withoutBlocks = markdown.replace(/```[\s\S]*?```/g, "");
-  const matches = withoutBlocks.match(/`[^`]+`/g) || [];
-  return matches.length;
-}
+export const MARKDOWN_IMAGE_REGEX = /!\[[^\]]*\]\(([^)]+)\)/g;
 
 /**
- * Check if content contains images
+ * Count newline characters in a string
  */
-function countImages(markdown: string): number {
-  // Match markdown image syntax: ![alt](url)
-  const matches = markdown.match(/!\[[^\]]*\]\([^)]+\)/g) || [];
-  return matches.length;
+function countNewlines(text: string): number {
+  let count = 0;
+  let index = text.indexOf("\n");
+  while (index !== -1) {
+    count++;
+    index = text.indexOf("\n", index + 1);
+  }
+  return count;
 }
 
 /**
- * Calculate text content (excluding code blocks)
+ * Analyze markdown content into height-relevant metrics
  */
-function getTextContent(markdown: string): string {
-  // Remove code blocks
-  let text = markdown.replace(/```[\s\S]*?```/g, "");
-  // Remove inline code
-  text = text.replace(/`[^`]+`/g, "");
-  // Remove images
-  text = text.replace(/!\[[^\]]*\]\([^)]+\)/g, "");
-  // Remove links but keep text
-  text = text.replace(/\[([^\]]+)\]\([^)]+\)/g, "$1");
-  return text;
+export function analyzeMarkdown(markdown: string): MessageMetrics {
+  // Code blocks: count them and strip them in the same pass
+  let codeBlockCount = 0;
+  let codeLineCount = 0;
+  let withoutBlocks = "";
+  let cursor = 0;
+  for (const match of markdown.matchAll(CODE_BLOCK_REGEX)) {
+    codeBlockCount++;
+    // Lines in the block, excluding the ``` marker lines
+    codeLineCount += Math.max(countNewlines(match[0]) - 1, 1);
+    withoutBlocks += markdown.slice(cursor, match.index);
+    cursor = match.index + match[0].length;
+  }
+  withoutBlocks += markdown.slice(cursor);
+
+  // Inline code: count and strip in the same pass
+  let inlineCodeCount = 0;
+  let text = "";
+  cursor = 0;
+  for (const match of withoutBlocks.matchAll(INLINE_CODE_REGEX)) {
+    inlineCodeCount++;
+    text += withoutBlocks.slice(cursor, match.index);
+    cursor = match.index + match[0].length;
+  }
+  text += withoutBlocks.slice(cursor);
+
+  const imageCount = markdown.match(MARKDOWN_IMAGE_REGEX)?.length ?? 0;
+
+  // Remove images, keep link text
+  text = text.replace(MARKDOWN_IMAGE_REGEX, "").replace(LINK_REGEX, "$1");
+
+  return {
+    codeBlockCount,
+    codeLineCount,
+    inlineCodeCount,
+    imageCount,
+    textChars: text.length,
+  };
 }
 
 /**
- * Estimate the height of a single message in pixels
+ * Estimate a message height from precomputed metrics
  */
-export function estimateMessageHeight(
-  message: Message,
+export function estimateHeightFromMetrics(
+  metrics: MessageMetrics,
   config: HeightEstimationConfig = DEFAULT_HEIGHT_CONFIG,
 ): number {
-  // If pre-computed height exists, use it
-  if (message.contentMeta?.approxHeightPx) {
-    return message.contentMeta.approxHeightPx;
-  }
-
-  const markdown = message.contentMarkdown;
   let height = config.baseMessageHeightPx;
 
-  // Count code blocks and their lines
-  const codeInfo = countCodeBlocks(markdown);
-  if (codeInfo.count > 0) {
-    height += codeInfo.count * config.codeBlockHeightPx;
-    height += codeInfo.totalLines * config.codeLineHeightPx;
+  // Code blocks and their lines
+  if (metrics.codeBlockCount > 0) {
+    height += metrics.codeBlockCount * config.codeBlockHeightPx;
+    height += metrics.codeLineCount * config.codeLineHeightPx;
   }
 
-  // Count images
-  const imageCount = countImages(markdown);
-  height += imageCount * config.imageHeightPx;
+  // Images
+  height += metrics.imageCount * config.imageHeightPx;
 
-  // Calculate text lines (excluding code blocks)
-  const textContent = getTextContent(markdown);
-  const textChars = textContent.length;
-  const textLines = Math.ceil(textChars / config.charsPerLine);
+  // Text lines (excluding code blocks)
+  const textLines = Math.ceil(metrics.textChars / config.charsPerLine);
   height += textLines * config.lineHeightPx;
 
-  // Add small adjustment for inline code (slight height increase)
-  const inlineCodeCount = countInlineCode(markdown);
-  height += inlineCodeCount * 2; // Small adjustment per inline code
+  // Small adjustment per inline code (slight height increase)
+  height += metrics.inlineCodeCount * 2;
 
   return Math.max(height, config.minMessageHeightPx);
 }
 
+/**
+ * Estimate the height of a single message in pixels
+ */
+export function estimateMessageHeight(
+  message: Message,
+  config: HeightEstimationConfig = DEFAULT_HEIGHT_CONFIG,
+): number {
+  // If pre-computed height exists, use it
+  if (message.contentMeta?.approxHeightPx) {
+    return message.contentMeta.approxHeightPx;
+  }
+
+  return estimateHeightFromMetrics(
+    analyzeMarkdown(message.contentMarkdown),
+    config,
+  );
+}
+
 /**
  * Estimate heights for multiple messages
  */
@@ -164,11 +200,11 @@ export function analyzeContentMeta(markdown: string): {
   containsCodeBlock: boolean;
   containsImage: boolean;
 } {
-  const codeInfo = countCodeBlocks(markdown);
-  const imageCount = countImages(markdown);
+  const codeBlockCount = markdown.match(CODE_BLOCK_REGEX)?.length ?? 0;
+  const imageCount = markdown.match(MARKDOWN_IMAGE_REGEX)?.length ?? 0;
 
   return {
-    containsCodeBlock: codeInfo.count > 0,
+    containsCodeBlock: codeBlockCount > 0,
     containsImage: imageCount > 0,
   };
 }
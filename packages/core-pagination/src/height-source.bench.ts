@@ -0,0 +1,47 @@
+import { bench, describe } from "vitest";
+import { createFixtureMessages } from "./__fixtures__/messages";
+import {
+  createEstimatedHeightSource,
+  createMeasuredHeightSource,
+  type HeightContext,
+} from "./height-source";
+import { paginate } from "./paginator";
+
+const CONTEXT: HeightContext = { themeId: "light", deviceWidth: 768 };
+const messages = createFixtureMessages(1000);
+const selection = {
+  conversationId: "conv-1",
+  selectedMessageIds: messages.map((m) => m.id),
+  pageBreaks: [],
+};
+
+const estimated = createEstimatedHeightSource();
+const measured = createMeasuredHeightSource({ context: CONTEXT });
+for (const [index, message] of messages.entries()) {
+  // Lookup cost does not depend on the values; these are not measurements
+  measured.record(message, 100 + index);
+}
+
+describe("height lookup cost (1000 messages)", () => {
+  bench("heuristic estimate", () => {
+    for (const message of messages) {
+      estimated.getHeight(message);
+    }
+  });
+
+  bench("measured cache hit", () => {
+    for (const message of messages) {
+      measured.getHeight(message);
+    }
+  });
+});
+
+describe("paginate cost (1000 messages)", () => {
+  bench("estimated heights", () => {
+    paginate(messages, selection, { heightSource: estimated });
+  });
+
+  bench("measured heights", () => {
+    paginate(messages, selection, { heightSource: measured });
+  });
+});
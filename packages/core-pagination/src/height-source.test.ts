@@ -0,0 +1,291 @@
+import type { Message } from "@chat2poster/core-schema";
+import { describe, it, expect } from "vitest";
+import { createFixtureMessages } from "./__fixtures__/messages";
+import {
+  MEASURED_HEIGHT_CONTEXT,
+  createMeasuredReference,
+} from "./__fixtures__/measured-heights";
+import { estimateMessageHeight } from "./height-estimation";
+import {
+  MessageHeightCache,
+  createEstimatedHeightSource,
+  createMeasuredHeightSource,
+  evaluateHeightAccuracy,
+  hashContent,
+  type HeightContext,
+} from "./height-source";
+import { paginate } from "./paginator";
+
+function createTestMessage(id: string, content: string): Message {
+  return {
+    id,
+    role: "assistant",
+    contentMarkdown: content,
+    order: 0,
+  };
+}
+
+const LIGHT_TABLET: HeightContext = { themeId: "light", deviceWidth: 768 };
+const DARK_TABLET: HeightContext = { themeId: "dark", deviceWidth: 768 };
+
+describe("hashContent", () => {
+  it("should be deterministic", () => {
+    expect(hashContent("hello")).toBe(hashContent("hello"));
+  });
+
+  it("should differ for different content", () => {
+    expect(hashContent("hello")).not.toBe(hashContent("hellp"));
+  });
+});
+
+describe("MessageHeightCache", () => {
+  it("should return undefined on miss", () => {
+    const cache = new MessageHeightCache();
+    expect(cache.get(createTestMessage("msg-1", "Hi"), LIGHT_TABLET)).toBe(
+      undefined,
+    );
+  });
+
+  it("should return recorded heights", () => {
+    const cache = new MessageHeightCache();
+    const msg = createTestMessage("msg-1", "Hi");
+
+    cache.set(msg, LIGHT_TABLET, 120);
+
+    expect(cache.get(msg, LIGHT_TABLET)).toBe(120);
+  });
+
+  it("should key heights by theme and width", () => {
+    const cache = new MessageHeightCache();
+    const msg = createTestMessage("msg-1", "Hi");
+
+    cache.set(msg, LIGHT_TABLET, 120);
+
+    expect(cache.get(msg, DARK_TABLET)).toBeUndefined();
+    expect(
+      cache.get(msg, { themeId: "light", deviceWidth: 390 }),
+    ).toBeUndefined();
+  });
+
+  it("should share heights between messages with identical content", () => {
+    const cache = new MessageHeightCache();
+
+    cache.set(createTestMessage("msg-1", "Same"), LIGHT_TABLET, 90);
+
+    expect(cache.get(createTestMessage("msg-2", "Same"), LIGHT_TABLET)).toBe(
+      90,
+    );
+  });
+
+  it("should miss after message content changes", () => {
+    const cache = new MessageHeightCache();
+    cache.set(createTestMessage("msg-1", "Before"), LIGHT_TABLET, 90);
+
+    expect(
+      cache.get(createTestMessage("msg-1", "After"), LIGHT_TABLET),
+    ).toBeUndefined();
+  });
+
+  it("should drop the stale entry when a message is re-measured", () => {
+    const cache = new MessageHeightCache();
+    cache.set(createTestMessage("msg-1", "Before"), LIGHT_TABLET, 90);
+    cache.set(createTestMessage("msg-1", "After"), LIGHT_TABLET, 140);
+
+    expect(cache.size).toBe(1);
+  });
+
+  it("should invalidate a single message", () => {
+    const cache = new MessageHeightCache();
+    const msg1 = createTestMessage("msg-1", "One");
+    const msg2 = createTestMessage("msg-2", "Two");
+    cache.set(msg1, LIGHT_TABLET, 90);
+    cache.set(msg2, LIGHT_TABLET, 100);
+
+    cache.invalidateMessage("msg-1");
+
+    expect(cache.get(msg1, LIGHT_TABLET)).toBeUndefined();
+    expect(cache.get(msg2, LIGHT_TABLET)).toBe(100);
+  });
+
+  it("should invalidate a whole context", () => {
+    const cache = new MessageHeightCache();
+    const msg = createTestMessage("msg-1", "One");
+    cache.set(msg, LIGHT_TABLET, 90);
+    cache.set(msg, DARK_TABLET, 95);
+
+    cache.invalidateContext(LIGHT_TABLET);
+
+    expect(cache.get(msg, LIGHT_TABLET)).toBeUndefined();
+    expect(cache.get(msg, DARK_TABLET)).toBe(95);
+  });
+
+  it("should evict least recently used entries", () => {
+    const cache = new MessageHeightCache({ maxEntries: 2 });
+    const msg1 = createTestMessage("msg-1", "One");
+    const msg2 = createTestMessage("msg-2", "Two");
+    const msg3 = createTestMessage("msg-3", "Three");
+
+    cache.set(msg1, LIGHT_TABLET, 1);
+    cache.set(msg2, LIGHT_TABLET, 2);
+    cache.get(msg1, LIGHT_TABLET);
+    cache.set(msg3, LIGHT_TABLET, 3);
+
+    expect(cache.get(msg1, LIGHT_TABLET)).toBe(1);
+    expect(cache.get(msg2, LIGHT_TABLET)).toBeUndefined();
+    expect(cache.get(msg3, LIGHT_TABLET)).toBe(3);
+  });
+
+  it("should not refresh recency when checking membership", () => {
+    const cache = new MessageHeightCache({ maxEntries: 2 });
+    const msg1 = createTestMessage("msg-1", "One");
+    const msg2 = createTestMessage("msg-2", "Two");
+    const msg3 = createTestMessage("msg-3", "Three");
+
+    cache.set(msg1, LIGHT_TABLET, 1);
+    cache.set(msg2, LIGHT_TABLET, 2);
+    expect(cache.has(msg1, LIGHT_TABLET)).toBe(true);
+    cache.set(msg3, LIGHT_TABLET, 3);
+
+    expect(cache.has(msg1, LIGHT_TABLET)).toBe(false);
+    expect(cache.has(msg2, LIGHT_TABLET)).toBe(true);
+  });
+
+  it("should forget message keys of evicted entries", () => {
+    const cache = new MessageHeightCache({ maxEntries: 2 });
+
+    for (let i = 0; i < 100; i++) {
+      cache.set(createTestMessage(`msg-${i}`, `Content ${i}`), LIGHT_TABLET, i);
+    }
+
+    expect(cache.size).toBe(2);
+    expect(cache["keysByMessage"].size).toBe(2);
+  });
+
+  it("should keep a shared entry when one message is re-measured", () => {
+    const cache = new MessageHeightCache();
+    cache.set(createTestMessage("msg-1", "Same"), LIGHT_TABLET, 90);
+    cache.set(createTestMessage("msg-2", "Same"), LIGHT_TABLET, 90);
+
+    cache.set(createTestMessage("msg-1", "Edited"), LIGHT_TABLET, 140);
+
+    expect(cache.get(createTestMessage("msg-2", "Same"), LIGHT_TABLET)).toBe(
+      90,
+    );
+  });
+
+  it("should invalidate a message in every context", () => {
+    const cache = new MessageHeightCache();
+    const msg = createTestMessage("msg-1", "One");
+    cache.set(msg, LIGHT_TABLET, 90);
+    cache.set(msg, DARK_TABLET, 95);
+
+    cache.invalidateMessage("msg-1");
+
+    expect(cache.size).toBe(0);
+    expect(cache["keysByMessage"].size).toBe(0);
+  });
+});
+
+describe("createMeasuredHeightSource", () => {
+  it("should fall back to estimates when not measured", () => {
+    const source = createMeasuredHeightSource({ context: LIGHT_TABLET });
+    const msg = createTestMessage("msg-1", "Hello");
+
+    expect(source.hasMeasurement(msg)).toBe(false);
+    expect(source.getHeight(msg)).toBe(estimateMessageHeight(msg));
+  });
+
+  it("should prefer measured heights", () => {
+    const source = createMeasuredHeightSource({ context: LIGHT_TABLET });
+    const msg = createTestMessage("msg-1", "Hello");
+
+    source.record(msg, 512);
+
+    expect(source.hasMeasurement(msg)).toBe(true);
+    expect(source.getHeight(msg)).toBe(512);
+  });
+
+  it("should drive pagination", () => {
+    const source = createMeasuredHeightSource({ context: LIGHT_TABLET });
+    const messages = [
+      createTestMessage("msg-1", "Short"),
+      createTestMessage("msg-2", "Short"),
+      createTestMessage("msg-3", "Tall"),
+    ];
+    source.record(messages[0]!, 300);
+    source.record(messages[2]!, 900);
+
+    const result = paginate(
+      messages,
+      {
+        conversationId: "conv-1",
+        selectedMessageIds: messages.map((m) => m.id),
+        pageBreaks: [],
+      },
+      { maxPageHeightPx: 1000, heightSource: source },
+    );
+
+    expect(result.pages).toEqual([["msg-1", "msg-2"], ["msg-3"]]);
+  });
+});
+
+describe("evaluateHeightAccuracy", () => {
+  it("should report zero error against itself", () => {
+    const source = createEstimatedHeightSource();
+    const messages = [createTestMessage("msg-1", "Hello")];
+
+    const report = evaluateHeightAccuracy(messages, source, source);
+
+    expect(report.count).toBe(1);
+    expect(report.meanAbsoluteErrorPx).toBe(0);
+  });
+
+  it("should separate under- and overestimates", () => {
+    const messages = [
+      createTestMessage("msg-1", "A"),
+      createTestMessage("msg-2", "B"),
+    ];
+    const predicted = {
+      getHeight: (m: Message) => (m.id === "msg-1" ? 80 : 130),
+    };
+    const actual = { getHeight: () => 100 };
+
+    const report = evaluateHeightAccuracy(messages, predicted, actual);
+
+    expect(report.maxUnderestimatePx).toBe(20);
+    expect(report.maxOverestimatePx).toBe(30);
+    expect(report.meanAbsoluteErrorPx).toBe(25);
+  });
+
+  it("should keep the estimator close to recorded preview heights", () => {
+    const messages = createFixtureMessages(12);
+    const reference = createMeasuredReference();
+
+    const report = evaluateHeightAccuracy(
+      messages,
+      createEstimatedHeightSource(),
+      reference,
+    );
+
+    // Regression bounds for the heuristic; tighten them as it improves
+    expect(report.count).toBe(12);
+    expect(report.meanRelativeError).toBeLessThan(0.3);
+    expect(report.maxUnderestimatePx).toBeLessThanOrEqual(150);
+    expect(report.maxOverestimatePx).toBeLessThanOrEqual(80);
+  });
+
+  it("should match recorded preview heights once they are measured", () => {
+    const messages = createFixtureMessages(12);
+    const reference = createMeasuredReference();
+    const source = createMeasuredHeightSource({
+      context: MEASURED_HEIGHT_CONTEXT,
+    });
+    for (const message of messages) {
+      source.record(message, reference.getHeight(message));
+    }
+
+    const report = evaluateHeightAccuracy(messages, source, reference);
+
+    expect(report.meanAbsoluteErrorPx).toBe(0);
+  });
+});
@@ -0,0 +1,313 @@
+import type { Message } from "@chat2poster/core-schema";
+import {
+  estimateMessageHeight,
+  type HeightEstimationConfig,
+  DEFAULT_HEIGHT_CONFIG,
+} from "./height-estimation";
+
+/**
+ * A source of per-message heights used by the paginator.
+ * Implementations may estimate, measure, or look heights up from a cache.
+ */
+export interface HeightSource {
+  getHeight(message: Message): number;
+}
+
+/**
+ * Rendering context that affects a message's height
+ */
+export interface HeightContext {
+  /** Theme identifier (fonts, paddings and line-heights differ per theme) */
+  themeId: string;
+  /** Canvas width in pixels */
+  deviceWidth: number;
+}
+
+/**
+ * Configuration for the message height cache
+ */
+export interface HeightCacheConfig {
+  /** Maximum number of cached heights before least recently used are evicted */
+  maxEntries: number;
+}
+
+/**
+ * Default height cache configuration
+ */
+export const DEFAULT_HEIGHT_CACHE_CONFIG: HeightCacheConfig = {
+  maxEntries: 10000,
+};
+
+/**
+ * 53-bit content hash (cyrb53).
+ * Wide enough that collisions are negligible for conversation-sized inputs;
+ * cache entries additionally compare content length.
+ */
+export function hashContent(content: string, seed = 0): string {
+  let h1 = 0xdeadbeef ^ seed;
+  let h2 = 0x41c6ce57 ^ seed;
+  for (let i = 0; i < content.length; i++) {
+    const ch = content.charCodeAt(i);
+    h1 = Math.imul(h1 ^ ch, 2654435761);
+    h2 = Math.imul(h2 ^ ch, 1597334677);
+  }
+  h1 = Math.imul(h1 ^ (h1 >>> 16), 2246822507);
+  h1 ^= Math.imul(h2 ^ (h2 >>> 13), 3266489909);
+  h2 = Math.imul(h2 ^ (h2 >>> 16), 2246822507);
+  h2 ^= Math.imul(h1 ^ (h1 >>> 13), 3266489909);
+
+  return (4294967296 * (2097151 & h2) + (h1 >>> 0)).toString(36);
+}
+
+function contextKey(context: HeightContext): string {
+  return `${context.themeId}|${context.deviceWidth}`;
+}
+
+function contentKey(message: Message): string {
+  return `${message.role}:${message.contentMarkdown.length}:${hashContent(message.contentMarkdown)}`;
+}
+
+interface HeightCacheEntry {
+  heightPx: number;
+  context: string;
+  /** Message ids whose latest measurement is this entry */
+  messageIds: Set<string>;
+}
+
+/**
+ * Cache of measured message heights keyed by content hash, theme and width.
+ *
+ * Entries are keyed by content rather than message id, so identical messages
+ * share a measurement and editing a message naturally misses the cache.
+ * Recording a new height for a message id releases its previous entry, and
+ * evicting an entry forgets which messages pointed at it.
+ */
+export class MessageHeightCache {
+  private readonly config: HeightCacheConfig;
+  /** Insertion-ordered map doubles as the LRU list */
+  private readonly entries = new Map<string, HeightCacheEntry>();
+  /** Cache key of each message's latest measurement, by context */
+  private readonly keysByMessage = new Map<string, Map<string, string>>();
+
+  constructor(config: Partial<HeightCacheConfig> = {}) {
+    this.config = { ...DEFAULT_HEIGHT_CACHE_CONFIG, ...config };
+  }
+
+  /**
+   * Number of cached heights
+   */
+  get size(): number {
+    return this.entries.size;
+  }
+
+  /**
+   * Get a cached height, or undefined on miss
+   */
+  get(message: Message, context: HeightContext): number | undefined {
+    const key = `${contextKey(context)}|${contentKey(message)}`;
+    const entry = this.entries.get(key);
+    if (entry) {
+      // Refresh recency
+      this.entries.delete(key);
+      this.entries.set(key, entry);
+    }
+    return entry?.heightPx;
+  }
+
+  /**
+   * Whether a height is cached, without refreshing its recency
+   */
+  has(message: Message, context: HeightContext): boolean {
+    return this.entries.has(`${contextKey(context)}|${contentKey(message)}`);
+  }
+
+  /**
+   * Record a measured height
+   */
+  set(message: Message, context: HeightContext, heightPx: number): void {
+    const ctx = contextKey(context);
+    const key = `${ctx}|${contentKey(message)}`;
+
+    // Content changed since the last measurement: detach the stale entry
+    const previousKey = this.keysByMessage.get(message.id)?.get(ctx);
+    if (previousKey !== undefined && previousKey !== key) {
+      this.detach(message.id, previousKey);
+    }
+
+    const messageIds = this.entries.get(key)?.messageIds ?? new Set<string>();
+    messageIds.add(message.id);
+    this.entries.delete(key);
+    this.entries.set(key, { heightPx, context: ctx, messageIds });
+
+    let keys = this.keysByMessage.get(message.id);
+    if (!keys) {
+      keys = new Map();
+      this.keysByMessage.set(message.id, keys);
+    }
+    keys.set(ctx, key);
+
+    while (this.entries.size > this.config.maxEntries) {
+      const oldest = this.entries.keys().next().value;
+      if (oldest === undefined) break;
+      this.deleteEntry(oldest);
+    }
+  }
+
+  /**
+   * Drop cached heights for a single message (e.g. after an edit)
+   */
+  invalidateMessage(messageId: string): void {
+    const keys = this.keysByMessage.get(messageId);
+    if (!keys) return;
+    for (const key of keys.values()) {
+      this.deleteEntry(key);
+    }
+    this.keysByMessage.delete(messageId);
+  }
+
+  /**
+   * Drop all cached heights for a theme/width combination
+   */
+  invalidateContext(context: HeightContext): void {
+    const ctx = contextKey(context);
+    for (const [key, entry] of this.entries) {
+      if (entry.context === ctx) {
+        this.deleteEntry(key);
+      }
+    }
+  }
+
+  /**
+   * Clear all cached heights
+   */
+  clear(): void {
+    this.entries.clear();
+    this.keysByMessage.clear();
+  }
+
+  /**
+   * Stop tracking a message's old entry, dropping it once no message
+   * points at it anymore
+   */
+  private detach(messageId: string, key: string): void {
+    const entry = this.entries.get(key);
+    entry?.messageIds.delete(messageId);
+    if (entry?.messageIds.size === 0) {
+      this.entries.delete(key);
+    }
+  }
+
+  /**
+   * Remove an entry and the per-message keys pointing at it
+   */
+  private deleteEntry(key: string): void {
+    const entry = this.entries.get(key);
+    if (!entry) return;
+    this.entries.delete(key);
+
+    for (const messageId of entry.messageIds) {
+      const keys = this.keysByMessage.get(messageId);
+      if (keys?.get(entry.context) !== key) continue;
+      keys.delete(entry.context);
+      if (keys.size === 0) {
+        this.keysByMessage.delete(messageId);
+      }
+    }
+  }
+}
+
+/**
+ * Create a height source backed by the heuristic estimator
+ */
+export function createEstimatedHeightSource(
+  config: HeightEstimationConfig = DEFAULT_HEIGHT_CONFIG,
+): HeightSource {
+  return {
+    getHeight: (message) => estimateMessageHeight(message, config),
+  };
+}
+
+/**
+ * Height source that prefers measured heights and falls back to estimates
+ */
+export interface MeasuredHeightSource extends HeightSource {
+  /** Record a measured height for a message */
+  record(message: Message, heightPx: number): void;
+  /** Whether a measured height is available for a message */
+  hasMeasurement(message: Message): boolean;
+}
+
+/**
+ * Create a height source that uses measured DOM heights when available.
+ *
+ * Measurements come from the editor preview or an offscreen layout pass and
+ * are recorded with `record()`. Messages without a measurement fall back to
+ * `fallback` (the heuristic estimator by default).
+ */
+export function createMeasuredHeightSource(options: {
+  context: HeightContext;
+  cache?: MessageHeightCache;
+  fallback?: HeightSource;
+}): MeasuredHeightSource {
+  const { context } = options;
+  const cache = options.cache ?? new MessageHeightCache();
+  const fallback = options.fallback ?? createEstimatedHeightSource();
+
+  return {
+    getHeight: (message) =>
+      cache.get(message, context) ?? fallback.getHeight(message),
+    record: (message, heightPx) => cache.set(message, context, heightPx),
+    hasMeasurement: (message) => cache.has(message, context),
+  };
+}
+
+/**
+ * Accuracy of a height source against reference heights
+ */
+export interface HeightAccuracyReport {
+  /** Number of messages compared */
+  count: number;
+  /** Mean absolute error in pixels */
+  meanAbsoluteErrorPx: number;
+  /** Mean absolute error relative to the reference height (0-1) */
+  meanRelativeError: number;
+  /** Largest underestimate in pixels (causes page overflow) */
+  maxUnderestimatePx: number;
+  /** Largest overestimate in pixels (causes half-empty pages) */
+  maxOverestimatePx: number;
+}
+
+/**
+ * Compare a height source against reference heights
+ * (e.g. heights taken from actual captured pages)
+ */
+export function evaluateHeightAccuracy(
+  messages: Message[],
+  source: HeightSource,
+  reference: HeightSource,
+): HeightAccuracyReport {
+  let absoluteError = 0;
+  let relativeError = 0;
+  let maxUnderestimatePx = 0;
+  let maxOverestimatePx = 0;
+
+  for (const message of messages) {
+    const predicted = source.getHeight(message);
+    const actual = reference.getHeight(message);
+    const diff = predicted - actual;
+
+    absoluteError += Math.abs(diff);
+    relativeError += actual > 0 ? Math.abs(diff) / actual : 0;
+    maxUnderestimatePx = Math.max(maxUnderestimatePx, -diff);
+    maxOverestimatePx = Math.max(maxOverestimatePx, diff);
+  }
+
+  const count = messages.length;
+  return {
+    count,
+    meanAbsoluteErrorPx: count > 0 ? absoluteError / count : 0,
+    meanRelativeError: count > 0 ? relativeError / count : 0,
+    maxUnderestimatePx,
+    maxOverestimatePx,
+  };
+}
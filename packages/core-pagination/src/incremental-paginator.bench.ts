@@ -0,0 +1,50 @@
+import type { Selection } from "@chat2poster/core-schema";
+import { bench, describe } from "vitest";
+import { createFixtureMessages } from "./__fixtures__/messages";
+import { createPaginator } from "./incremental-paginator";
+import { paginate, getPageHeights } from "./paginator";
+
+const messages = createFixtureMessages(5000);
+const allIds = messages.map((m) => m.id);
+const toggledId = allIds[2500]!;
+
+function createSelection(selectedMessageIds: string[]): Selection {
+  return {
+    conversationId: "conv-1",
+    selectedMessageIds,
+    pageBreaks: [],
+  };
+}
+
+const full = createSelection(allIds);
+const withoutToggled = createSelection(
+  allIds.filter((id) => id !== toggledId),
+);
+
+describe("toggle one message (5000 messages)", () => {
+  let flip = false;
+
+  bench("paginate + getPageHeights (stateless)", () => {
+    flip = !flip;
+    const selection = flip ? withoutToggled : full;
+    const result = paginate(messages, selection);
+    getPageHeights(messages, result);
+  });
+
+  const paginator = createPaginator(messages, full);
+  bench("IncrementalPaginator", () => {
+    flip = !flip;
+    paginator.setSelection(flip ? withoutToggled : full);
+    paginator.getPageHeights(paginator.paginate());
+  });
+});
+
+describe("initial build (5000 messages)", () => {
+  bench("paginate (stateless)", () => {
+    paginate(messages, full);
+  });
+
+  bench("createPaginator + paginate", () => {
+    createPaginator(messages, full).paginate();
+  });
+});
@@ -0,0 +1,175 @@
+import type { Message, Selection } from "@chat2poster/core-schema";
+import { describe, it, expect } from "vitest";
+import { createFixtureMessages } from "./__fixtures__/messages";
+import { DEFAULT_HEIGHT_CONFIG } from "./height-estimation";
+import { createPaginator } from "./incremental-paginator";
+import {
+  paginate,
+  getPageHeights,
+  getEstimatedTotalHeight,
+  needsPagination,
+} from "./paginator";
+
+function createTestSelection(
+  messageIds: string[],
+  breakAfterIds: string[] = [],
+): Selection {
+  return {
+    conversationId: "conv-1",
+    selectedMessageIds: messageIds,
+    pageBreaks: breakAfterIds.map((afterMessageId, index) => ({
+      id: `pb-${index}`,
+      afterMessageId,
+      createdAt: new Date().toISOString(),
+    })),
+  };
+}
+
+function expectParity(
+  paginator: ReturnType<typeof createPaginator>,
+  messages: Message[],
+  selection: Selection,
+  config: Parameters<typeof paginate>[2] = {},
+) {
+  const expected = paginate(messages, selection, config);
+  const actual = paginator.paginate();
+
+  expect(actual).toEqual(expected);
+  expect(paginator.getPageHeights()).toEqual(
+    getPageHeights(messages, expected, config),
+  );
+}
+
+describe("IncrementalPaginator", () => {
+  const messages = createFixtureMessages(200);
+  const allIds = messages.map((m) => m.id);
+
+  it("should match paginate for auto pagination", () => {
+    const selection = createTestSelection(allIds);
+    const paginator = createPaginator(messages, selection, {
+      maxPageHeightPx: 1500,
+    });
+
+    expectParity(paginator, messages, selection, { maxPageHeightPx: 1500 });
+  });
+
+  it("should match paginate with fractional heights", () => {
+    // Prefix sum differences round differently from a running sum here
+    const config = {
+      maxPageHeightPx: 602.1,
+      heightSource: {
+        getHeight: (message: Message) => 100.1 + (message.order % 7) * 0.1,
+      },
+    };
+    const selection = createTestSelection(allIds);
+    const paginator = createPaginator(messages, selection, config);
+
+    expectParity(paginator, messages, selection, config);
+  });
+
+  it("should match paginate for manual breaks", () => {
+    const selection = createTestSelection(allIds, [allIds[10]!, allIds[3]!]);
+    const paginator = createPaginator(messages, selection);
+
+    expectParity(paginator, messages, selection);
+  });
+
+  it("should match paginate with auto pagination disabled", () => {
+    const selection = createTestSelection(allIds);
+    const paginator = createPaginator(messages, selection, {
+      autoEnabled: false,
+    });
+
+    expectParity(paginator, messages, selection, { autoEnabled: false });
+  });
+
+  it("should stay consistent across selection toggles", () => {
+    const config = { maxPageHeightPx: 1200 };
+    let selectedIds = [...allIds];
+    const paginator = createPaginator(
+      messages,
+      createTestSelection(selectedIds),
+      config,
+    );
+    paginator.paginate();
+
+    // Deterministic toggles spread across the conversation
+    for (let step = 0; step < 50; step++) {
+      const id = allIds[(step * 37) % allIds.length]!;
+      selectedIds = selectedIds.includes(id)
+        ? selectedIds.filter((selected) => selected !== id)
+        : [...selectedIds, id];
+
+      const selection = createTestSelection(selectedIds);
+      paginator.setSelection(selection);
+      expectParity(paginator, messages, selection, config);
+    }
+  });
+
+  it("should stay consistent when page breaks move", () => {
+    const paginator = createPaginator(messages, createTestSelection(allIds));
+
+    for (const index of [5, 50, 120, 199]) {
+      const selection = createTestSelection(allIds, [allIds[index]!]);
+      paginator.setSelection(selection);
+      expectParity(paginator, messages, selection);
+    }
+
+    const cleared = createTestSelection(allIds);
+    paginator.setSelection(cleared);
+    expectParity(paginator, messages, cleared);
+  });
+
+  it("should pick up edited messages", () => {
+    const selection = createTestSelection(allIds);
+    const paginator = createPaginator(messages, selection, {
+      maxPageHeightPx: 1500,
+    });
+    paginator.paginate();
+
+    const edited = messages.map((m, index) =>
+      index === 42 ? { ...m, contentMarkdown: "x".repeat(5000) } : m,
+    );
+    paginator.setMessages(edited);
+
+    expectParity(paginator, edited, selection, { maxPageHeightPx: 1500 });
+  });
+
+  it("should recompute pages when config changes", () => {
+    const selection = createTestSelection(allIds);
+    const paginator = createPaginator(messages, selection);
+    paginator.paginate();
+
+    const config = {
+      maxPageHeightPx: 800,
+      heightConfig: { ...DEFAULT_HEIGHT_CONFIG, charsPerLine: 40 },
+    };
+    paginator.setConfig(config);
+
+    expectParity(paginator, messages, selection, config);
+  });
+
+  it("should match total height and needsPagination", () => {
+    const selection = createTestSelection(allIds);
+    const paginator = createPaginator(messages, selection);
+
+    expect(paginator.getTotalHeight()).toBe(getEstimatedTotalHeight(messages));
+    expect(paginator.needsPagination()).toBe(needsPagination(messages));
+  });
+
+  it("should ignore selected ids that are not in the conversation", () => {
+    const selection = createTestSelection(["missing", allIds[0]!]);
+    const paginator = createPaginator(messages, selection);
+
+    expect(paginator.paginate()).toEqual({
+      pages: [[allIds[0]]],
+      totalPages: 1,
+    });
+  });
+
+  it("should return the cached result when nothing changed", () => {
+    const paginator = createPaginator(messages, createTestSelection(allIds));
+
+    expect(paginator.paginate()).toBe(paginator.paginate());
+  });
+});
@@ -0,0 +1,408 @@
+import type {
+  Message,
+  Selection,
+  PaginationResult,
+  PageBreak,
+} from "@chat2poster/core-schema";
+import {
+  analyzeMarkdown,
+  estimateHeightFromMetrics,
+  type HeightEstimationConfig,
+  type MessageMetrics,
+} from "./height-estimation";
+import {
+  pagesToPageBreaks,
+  resolvePaginationConfig,
+  type PaginationConfig,
+} from "./paginator";
+
+/**
+ * Cached per-message state
+ */
+interface MessageEntry {
+  message: Message;
+  /** Parsed once per content; null while heights come from elsewhere */
+  metrics: MessageMetrics | null;
+  height: number;
+}
+
+/**
+ * A page of the selected messages as a half-open index range [start, end)
+ */
+interface PageRange {
+  start: number;
+  end: number;
+  ids: string[];
+}
+
+/**
+ * Shallow comparison of two height configs
+ */
+function isSameHeightConfig(
+  a: HeightEstimationConfig,
+  b: HeightEstimationConfig,
+): boolean {
+  return (Object.keys(a) as (keyof HeightEstimationConfig)[]).every(
+    (key) => a[key] === b[key],
+  );
+}
+
+/**
+ * Stateful paginator for interactive editing.
+ *
+ * Each message is parsed once into a compact metrics record, and heights of
+ * the selected messages are kept as prefix sums. Selection toggles, page
+ * break changes and message edits only recompute state from the first
+ * affected position; earlier auto-pagination pages are reused as-is.
+ *
+ * Produces the same output as `paginate()` for the same inputs.
+ */
+export class IncrementalPaginator {
+  private config: PaginationConfig;
+  private readonly entries = new Map<string, MessageEntry>();
+  /** Raw selection order, including ids not (yet) in the conversation */
+  private selection: Selection | null = null;
+  /** Selected message ids that exist in the conversation, in order */
+  private selectedIds: string[] = [];
+  private readonly indexById = new Map<string, number>();
+  /** prefix[i] = total height of selectedIds[0..i) */
+  private prefix: number[] = [0];
+  /** Auto-pagination pages from the last run */
+  private autoPages: PageRange[] = [];
+  /** First selected index changed since auto-pagination last ran */
+  private autoDirtyFrom = 0;
+  private cachedResult: PaginationResult | null = null;
+
+  constructor(
+    messages: Message[] = [],
+    selection: Selection | null = null,
+    config: Partial<PaginationConfig> = {},
+  ) {
+    this.config = resolvePaginationConfig(config);
+    this.setMessages(messages);
+    if (selection) {
+      this.setSelection(selection);
+    }
+  }
+
+  /**
+   * Replace the conversation messages.
+   * Unchanged messages keep their parsed metrics.
+   */
+  setMessages(messages: Message[]): void {
+    const seen = new Set<string>();
+    let changedFrom = this.selectedIds.length;
+
+    for (const message of messages) {
+      seen.add(message.id);
+      const entry = this.entries.get(message.id);
+      if (entry && entry.message === message) {
+        continue;
+      }
+      if (
+        entry &&
+        entry.message.contentMarkdown === message.contentMarkdown &&
+        entry.message.contentMeta?.approxHeightPx ===
+          message.contentMeta?.approxHeightPx
+      ) {
+        entry.message = message;
+        continue;
+      }
+
+      this.entries.set(message.id, this.createEntry(message));
+      changedFrom = Math.min(
+        changedFrom,
+        this.indexById.get(message.id) ?? changedFrom,
+      );
+    }
+
+    for (const id of this.entries.keys()) {
+      if (!seen.has(id)) {
+        this.entries.delete(id);
+      }
+    }
+
+    if (changedFrom < this.selectedIds.length) {
+      this.rebuildPrefix(changedFrom);
+    }
+
+    if (this.selection) {
+      this.applySelectedIds(this.selection.selectedMessageIds);
+    }
+  }
+
+  /**
+   * Update the selection (selected ids and page breaks)
+   */
+  setSelection(selection: Selection): void {
+    if (this.selection?.pageBreaks !== selection.pageBreaks) {
+      this.cachedResult = null;
+    }
+    this.selection = selection;
+    this.applySelectedIds(selection.selectedMessageIds);
+  }
+
+  /**
+   * Update the pagination config.
+   * Height-affecting changes recompute heights from cached metrics only.
+   */
+  setConfig(config: Partial<PaginationConfig>): void {
+    const previous = this.config;
+    this.config = resolvePaginationConfig(config);
+
+    const heightsChanged =
+      previous.heightSource !== this.config.heightSource ||
+      !isSameHeightConfig(previous.heightConfig, this.config.heightConfig);
+
+    if (heightsChanged) {
+      for (const entry of this.entries.values()) {
+        this.refreshHeight(entry);
+      }
+      this.rebuildPrefix(0);
+    } else if (
+      previous.maxPageHeightPx !== this.config.maxPageHeightPx ||
+      previous.autoEnabled !== this.config.autoEnabled
+    ) {
+      this.autoDirtyFrom = 0;
+      this.cachedResult = null;
+    }
+  }
+
+  /**
+   * Re-read heights from the height source (e.g. after new measurements).
+   * Pass ids to limit the refresh to specific messages.
+   */
+  invalidateHeights(messageIds?: Iterable<string>): void {
+    const ids = messageIds ?? this.entries.keys();
+    let from = this.selectedIds.length;
+
+    for (const id of ids) {
+      const entry = this.entries.get(id);
+      if (!entry) continue;
+      const previous = entry.height;
+      this.refreshHeight(entry);
+      const index = this.indexById.get(id);
+      if (index !== undefined && entry.height !== previous) {
+        from = Math.min(from, index);
+      }
+    }
+
+    if (from < this.selectedIds.length) {
+      this.rebuildPrefix(from);
+    }
+  }
+
+  /**
+   * Height of a single message
+   */
+  getMessageHeight(messageId: string): number | undefined {
+    return this.entries.get(messageId)?.height;
+  }
+
+  /**
+   * Total height of the selected messages
+   */
+  getTotalHeight(): number {
+    return this.prefix[this.selectedIds.length] ?? 0;
+  }
+
+  /**
+   * Whether the selected messages exceed a single page
+   */
+  needsPagination(): boolean {
+    return this.getTotalHeight() > this.config.maxPageHeightPx;
+  }
+
+  /**
+   * Paginate the selected messages (same rules as `paginate()`)
+   */
+  paginate(): PaginationResult {
+    if (this.cachedResult) {
+      return this.cachedResult;
+    }
+
+    let pages: string[][];
+
+    if (this.selectedIds.length === 0) {
+      pages = [];
+    } else if (this.selection && this.selection.pageBreaks.length > 0) {
+      pages = this.applyManualBreaks(this.selection.pageBreaks);
+    } else if (this.config.autoEnabled) {
+      pages = this.autoPaginate().map((page) => page.ids);
+    } else {
+      pages = [this.selectedIds.slice()];
+    }
+
+    this.cachedResult = { pages, totalPages: pages.length };
+    return this.cachedResult;
+  }
+
+  /**
+   * Suggest page breaks from auto-pagination of the selected messages
+   */
+  suggestPageBreaks(): PageBreak[] {
+    if (this.selectedIds.length === 0) {
+      return [];
+    }
+    const pages = this.autoPaginate().map((page) => page.ids);
+    return pagesToPageBreaks(pages);
+  }
+
+  /**
+   * Height of each page in a pagination result
+   */
+  getPageHeights(result: PaginationResult = this.paginate()): number[] {
+    // Summed per page like getPageHeights(): prefix sum differences can
+    // disagree in the last bits when heights are fractional
+    return result.pages.map((page) =>
+      page.reduce((total, id) => total + this.getHeightOf(id), 0),
+    );
+  }
+
+  private createEntry(message: Message): MessageEntry {
+    const entry: MessageEntry = { message, metrics: null, height: 0 };
+    this.refreshHeight(entry);
+    return entry;
+  }
+
+  private refreshHeight(entry: MessageEntry): void {
+    const { message } = entry;
+
+    if (this.config.heightSource) {
+      entry.height = this.config.heightSource.getHeight(message);
+      return;
+    }
+
+    // Same precedence as estimateMessageHeight
+    if (message.contentMeta?.approxHeightPx) {
+      entry.height = message.contentMeta.approxHeightPx;
+      return;
+    }
+
+    entry.metrics ??= analyzeMarkdown(message.contentMarkdown);
+    entry.height = estimateHeightFromMetrics(
+      entry.metrics,
+      this.config.heightConfig,
+    );
+  }
+
+  /**
+   * Diff the new selected ids against the current ones and rebuild from the
+   * first position that differs
+   */
+  private applySelectedIds(rawIds: string[]): void {
+    const next = rawIds.filter((id) => this.entries.has(id));
+    const current = this.selectedIds;
+
+    let from = 0;
+    const shared = Math.min(next.length, current.length);
+    while (from < shared && next[from] === current[from]) {
+      from++;
+    }
+
+    if (from === next.length && from === current.length) {
+      return;
+    }
+
+    for (let i = from; i < current.length; i++) {
+      this.indexById.delete(current[i]!);
+    }
+    for (let i = from; i < next.length; i++) {
+      this.indexById.set(next[i]!, i);
+    }
+
+    this.selectedIds = next;
+    this.rebuildPrefix(from);
+  }
+
+  private getHeightOf(messageId: string): number {
+    return this.entries.get(messageId)?.height ?? 0;
+  }
+
+  private rebuildPrefix(from: number): void {
+    const ids = this.selectedIds;
+    this.prefix.length = ids.length + 1;
+    for (let i = from; i < ids.length; i++) {
+      this.prefix[i + 1] = this.prefix[i]! + this.getHeightOf(ids[i]!);
+    }
+    this.autoDirtyFrom = Math.min(this.autoDirtyFrom, from);
+    this.cachedResult = null;
+  }
+
+  private applyManualBreaks(pageBreaks: PageBreak[]): string[][] {
+    const breakIndices = pageBreaks
+      .map((pb) => this.indexById.get(pb.afterMessageId))
+      .filter((index): index is number => index !== undefined)
+      .sort((a, b) => a - b);
+
+    const pages: string[][] = [];
+    let start = 0;
+    for (const index of breakIndices) {
+      if (index + 1 > start) {
+        pages.push(this.selectedIds.slice(start, index + 1));
+        start = index + 1;
+      }
+    }
+    if (start < this.selectedIds.length) {
+      pages.push(this.selectedIds.slice(start));
+    }
+    return pages;
+  }
+
+  /**
+   * Greedy auto-pagination of the selected messages.
+   * Pages that end before the first dirty index are reused unchanged.
+   */
+  private autoPaginate(): PageRange[] {
+    const count = this.selectedIds.length;
+    const max = this.config.maxPageHeightPx;
+
+    // A page [start, end) depends on messages start..end (end decided the cut)
+    const kept: PageRange[] = [];
+    for (const page of this.autoPages) {
+      if (page.end >= this.autoDirtyFrom || page.end > count) break;
+      kept.push(page);
+    }
+
+    let start = kept.length > 0 ? kept[kept.length - 1]!.end : 0;
+    while (start < count) {
+      const end = this.findPageEnd(start, count, max);
+      kept.push({ start, end, ids: this.selectedIds.slice(start, end) });
+      start = end;
+    }
+
+    this.autoPages = kept;
+    this.autoDirtyFrom = Number.POSITIVE_INFINITY;
+    return kept;
+  }
+
+  /**
+   * Largest end in (start, count] with height(start..end) <= max;
+   * at least start + 1 so oversized messages get a page of their own.
+   *
+   * Heights are added one by one like `paginate()` does rather than
+   * compared as prefix sum differences, so fractional heights split pages
+   * at the same messages.
+   */
+  private findPageEnd(start: number, count: number, max: number): number {
+    let height = this.getHeightOf(this.selectedIds[start]!);
+    let end = start + 1;
+    while (end < count) {
+      height += this.getHeightOf(this.selectedIds[end]!);
+      if (height > max) break;
+      end++;
+    }
+    return end;
+  }
+}
+
+/**
+ * Create a stateful paginator
+ */
+export function createPaginator(
+  messages: Message[] = [],
+  selection: Selection | null = null,
+  config: Partial<PaginationConfig> = {},
+): IncrementalPaginator {
+  return new IncrementalPaginator(messages, selection, config);
+}
@@ -8,13 +8,32 @@
 // Height estimation
 export {
   estimateMessageHeight,
+  estimateHeightFromMetrics,
   estimateMessagesHeight,
   estimateMessagesHeightWithBreakdown,
   analyzeContentMeta,
+  analyzeMarkdown,
   type HeightEstimationConfig,
+  type MessageMetrics,
   DEFAULT_HEIGHT_CONFIG,
+  MARKDOWN_IMAGE_REGEX,
 } from "./height-estimation";
 
+// Height sources
+export {
+  MessageHeightCache,
+  createEstimatedHeightSource,
+  createMeasuredHeightSource,
+  evaluateHeightAccuracy,
+  hashContent,
+  type HeightSource,
+  type HeightContext,
+  type HeightCacheConfig,
+  type HeightAccuracyReport,
+  type MeasuredHeightSource,
+  DEFAULT_HEIGHT_CACHE_CONFIG,
+} from "./height-source";
+
 // Paginator
 export {
   paginate,
@@ -22,6 +41,11 @@ export {
   getEstimatedTotalHeight,
   suggestPageBreaks,
   getPageHeights,
+  pagesToPageBreaks,
+  resolvePaginationConfig,
   type PaginationConfig,
   DEFAULT_PAGINATION_CONFIG,
 } from "./paginator";
+
+// Stateful paginator
+export { IncrementalPaginator, createPaginator } from "./incremental-paginator";
@@ -9,6 +9,7 @@ import {
   type HeightEstimationConfig,
   DEFAULT_HEIGHT_CONFIG,
 } from "./height-estimation";
+import type { HeightSource } from "./height-source";
 
 /**
  * Configuration for pagination
@@ -20,6 +21,11 @@ export interface PaginationConfig {
   heightConfig: HeightEstimationConfig;
   /** Whether to use auto pagination when no manual breaks exist */
   autoEnabled: boolean;
+  /**
+   * Source of per-message heights (e.g. measured DOM heights).
+   * Defaults to the heuristic estimator using `heightConfig`.
+   */
+  heightSource?: HeightSource;
 }
 
 /**
@@ -31,6 +37,22 @@ export const DEFAULT_PAGINATION_CONFIG: PaginationConfig = {
   autoEnabled: true,
 };
 
+/**
+ * Merge a partial pagination config with defaults
+ */
+export function resolvePaginationConfig(
+  config: Partial<PaginationConfig> = {},
+): PaginationConfig {
+  return {
+    ...DEFAULT_PAGINATION_CONFIG,
+    ...config,
+    heightConfig: {
+      ...DEFAULT_HEIGHT_CONFIG,
+      ...config.heightConfig,
+    },
+  };
+}
+
 /**
  * Internal page representation during pagination
  */
@@ -39,6 +61,15 @@ interface PageBuilder {
   currentHeight: number;
 }
 
+/**
+ * Get the height of a message from the configured source
+ */
+function getMessageHeight(message: Message, config: PaginationConfig): number {
+  return config.heightSource
+    ? config.heightSource.getHeight(message)
+    : estimateMessageHeight(message, config.heightConfig);
+}
+
 /**
  * Get messages in selection order
  */
@@ -119,7 +150,7 @@ function autoPaginate(
   };
 
   for (const msg of messages) {
-    const msgHeight = estimateMessageHeight(msg, config.heightConfig);
+    const msgHeight = getMessageHeight(msg, config);
 
     // Check if adding this message would exceed max height
     if (
@@ -167,18 +198,11 @@ export function needsPagination(
   messages: Message[],
   config: Partial<PaginationConfig> = {},
 ): boolean {
-  const fullConfig: PaginationConfig = {
-    ...DEFAULT_PAGINATION_CONFIG,
-    ...config,
-    heightConfig: {
-      ...DEFAULT_HEIGHT_CONFIG,
-      ...config.heightConfig,
-    },
-  };
+  const fullConfig = resolvePaginationConfig(config);
 
   let totalHeight = 0;
   for (const msg of messages) {
-    totalHeight += estimateMessageHeight(msg, fullConfig.heightConfig);
+    totalHeight += getMessageHeight(msg, fullConfig);
     if (totalHeight > fullConfig.maxPageHeightPx) {
       return true;
     }
@@ -193,17 +217,10 @@ export function getEstimatedTotalHeight(
   messages: Message[],
   config: Partial<PaginationConfig> = {},
 ): number {
-  const fullConfig: PaginationConfig = {
-    ...DEFAULT_PAGINATION_CONFIG,
-    ...config,
-    heightConfig: {
-      ...DEFAULT_HEIGHT_CONFIG,
-      ...config.heightConfig,
-    },
-  };
+  const fullConfig = resolvePaginationConfig(config);
 
   return messages.reduce(
-    (total, msg) => total + estimateMessageHeight(msg, fullConfig.heightConfig),
+    (total, msg) => total + getMessageHeight(msg, fullConfig),
     0,
   );
 }
@@ -221,14 +238,7 @@ export function paginate(
   selection: Selection,
   config: Partial<PaginationConfig> = {},
 ): PaginationResult {
-  const fullConfig: PaginationConfig = {
-    ...DEFAULT_PAGINATION_CONFIG,
-    ...config,
-    heightConfig: {
-      ...DEFAULT_HEIGHT_CONFIG,
-      ...config.heightConfig,
-    },
-  };
+  const fullConfig = resolvePaginationConfig(config);
 
   // Get selected messages in order
   const selectedMessages = getSelectedMessages(
@@ -277,23 +287,20 @@ export function suggestPageBreaks(
   messages: Message[],
   config: Partial<PaginationConfig> = {},
 ): PageBreak[] {
-  const fullConfig: PaginationConfig = {
-    ...DEFAULT_PAGINATION_CONFIG,
-    ...config,
-    heightConfig: {
-      ...DEFAULT_HEIGHT_CONFIG,
-      ...config.heightConfig,
-    },
-  };
+  const fullConfig = resolvePaginationConfig(config);
 
   if (messages.length === 0) {
     return [];
   }
 
   // Use auto-pagination to find natural break points
-  const pages = autoPaginate(messages, fullConfig);
+  return pagesToPageBreaks(autoPaginate(messages, fullConfig));
+}
 
-  // Convert page boundaries to PageBreaks
+/**
+ * Convert page boundaries to PageBreaks
+ */
+export function pagesToPageBreaks(pages: string[][]): PageBreak[] {
   const pageBreaks: PageBreak[] = [];
 
   for (let i = 0; i < pages.length - 1; i++) {
@@ -322,14 +329,7 @@ export function getPageHeights(
   paginationResult: PaginationResult,
   config: Partial<PaginationConfig> = {},
 ): number[] {
-  const fullConfig: PaginationConfig = {
-    ...DEFAULT_PAGINATION_CONFIG,
-    ...config,
-    heightConfig: {
-      ...DEFAULT_HEIGHT_CONFIG,
-      ...config.heightConfig,
-    },
-  };
+  const fullConfig = resolvePaginationConfig(config);
 
   const messageMap = new Map(allMessages.map((m) => [m.id, m]));
   const heights: number[] = [];
@@ -339,7 +339,7 @@ export function getPageHeights(
     for (const id of page) {
       const msg = messageMap.get(id);
       if (msg) {
-        pageHeight += estimateMessageHeight(msg, fullConfig.heightConfig);
+        pageHeight += getMessageHeight(msg, fullConfig);
       }
     }
     heights.push(pageHeight);
@@ -7,6 +7,7 @@ import type { ExportScope } from "@ui/contexts/editor-data-context";
 import { useI18n } from "@ui/i18n";
 import { SHADOW_STYLES } from "@ui/themes/shadows";
 import { cn } from "@ui/utils/common";
+import { createPreviewHeightSource } from "@ui/utils/message-heights";
 import { motion, AnimatePresence } from "framer-motion";
 import {
   MessageSquare,
@@ -27,13 +28,25 @@ import {
   ZoomOut,
   FileImage,
 } from "lucide-react";
-import { useRef, useMemo, useEffect, useState, useCallback } from "react";
+import {
+  Profiler,
+  useRef,
+  useMemo,
+  useEffect,
+  useState,
+  useCallback,
+  type ProfilerOnRenderCallback,
+} from "react";
 import * as React from "react";
 import { MarkdownRenderer } from "../renderer";
 import { Button } from "../ui/button";
 import { Card, CardContent } from "../ui/card";
 import { Slider } from "../ui/slider";
 import { MacOSBar } from "./mac-os-bar";
+import {
+  MessageVisibilityObserver,
+  WindowedMessage,
+} from "./windowed-message";
 
 /** Device icons */
 const DEVICE_ICONS: Record<
@@ -50,6 +63,13 @@ const PREVIEW_FIT_EPSILON_PX = 2;
 const PREVIEW_ZOOM_MIN = 0.3;
 const PREVIEW_ZOOM_MAX = 3;
 
+/** Pages this long only render the messages near the viewport */
+const WINDOWING_MIN_MESSAGES = 40;
+/** Messages rendered before the first visibility report */
+const WINDOWING_INITIAL_MESSAGES = 12;
+/** Entrance animations stop staggering after this many messages */
+const MAX_STAGGERED_MESSAGES = 10;
+
 type PreviewZoomMode = "fit-height" | "fit-width" | "custom";
 
 function clampZoom(value: number) {
@@ -67,6 +87,23 @@ export interface EditorPreviewProps {
   exportDisabled?: boolean;
   /** Optional header addon rendered left of the device selector */
   headerLeftAddon?: React.ReactNode;
+  /**
+   * Called after each commit with the render cost of every message that
+   * rendered. React reports timings in development and profiling builds.
+   */
+  onMessageRender?: (profile: MessageRenderProfile) => void;
+}
+
+/**
+ * Render cost of one preview message in one commit
+ */
+export interface MessageRenderProfile {
+  messageId: string;
+  phase: "mount" | "update" | "nested-update";
+  /** Time spent rendering the message and its descendants */
+  durationMs: number;
+  /** Estimated time to re-render the message without memoization */
+  baseDurationMs: number;
 }
 
 /**
@@ -81,6 +118,7 @@ export function EditorPreview({
   onExport,
   exportDisabled = false,
   headerLeftAddon,
+  onMessageRender,
 }: EditorPreviewProps) {
   const { t } = useI18n();
   const internalCanvasRef = useRef<HTMLDivElement>(null);
@@ -165,6 +203,43 @@ export function EditorPreview({
   const totalPages = pages.length;
   const currentPageMessages = pages[currentPage] ?? [];
 
+  // Long pages render only messages near the viewport, except while
+  // exporting, when every message is materialized for capture
+  const [visibilityObserver, setVisibilityObserver] =
+    useState<MessageVisibilityObserver | null>(null);
+  const isWindowed =
+    !runtime.isExporting &&
+    currentPageMessages.length >= WINDOWING_MIN_MESSAGES &&
+    typeof IntersectionObserver !== "undefined";
+  // Measured heights are kept per theme and width, shared with pagination
+  const heightSource = useMemo(
+    () => createPreviewHeightSource(selectedTheme.id, desktopWidth),
+    [selectedTheme.id, desktopWidth],
+  );
+
+  useEffect(() => {
+    const viewport = previewViewportRef.current;
+    if (!viewport || typeof IntersectionObserver === "undefined") return;
+
+    const observer = new MessageVisibilityObserver(viewport);
+    setVisibilityObserver(observer);
+    return () => observer.disconnect();
+  }, []);
+
+  const onMessageRenderRef = useRef(onMessageRender);
+  onMessageRenderRef.current = onMessageRender;
+  const handleMessageRender = useCallback<ProfilerOnRenderCallback>(
+    (id, phase, actualDuration, baseDuration) => {
+      onMessageRenderRef.current?.({
+        messageId: id,
+        phase,
+        durationMs: actualDuration,
+        baseDurationMs: baseDuration,
+      });
+    },
+    [],
+  );
+
   useEffect(() => {
     const canvas = canvasRef.current;
     if (!canvas) return;
@@ -222,6 +297,9 @@ export function EditorPreview({
   const bubbleRadius = selectedTheme.tokens.bubbleRadius;
   const messagePadding = selectedTheme.tokens.messagePadding;
   const messageGap = selectedTheme.tokens.messageGap;
+  const fontFamily = selectedTheme.tokens.fontFamily;
+  const lineHeight = selectedTheme.tokens.lineHeight;
+  const baseFontSize = selectedTheme.tokens.baseFontSize;
 
   // Shadow
   const shadowStyle =
@@ -548,7 +626,7 @@ export function EditorPreview({
                         style={{
                           backgroundColor: contentBg,
                           color: contentFg,
-                          fontFamily: selectedTheme.tokens.fontFamily,
+                          fontFamily,
                           display: "flex",
                           flexDirection: "column",
                           gap: messageGap,
@@ -579,121 +657,139 @@ export function EditorPreview({
                           >
                             {currentPageMessages.map((message, index) => {
                               const isUser = message.role === "user";
+                              const content =
+                                message.contentMarkdown?.trim() || "";
 
                               return (
-                                <motion.div
+                                <WindowedMessage
                                   key={message.id}
-                                  initial={
-                                    shouldAnimatePreview
-                                      ? { opacity: 0, y: 10 }
-                                      : false
-                                  }
-                                  animate={{ opacity: 1, y: 0 }}
-                                  transition={
-                                    shouldAnimatePreview
-                                      ? { delay: index * 0.03 }
-                                      : { duration: 0 }
+                                  message={message}
+                                  windowed={isWindowed}
+                                  observer={visibilityObserver}
+                                  initiallyVisible={
+                                    index < WINDOWING_INITIAL_MESSAGES
                                   }
-                                  className={cn(
-                                    "c2p-message flex",
-                                    isUser
-                                      ? "c2p-message-user justify-end"
-                                      : "c2p-message-assistant justify-start",
-                                  )}
+                                  heightSource={heightSource}
                                 >
-                                  {/* Message Bubble */}
-                                  <div
-                                    className={cn(
-                                      "c2p-message-wrapper min-w-0",
-                                      isUser ? "text-right" : "text-left",
-                                    )}
+                                  <Profiler
+                                    id={message.id}
+                                    onRender={handleMessageRender}
                                   >
-                                    {/* Role Label with Avatar */}
-                                    <div
+                                    <motion.div
+                                      initial={
+                                        shouldAnimatePreview
+                                          ? { opacity: 0, y: 10 }
+                                          : false
+                                      }
+                                      animate={{ opacity: 1, y: 0 }}
+                                      transition={
+                                        shouldAnimatePreview
+                                          ? {
+                                              delay:
+                                                Math.min(
+                                                  index,
+                                                  MAX_STAGGERED_MESSAGES,
+                                                ) * 0.03,
+                                            }
+                                          : { duration: 0 }
+                                      }
                                       className={cn(
-                                        "c2p-message-role mb-1.5 flex items-center gap-1.5 text-xs font-medium mb-2",
+                                        "c2p-message flex",
                                         isUser
-                                          ? "flex-row-reverse justify-start"
-                                          : "flex-row justify-start",
+                                          ? "c2p-message-user justify-end"
+                                          : "c2p-message-assistant justify-start",
                                       )}
-                                      style={{ color: mutedFg }}
-                                    >
-                                      {/* Avatar - inline with role label */}
-                                      <div
-                                        className="c2p-message-avatar flex h-5 w-5 shrink-0 items-center justify-center rounded-full"
-                                        style={{
-                                          backgroundColor: bubbleBg,
-                                          color: mutedFg,
-                                        }}
-                                      >
-                                        {isUser ? (
-                                          <User className="h-3 w-3" />
-                                        ) : (
-                                          <Sparkles className="h-3 w-3" />
-                                        )}
-                                      </div>
-                                      <span>
-                                        {isUser
-                                          ? t("role.user")
-                                          : message.role === "assistant"
-                                            ? t("role.assistant")
-                                            : t("role.system")}
-                                      </span>
-                                    </div>
-
-                                    {/* Bubble - same style for both */}
-                                    <div
-                                      className="c2p-message-bubble inline-block max-w-full overflow-hidden align-top"
-                                      style={
-                                        {
-                                          backgroundColor: bubbleBg,
-                                          color: bubbleFg,
-                                          maxWidth: "100%",
-                                          borderRadius: bubbleRadius,
-                                          padding: messagePadding,
-                                          // Chat bubble tail effect via border-radius
-                                          borderTopLeftRadius: isUser
-                                            ? bubbleRadius
-                                            : bubbleRadius / 3,
-                                          borderTopRightRadius: isUser
-                                            ? bubbleRadius / 3
-                                            : bubbleRadius,
-                                          // CSS variables for code blocks
-                                          "--c2p-code-bg": codeBlockBg,
-                                          "--c2p-code-fg": codeBlockFg,
-                                          "--c2p-border": borderColor,
-                                          "--c2p-muted-fg": mutedFg,
-                                        } as React.CSSProperties
-                                      }
                                     >
+                                      {/* Message Bubble */}
                                       <div
                                         className={cn(
-                                          "c2p-message-body",
-                                          isWindowDark && "c2p-markdown-dark",
+                                          "c2p-message-wrapper min-w-0",
+                                          isUser ? "text-right" : "text-left",
                                         )}
-                                        style={{
-                                          fontFamily:
-                                            selectedTheme.tokens.fontFamily,
-                                          lineHeight:
-                                            selectedTheme.tokens.lineHeight,
-                                          fontSize:
-                                            selectedTheme.tokens.baseFontSize,
-                                          textAlign: "left",
-                                          color: bubbleFg,
-                                          maxWidth: "100%",
-                                          overflowWrap: "break-word",
-                                        }}
                                       >
-                                        <MarkdownRenderer
-                                          content={
-                                            message.contentMarkdown?.trim() ||
-                                            ""
+                                        {/* Role Label with Avatar */}
+                                        <div
+                                          className={cn(
+                                            "c2p-message-role mb-1.5 flex items-center gap-1.5 text-xs font-medium mb-2",
+                                            isUser
+                                              ? "flex-row-reverse justify-start"
+                                              : "flex-row justify-start",
+                                          )}
+                                          style={{ color: mutedFg }}
+                                        >
+                                          {/* Avatar - inline with role label */}
+                                          <div
+                                            className="c2p-message-avatar flex h-5 w-5 shrink-0 items-center justify-center rounded-full"
+                                            style={{
+                                              backgroundColor: bubbleBg,
+                                              color: mutedFg,
+                                            }}
+                                          >
+                                            {isUser ? (
+                                              <User className="h-3 w-3" />
+                                            ) : (
+                                              <Sparkles className="h-3 w-3" />
+                                            )}
+                                          </div>
+                                          <span>
+                                            {isUser
+                                              ? t("role.user")
+                                              : message.role === "assistant"
+                                                ? t("role.assistant")
+                                                : t("role.system")}
+                                          </span>
+                                        </div>
+
+                                        {/* Bubble - same style for both */}
+                                        <div
+                                          className="c2p-message-bubble inline-block max-w-full overflow-hidden align-top"
+                                          style={
+                                            {
+                                              backgroundColor: bubbleBg,
+                                              color: bubbleFg,
+                                              maxWidth: "100%",
+                                              borderRadius: bubbleRadius,
+                                              padding: messagePadding,
+                                              // Chat bubble tail effect via border-radius
+                                              borderTopLeftRadius: isUser
+                                                ? bubbleRadius
+                                                : bubbleRadius / 3,
+                                              borderTopRightRadius: isUser
+                                                ? bubbleRadius / 3
+                                                : bubbleRadius,
+                                              // CSS variables for code blocks
+                                              "--c2p-code-bg": codeBlockBg,
+                                              "--c2p-code-fg": codeBlockFg,
+                                              "--c2p-border": borderColor,
+                                              "--c2p-muted-fg": mutedFg,
+                                            } as React.CSSProperties
                                           }
-                                        />
+                                        >
+                                          <div
+                                            className={cn(
+                                              "c2p-message-body",
+                                              isWindowDark &&
+                                                "c2p-markdown-dark",
+                                            )}
+                                            style={{
+                                              fontFamily,
+                                              lineHeight,
+                                              fontSize: baseFontSize,
+                                              textAlign: "left",
+                                              color: bubbleFg,
+                                              maxWidth: "100%",
+                                              overflowWrap: "break-word",
+                                            }}
+                                          >
+                                            <MarkdownRenderer
+                                              content={content}
+                                            />
+                                          </div>
+                                        </div>
                                       </div>
-                                    </div>
-                                  </div>
-                                </motion.div>
+                                    </motion.div>
+                                  </Profiler>
+                                </WindowedMessage>
                               );
                             })}
                           </motion.div>
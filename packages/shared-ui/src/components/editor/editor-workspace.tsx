@@ -17,7 +17,7 @@ import {
   DrawerTitle,
   DrawerTrigger,
 } from "../ui/drawer";
-import { EditorPreview } from "./editor-preview";
+import { EditorPreview, type MessageRenderProfile } from "./editor-preview";
 import { EditorTabs } from "./editor-tabs";
 
 export interface EditorWorkspaceProps {
@@ -28,6 +28,8 @@ export interface EditorWorkspaceProps {
   settingsTitle?: string;
   showMobileDrawer?: boolean;
   mountedTo?: Element | DocumentFragment | null | undefined;
+  /** Per-message render cost reporting, see EditorPreview */
+  onMessageRender?: (profile: MessageRenderProfile) => void;
 }
 
 export function EditorWorkspace({
@@ -38,6 +40,7 @@ export function EditorWorkspace({
   settingsTitle,
   showMobileDrawer = true,
   mountedTo,
+  onMessageRender,
 }: EditorWorkspaceProps) {
   const { t } = useI18n();
   const isMobile = useIsMobile();
@@ -78,6 +81,7 @@ export function EditorWorkspace({
                 onExport={onExport}
                 exportDisabled={selectedCount === 0}
                 className="h-full"
+                onMessageRender={onMessageRender}
                 headerLeftAddon={
                   <DrawerTrigger asChild>
                     <Button
@@ -107,6 +111,7 @@ export function EditorWorkspace({
               onExport={onExport}
               exportDisabled={selectedCount === 0}
               className="h-full"
+              onMessageRender={onMessageRender}
             />
           )}
         </motion.div>
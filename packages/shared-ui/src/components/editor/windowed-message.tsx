@@ -0,0 +1,107 @@
+"use client";
+
+import type { MeasuredHeightSource } from "@chat2poster/core-pagination";
+import type { Message } from "@chat2poster/core-schema";
+import { useEffect, useRef, useState } from "react";
+import * as React from "react";
+
+/**
+ * Reports which preview messages are near the viewport, using one shared
+ * IntersectionObserver for all of them
+ */
+export class MessageVisibilityObserver {
+  private observer: IntersectionObserver;
+  private listeners = new Map<Element, (visible: boolean) => void>();
+
+  /**
+   * @param root - The scrolling preview viewport
+   * @param overscan - Extra area above and below the viewport to keep
+   *   rendered, as a CSS margin (percentages are of the viewport height)
+   */
+  constructor(root: Element, overscan = "100%") {
+    this.observer = new IntersectionObserver(
+      (entries) => {
+        for (const entry of entries) {
+          this.listeners.get(entry.target)?.(entry.isIntersecting);
+        }
+      },
+      { root, rootMargin: `${overscan} 0px` },
+    );
+  }
+
+  observe(element: Element, listener: (visible: boolean) => void): () => void {
+    this.listeners.set(element, listener);
+    this.observer.observe(element);
+    return () => {
+      this.listeners.delete(element);
+      this.observer.unobserve(element);
+    };
+  }
+
+  disconnect(): void {
+    this.observer.disconnect();
+    this.listeners.clear();
+  }
+}
+
+export interface WindowedMessageProps {
+  message: Message;
+  /**
+   * Whether to render only while near the viewport. When false the message
+   * is always rendered (short pages, export capture).
+   */
+  windowed: boolean;
+  /** Observer for the preview viewport, once it exists */
+  observer: MessageVisibilityObserver | null;
+  /** Render the message before the observer first reports on it */
+  initiallyVisible: boolean;
+  /**
+   * Measured heights for the current theme and width, falling back to
+   * estimates for messages that have not been rendered yet
+   */
+  heightSource: MeasuredHeightSource;
+  children: React.ReactNode;
+}
+
+/**
+ * Renders a preview message only while it is near the viewport, keeping a
+ * placeholder of its measured (or estimated) height otherwise
+ */
+export function WindowedMessage({
+  message,
+  windowed,
+  observer,
+  initiallyVisible,
+  heightSource,
+  children,
+}: WindowedMessageProps) {
+  const slotRef = useRef<HTMLDivElement>(null);
+  const [visible, setVisible] = useState(initiallyVisible);
+
+  useEffect(() => {
+    const slot = slotRef.current;
+    if (!windowed || !observer || !slot) return;
+
+    return observer.observe(slot, (nextVisible) => {
+      if (!nextVisible && slot.offsetHeight > 0) {
+        // Measure before the content is swapped for a placeholder
+        heightSource.record(message, slot.offsetHeight);
+      }
+      setVisible(nextVisible);
+    });
+  }, [windowed, observer, heightSource, message]);
+
+  const materialized = !windowed || visible;
+
+  return (
+    <div
+      ref={slotRef}
+      className="c2p-message-slot"
+      style={
+        materialized ? undefined : { height: heightSource.getHeight(message) }
+      }
+    >
+      {materialized ? children : null}
+    </div>
+  );
+}
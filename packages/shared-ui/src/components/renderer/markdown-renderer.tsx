@@ -1,10 +1,11 @@
 "use client";
 
-import { highlightCode } from "@ui/utils/shiki";
+import { getMarkdownAst } from "@ui/utils/markdown-ast";
+import { getCachedHighlight, highlightCode } from "@ui/utils/shiki";
+import { toJsxRuntime } from "hast-util-to-jsx-runtime";
 import { memo, useMemo, useEffect, useState } from "react";
-import ReactMarkdown, { type Components } from "react-markdown";
-import rehypeRaw from "rehype-raw";
-import remarkGfm from "remark-gfm";
+import { Fragment, jsx, jsxs } from "react/jsx-runtime";
+import type { Components } from "react-markdown";
 import type { BundledTheme } from "shiki";
 import { MermaidBlock } from "./mermaid-block";
 
@@ -26,6 +27,9 @@ export interface MarkdownRendererProps {
 /**
  * Standalone Markdown Renderer component with Shiki syntax highlighting
  * and Mermaid diagram support. Uses plain CSS (no Tailwind).
+ *
+ * Parsed trees are cached per content, so remounts (page switches,
+ * windowed scrolling, export) and code theme changes do not re-parse.
  */
 export const MarkdownRenderer = memo(function MarkdownRenderer({
   content,
@@ -146,15 +150,24 @@ export const MarkdownRenderer = memo(function MarkdownRenderer({
     [codeTheme, defaultLanguage],
   );
 
+  const tree = useMemo(() => getMarkdownAst(content), [content]);
+  const rendered = useMemo(
+    () =>
+      toJsxRuntime(tree, {
+        Fragment,
+        jsx,
+        jsxs,
+        components: markdownComponents,
+        ignoreInvalidStyle: true,
+        passKeys: true,
+        passNode: true,
+      }),
+    [tree, markdownComponents],
+  );
+
   return (
     <div className={`c2p-markdown-markdown ${className || ""}`}>
-      <ReactMarkdown
-        remarkPlugins={[remarkGfm]}
-        rehypePlugins={[rehypeRaw]}
-        components={markdownComponents}
-      >
-        {content}
-      </ReactMarkdown>
+      {rendered}
     </div>
   );
 });
@@ -174,9 +187,17 @@ const ShikiCodeBlock = memo(function ShikiCodeBlock({
   language,
   theme,
 }: ShikiCodeBlockProps) {
-  const [html, setHtml] = useState<string>("");
+  const [html, setHtml] = useState<string>(
+    () => getCachedHighlight(code, language, theme) ?? "",
+  );
 
   useEffect(() => {
+    const cached = getCachedHighlight(code, language, theme);
+    if (cached !== null) {
+      setHtml(cached);
+      return;
+    }
+
     let cancelled = false;
 
     highlightCode(code, language, theme).then((result) => {
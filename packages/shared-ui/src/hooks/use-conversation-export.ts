@@ -1,15 +1,23 @@
 "use client";
 
 import {
+  createExportJobManager,
+  createStreamingZipPackager,
   downloadImage,
-  downloadZip,
+  exportPages,
   exportToPng,
   generateZipFilename,
-  packageAsZip,
+  getSharedAssetManager,
+  triggerDownload,
+  type ExportJobManager,
+  type MultiPageExportResult,
 } from "@chat2poster/core-export";
+import { MARKDOWN_IMAGE_REGEX } from "@chat2poster/core-pagination";
+import type { Message } from "@chat2poster/core-schema";
 import { useEditor } from "@ui/contexts/editor-context";
 import type { ExportScope } from "@ui/contexts/editor-data-context";
-import { useCallback, type RefObject } from "react";
+import { waitForPendingHighlights } from "@ui/utils/shiki";
+import { useCallback, useRef, type RefObject } from "react";
 
 const TYPOGRAPHY_LOCK_SELECTORS = [
   ".c2p-window-content",
@@ -66,6 +74,33 @@ function lockTypographyStyles(container: HTMLElement): () => void {
   };
 }
 
+/** URL within a markdown image target such as `<url>` or `url "title"` */
+const IMAGE_TARGET_URL_PATTERN = /^\s*<?([^\s>]+)/;
+const HTML_IMAGE_PATTERN = /<img\b[^>]*?\ssrc\s*=\s*["']([^"']+)["']/gi;
+
+/**
+ * Collect image URLs referenced by messages, including those on pages
+ * that are not rendered yet
+ */
+function collectMessageImageUrls(messages: Message[]): string[] {
+  const urls = new Set<string>();
+  for (const message of messages) {
+    const content = message.contentMarkdown ?? "";
+    for (const match of content.matchAll(MARKDOWN_IMAGE_REGEX)) {
+      const url = IMAGE_TARGET_URL_PATTERN.exec(match[1] ?? "")?.[1];
+      if (url) urls.add(url);
+    }
+    for (const match of content.matchAll(HTML_IMAGE_PATTERN)) {
+      if (match[1]) urls.add(match[1]);
+    }
+  }
+  return Array.from(urls);
+}
+
+function toError(error: unknown): Error {
+  return error instanceof Error ? error : new Error(String(error));
+}
+
 export interface UseConversationExportOptions {
   canvasRef: RefObject<HTMLDivElement | null>;
   filenamePrefix?: string;
@@ -75,6 +110,11 @@ export interface UseConversationExportOptions {
 
 export interface UseConversationExportResult {
   exportConversation: (scope?: ExportScope) => Promise<void>;
+  /**
+   * Cancel the running multi-page export. Pages already captured are
+   * discarded and nothing is downloaded.
+   */
+  cancelExport: () => void;
 }
 
 export function useConversationExport({
@@ -84,6 +124,7 @@ export function useConversationExport({
   embedFonts = false,
 }: UseConversationExportOptions): UseConversationExportResult {
   const { editor, dispatch, runtimeDispatch } = useEditor();
+  const jobRef = useRef<ExportJobManager | null>(null);
 
   const waitForPreviewReady = useCallback(async () => {
     await new Promise<void>((resolve) =>
@@ -93,6 +134,8 @@ export function useConversationExport({
       requestAnimationFrame(() => resolve()),
     );
     await new Promise((resolve) => setTimeout(resolve, settleDelayMs));
+    // Messages materialized for export may still be highlighting
+    await waitForPendingHighlights();
   }, [settleDelayMs]);
 
   const exportConversation = useCallback(
@@ -111,16 +154,34 @@ export function useConversationExport({
       const conversationId = editor.conversation?.id ?? "export";
       const currentPage = editor.currentPage;
       const baseFilename = `${filenamePrefix}-${conversationId}`;
+      const selectedIds = new Set(editor.selection?.selectedMessageIds ?? []);
+      const imageUrls = collectMessageImageUrls(
+        (editor.conversation?.messages ?? []).filter((message) =>
+          selectedIds.has(message.id),
+        ),
+      );
+      // Fonts and images stay cached across pages and later exports
+      const assets = getSharedAssetManager();
 
       try {
         const shouldExportCurrentPage =
           scope === "current-page" || totalPages === 1;
 
         if (shouldExportCurrentPage) {
+          // Let the windowed preview render every message first
+          await Promise.all([
+            waitForPreviewReady(),
+            assets.preflight({ imageUrls, embedFonts }),
+          ]);
+          if (!canvasRef.current) {
+            throw new Error("Preview not ready");
+          }
+
           const restoreTypography = lockTypographyStyles(canvasRef.current);
           const result = await exportToPng(canvasRef.current, {
             scale,
             embedFonts,
+            assets,
           }).finally(() => restoreTypography());
           const filename =
             totalPages > 1
@@ -132,44 +193,82 @@ export function useConversationExport({
         }
 
         const originalPage = currentPage;
-        const pageResults: Awaited<ReturnType<typeof exportToPng>>[] = [];
+        const packager = createStreamingZipPackager({
+          totalPages,
+          baseFilename: "page",
+          includeMetadata: true,
+        });
+        const job = createExportJobManager(
+          editor.conversation?.id ?? crypto.randomUUID(),
+          { scale },
+        );
+        job.on("progress-update", ({ percentage }) => {
+          runtimeDispatch({ type: "SET_EXPORT_PROGRESS", payload: percentage });
+        });
+        job.start();
+        jobRef.current = job;
+        const callbacks = job.getExportCallbacks();
 
+        let exportResult: MultiPageExportResult;
         try {
-          for (let i = 0; i < totalPages; i += 1) {
-            dispatch({ type: "SET_CURRENT_PAGE", payload: i });
-            await waitForPreviewReady();
-
-            if (!canvasRef.current) {
-              throw new Error("Preview not ready");
-            }
+          // Encode each page while the next one renders and captures,
+          // and write it to the ZIP as soon as it is encoded
+          exportResult = await exportPages(
+            totalPages,
+            async (pageIndex) => {
+              dispatch({ type: "SET_CURRENT_PAGE", payload: pageIndex });
+              await waitForPreviewReady();
 
-            const restoreTypography = lockTypographyStyles(canvasRef.current);
-            const result = await exportToPng(canvasRef.current, {
+              if (!canvasRef.current) {
+                throw new Error("Preview not ready");
+              }
+              return canvasRef.current;
+            },
+            {
               scale,
               embedFonts,
-            }).finally(() => restoreTypography());
-            pageResults.push(result);
-            runtimeDispatch({
-              type: "SET_EXPORT_PROGRESS",
-              payload: Math.round(((i + 1) / totalPages) * 100),
-            });
-          }
+              assets,
+              preflight: { imageUrls },
+              pipeline: true,
+              retainPages: false,
+              prepareCapture: (element) => lockTypographyStyles(element),
+              ...callbacks,
+              // Awaited so slow ZIP writes hold back the next capture
+              onPageComplete: async (pageIndex, result) => {
+                await callbacks.onPageComplete?.(pageIndex, result);
+                // Failures are recorded by the packager, see finalize()
+                await packager
+                  .addPage(pageIndex, result)
+                  .catch(() => undefined);
+              },
+            },
+          );
+        } catch (error) {
+          await packager.abort();
+          job.fail(toError(error));
+          throw error;
         } finally {
           dispatch({ type: "SET_CURRENT_PAGE", payload: originalPage });
         }
 
-        const zipResult = await packageAsZip(
-          {
-            pages: pageResults,
-            totalPages: pageResults.length,
-            cancelled: false,
-            completedAt: new Date().toISOString(),
-          },
-          { baseFilename: "page", includeMetadata: true },
-        );
+        if (exportResult.cancelled || !job.isRunning()) {
+          await packager.abort();
+          return;
+        }
+
+        const zipResult = await packager.finalize().catch((error: unknown) => {
+          job.fail(toError(error));
+          throw error;
+        });
+        // Cancelled while the archive was being finished
+        if (!job.isRunning()) return;
 
-        downloadZip(zipResult, generateZipFilename(baseFilename));
+        job.complete(exportResult, zipResult);
+        if (zipResult.blob) {
+          triggerDownload(zipResult.blob, generateZipFilename(baseFilename));
+        }
       } finally {
+        jobRef.current = null;
         runtimeDispatch({ type: "SET_EXPORTING", payload: false });
       }
     },
@@ -184,5 +283,9 @@ export function useConversationExport({
     ],
   );
 
-  return { exportConversation };
+  const cancelExport = useCallback(() => {
+    jobRef.current?.cancel();
+  }, []);
+
+  return { exportConversation, cancelExport };
 }
@@ -16,5 +16,11 @@ export * from "./filename";
 // Code highlighting
 export * from "./shiki";
 
+// Markdown parsing
+export * from "./markdown-ast";
+
 // Conversation utilities
 export * from "./conversation";
+
+// Measured message heights
+export * from "./message-heights";
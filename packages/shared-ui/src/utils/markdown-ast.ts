@@ -0,0 +1,119 @@
+import type { Root } from "hast";
+import { urlAttributes } from "html-url-attributes";
+import { defaultUrlTransform } from "react-markdown";
+import rehypeRaw from "rehype-raw";
+import remarkGfm from "remark-gfm";
+import remarkParse from "remark-parse";
+import remarkRehype from "remark-rehype";
+import { unified } from "unified";
+import { visit } from "unist-util-visit";
+
+/**
+ * Maximum number of parsed messages kept in memory
+ */
+const AST_CACHE_SIZE = 1000;
+
+/**
+ * Same pipeline react-markdown runs for MarkdownRenderer
+ * (remark-gfm, raw HTML via rehype-raw)
+ */
+const processor = unified()
+  .use(remarkParse)
+  .use(remarkGfm)
+  .use(remarkRehype, { allowDangerousHtml: true })
+  .use(rehypeRaw)
+  .freeze();
+
+// Keyed by the full content string, so lookups can never collide
+const astCache = new Map<string, Root>();
+
+const stats = { hits: 0, misses: 0, parseMs: 0 };
+
+/**
+ * Markdown AST cache statistics
+ */
+export interface MarkdownAstCacheStats {
+  hits: number;
+  misses: number;
+  /** Entries currently cached */
+  size: number;
+  /** Total time spent parsing cache misses */
+  parseMs: number;
+}
+
+/**
+ * Parse markdown into a render-ready HAST tree.
+ *
+ * Applies the same post-processing as react-markdown (leftover raw HTML
+ * becomes text, URLs go through defaultUrlTransform).
+ */
+export function parseMarkdownToHast(content: string): Root {
+  const tree = processor.runSync(processor.parse(content), content);
+
+  visit(tree, (node, index, parent) => {
+    if (node.type === "raw" && parent && typeof index === "number") {
+      parent.children[index] = { type: "text", value: node.value };
+      return index;
+    }
+
+    if (node.type === "element") {
+      for (const [attribute, tagNames] of Object.entries(urlAttributes)) {
+        const value = node.properties[attribute];
+        if (
+          value !== undefined &&
+          (tagNames === null || tagNames.includes(node.tagName))
+        ) {
+          node.properties[attribute] = defaultUrlTransform(
+            String(value || ""),
+          );
+        }
+      }
+    }
+  });
+
+  return tree;
+}
+
+/**
+ * Get the parsed tree for markdown content, parsing at most once per
+ * distinct content (LRU). Trees are shared and must not be mutated.
+ */
+export function getMarkdownAst(content: string): Root {
+  const cached = astCache.get(content);
+  if (cached) {
+    stats.hits++;
+    // Move to most recently used
+    astCache.delete(content);
+    astCache.set(content, cached);
+    return cached;
+  }
+
+  stats.misses++;
+  const start = performance.now();
+  const tree = parseMarkdownToHast(content);
+  stats.parseMs += performance.now() - start;
+
+  astCache.set(content, tree);
+  if (astCache.size > AST_CACHE_SIZE) {
+    const oldest = astCache.keys().next().value;
+    if (oldest !== undefined) astCache.delete(oldest);
+  }
+  return tree;
+}
+
+/**
+ * Get markdown AST cache statistics
+ */
+export function getMarkdownAstCacheStats(): MarkdownAstCacheStats {
+  return { ...stats, size: astCache.size };
+}
+
+/**
+ * Drop all cached markdown trees and reset statistics
+ */
+export function clearMarkdownAstCache(): void {
+  astCache.clear();
+  stats.hits = 0;
+  stats.misses = 0;
+  stats.parseMs = 0;
+}
@@ -0,0 +1,58 @@
+import {
+  createMeasuredHeightSource,
+  estimateMessageHeight,
+} from "@chat2poster/core-pagination";
+import type { Message } from "@chat2poster/core-schema";
+import { describe, it, expect, beforeEach } from "vitest";
+import {
+  createPreviewHeightSource,
+  previewHeightCache,
+} from "./message-heights";
+
+function createTestMessage(id: string, content: string): Message {
+  return {
+    id,
+    role: "assistant",
+    contentMarkdown: content,
+    order: 0,
+  };
+}
+
+describe("createPreviewHeightSource", () => {
+  beforeEach(() => {
+    previewHeightCache.clear();
+  });
+
+  it("should estimate messages that were not measured", () => {
+    const message = createTestMessage("msg-1", "Hello");
+    const source = createPreviewHeightSource("light", 768);
+
+    expect(source.getHeight(message)).toBe(estimateMessageHeight(message));
+    expect(source.hasMeasurement(message)).toBe(false);
+  });
+
+  it("should keep measurements per theme and width", () => {
+    const message = createTestMessage("msg-1", "Hello");
+    createPreviewHeightSource("light", 768).record(message, 321);
+
+    const sameLayout = createPreviewHeightSource("light", 768);
+    const otherTheme = createPreviewHeightSource("dark", 768);
+    const otherWidth = createPreviewHeightSource("light", 1080);
+
+    expect(sameLayout.getHeight(message)).toBe(321);
+    expect(otherTheme.hasMeasurement(message)).toBe(false);
+    expect(otherWidth.hasMeasurement(message)).toBe(false);
+  });
+
+  it("should share measurements with pagination height sources", () => {
+    const message = createTestMessage("msg-1", "Hello");
+    createPreviewHeightSource("light", 768).record(message, 321);
+
+    const paginationSource = createMeasuredHeightSource({
+      context: { themeId: "light", deviceWidth: 768 },
+      cache: previewHeightCache,
+    });
+
+    expect(paginationSource.getHeight(message)).toBe(321);
+  });
+});
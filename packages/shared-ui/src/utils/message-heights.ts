@@ -0,0 +1,26 @@
+import {
+  MessageHeightCache,
+  createMeasuredHeightSource,
+  type MeasuredHeightSource,
+} from "@chat2poster/core-pagination";
+
+/**
+ * Message heights measured in the editor preview, keyed by content, theme
+ * and canvas width. Pass it to `createMeasuredHeightSource` so pagination
+ * splits pages on the same heights the preview rendered.
+ */
+export const previewHeightCache = new MessageHeightCache();
+
+/**
+ * Height source for one theme and canvas width: measured preview heights,
+ * falling back to the core-pagination estimate
+ */
+export function createPreviewHeightSource(
+  themeId: string,
+  deviceWidth: number,
+): MeasuredHeightSource {
+  return createMeasuredHeightSource({
+    context: { themeId, deviceWidth },
+    cache: previewHeightCache,
+  });
+}
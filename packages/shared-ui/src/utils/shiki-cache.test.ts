@@ -0,0 +1,303 @@
+import { describe, it, expect, vi, afterEach } from "vitest";
+import {
+  HIGHLIGHT_CACHE_VERSION,
+  HighlightCache,
+  PersistentHighlightStore,
+  getHighlightKey,
+} from "./shiki-cache";
+
+interface StoredRecord {
+  key: string;
+  code: string;
+  html: string;
+  storedAt: number;
+}
+
+interface FakeDatabase {
+  version: number;
+  stores: Map<string, Map<string, StoredRecord>>;
+}
+
+interface FakeRequest<T> {
+  result: T;
+  error: Error | null;
+  onsuccess: (() => void) | null;
+  onerror: (() => void) | null;
+}
+
+function createRequest<T>(getResult: () => T): FakeRequest<T> {
+  const request: FakeRequest<T> = {
+    result: undefined as T,
+    error: null,
+    onsuccess: null,
+    onerror: null,
+  };
+  queueMicrotask(() => {
+    request.result = getResult();
+    request.onsuccess?.();
+  });
+  return request;
+}
+
+/**
+ * In-memory IndexedDB with just the API surface the store uses
+ */
+function createFakeIndexedDB() {
+  const databases = new Map<string, FakeDatabase>();
+  let transactions = 0;
+
+  function objectStore(records: Map<string, StoredRecord>) {
+    return {
+      get: (key: string) => createRequest(() => records.get(key)),
+      put: (record: StoredRecord) =>
+        createRequest(() => void records.set(record.key, record)),
+      count: () => createRequest(() => records.size),
+      clear: () => createRequest(() => records.clear()),
+      index: () => ({
+        openCursor() {
+          const sorted = [...records.values()].sort(
+            (a, b) => a.storedAt - b.storedAt,
+          );
+          const request: FakeRequest<unknown> = {
+            result: null,
+            error: null,
+            onsuccess: null,
+            onerror: null,
+          };
+          const step = (position: number) => {
+            const record = sorted[position];
+            request.result = record && {
+              delete: () => records.delete(record.key),
+              continue: () => queueMicrotask(() => step(position + 1)),
+            };
+            request.onsuccess?.();
+          };
+          queueMicrotask(() => step(0));
+          return request;
+        },
+      }),
+    };
+  }
+
+  function connect(db: FakeDatabase) {
+    return {
+      objectStoreNames: { contains: (name: string) => db.stores.has(name) },
+      createObjectStore(name: string) {
+        db.stores.set(name, new Map());
+        return { createIndex: () => undefined };
+      },
+      deleteObjectStore: (name: string) => db.stores.delete(name),
+      transaction(name: string) {
+        transactions++;
+        const records = db.stores.get(name);
+        if (!records) throw new Error(`No object store ${name}`);
+        return { objectStore: () => objectStore(records) };
+      },
+    };
+  }
+
+  const factory = {
+    open(name: string, version: number) {
+      const db = databases.get(name) ?? { version: 0, stores: new Map() };
+      databases.set(name, db);
+      const request = {
+        result: connect(db),
+        error: null,
+        onsuccess: null as (() => void) | null,
+        onerror: null as (() => void) | null,
+        onupgradeneeded: null as (() => void) | null,
+        onblocked: null as (() => void) | null,
+      };
+      queueMicrotask(() => {
+        if (db.version < version) {
+          db.version = version;
+          request.onupgradeneeded?.();
+        }
+        request.onsuccess?.();
+      });
+      return request;
+    },
+  };
+
+  return {
+    factory,
+    databases,
+    get transactions() {
+      return transactions;
+    },
+  };
+}
+
+/** Let queued microtasks (and the fake IndexedDB callbacks) run */
+function settle(): Promise<void> {
+  return new Promise((resolve) => setTimeout(resolve, 0));
+}
+
+describe("getHighlightKey", () => {
+  it("should include the cache version, language and theme", () => {
+    const request = { code: "a", lang: "ts", theme: "github-dark" } as const;
+    const key = getHighlightKey(request);
+
+    expect(key.split(":").slice(0, 3)).toEqual([
+      `v${HIGHLIGHT_CACHE_VERSION}`,
+      "ts",
+      "github-dark",
+    ]);
+    expect(getHighlightKey({ ...request, lang: "js" })).not.toBe(key);
+  });
+});
+
+describe("HighlightCache", () => {
+  // (1 + 9) UTF-16 code units = 20 bytes per entry
+  const html = "<b>a</b>_";
+
+  it("should evict least recently used entries over the byte budget", () => {
+    const cache = new HighlightCache(40);
+    cache.set("a", "a", html);
+    cache.set("b", "b", html);
+    cache.get("a", "a");
+    cache.set("c", "c", html);
+
+    expect(cache.get("a", "a")).toBe(html);
+    expect(cache.get("b", "b")).toBeNull();
+    expect(cache.get("c", "c")).toBe(html);
+    expect(cache.size).toBe(40);
+  });
+
+  it("should treat a key collision with different code as a miss", () => {
+    const cache = new HighlightCache(1024);
+    cache.set("key", "const a = 1;", "<a>");
+
+    expect(cache.get("key", "const b = 2;")).toBeNull();
+    expect(cache.get("key", "const a = 1;")).toBe("<a>");
+  });
+
+  it("should not store entries larger than the whole budget", () => {
+    const cache = new HighlightCache(10);
+    cache.set("a", "a", html);
+
+    expect(cache.get("a", "a")).toBeNull();
+    expect(cache.size).toBe(0);
+  });
+
+  it("should account for replaced entries", () => {
+    const cache = new HighlightCache(1024);
+    cache.set("a", "a", html);
+    cache.set("a", "a", "<i>");
+
+    expect(cache.size).toBe(8);
+  });
+
+  it("should evict the oldest entries when resized", () => {
+    const cache = new HighlightCache(60);
+    cache.set("a", "a", html);
+    cache.set("b", "b", html);
+    cache.set("c", "c", html);
+
+    cache.resize(20);
+
+    expect(cache.get("a", "a")).toBeNull();
+    expect(cache.get("b", "b")).toBeNull();
+    expect(cache.get("c", "c")).toBe(html);
+  });
+});
+
+describe("PersistentHighlightStore", () => {
+  afterEach(() => {
+    vi.unstubAllGlobals();
+    vi.restoreAllMocks();
+  });
+
+  function stubIndexedDB() {
+    const fake = createFakeIndexedDB();
+    vi.stubGlobal("indexedDB", fake.factory);
+    return fake;
+  }
+
+  it("should read back stored highlights", async () => {
+    stubIndexedDB();
+    const store = new PersistentHighlightStore(100);
+
+    store.put("key", "code", "<html>");
+    await settle();
+
+    await expect(store.get("key", "code")).resolves.toBe("<html>");
+  });
+
+  it("should treat stored entries for different code as a miss", async () => {
+    stubIndexedDB();
+    const store = new PersistentHighlightStore(100);
+
+    store.put("key", "code", "<html>");
+    await settle();
+
+    await expect(store.get("key", "other code")).resolves.toBeNull();
+  });
+
+  it("should read all lookups of one task in a single transaction", async () => {
+    const fake = stubIndexedDB();
+    const store = new PersistentHighlightStore(100);
+    store.put("a", "a", "<a>");
+    store.put("b", "b", "<b>");
+    await settle();
+    const before = fake.transactions;
+
+    const results = await Promise.all([
+      store.get("a", "a"),
+      store.get("b", "b"),
+      store.get("c", "c"),
+    ]);
+
+    expect(results).toEqual(["<a>", "<b>", null]);
+    expect(fake.transactions - before).toBe(1);
+  });
+
+  it("should prune the oldest entries beyond the limit", async () => {
+    const fake = stubIndexedDB();
+    const now = vi.spyOn(Date, "now");
+    const store = new PersistentHighlightStore(2);
+
+    for (const [index, key] of ["a", "b", "c"].entries()) {
+      now.mockReturnValue(index);
+      store.put(key, key, `<${key}>`);
+      await settle();
+    }
+
+    const records = [...fake.databases.values()][0]!.stores.get("highlights");
+    expect([...records!.keys()]).toEqual(["b", "c"]);
+  });
+
+  it("should drop entries written by an older cache version", async () => {
+    const fake = stubIndexedDB();
+    fake.databases.set("chat2poster-shiki", {
+      version: HIGHLIGHT_CACHE_VERSION - 1,
+      stores: new Map([
+        [
+          "highlights",
+          new Map([
+            ["key", { key: "key", code: "code", html: "<old>", storedAt: 0 }],
+          ]),
+        ],
+      ]),
+    });
+    const store = new PersistentHighlightStore(100);
+
+    await expect(store.get("key", "code")).resolves.toBeNull();
+    expect(fake.databases.get("chat2poster-shiki")?.version).toBe(
+      HIGHLIGHT_CACHE_VERSION,
+    );
+  });
+
+  it("should miss when IndexedDB fails to open", async () => {
+    vi.stubGlobal("indexedDB", {
+      open: () => {
+        const request = { onerror: null as (() => void) | null };
+        queueMicrotask(() => request.onerror?.());
+        return request;
+      },
+    });
+    const store = new PersistentHighlightStore(100);
+
+    await expect(store.get("key", "code")).resolves.toBeNull();
+  });
+});
@@ -0,0 +1,247 @@
+import { hashContent } from "@chat2poster/core-pagination";
+import type { HighlightRequest } from "./shiki-core";
+
+/**
+ * Version of the highlighted HTML format. Bump it when upgrading Shiki or
+ * changing how its output is sanitized; persisted entries written under
+ * another version are dropped.
+ */
+export const HIGHLIGHT_CACHE_VERSION = 2;
+
+/**
+ * Cache key for a highlight request.
+ *
+ * Keys only narrow the lookup: entries also store the source code and are
+ * compared on read, so a hash collision is a miss, never wrong HTML.
+ */
+export function getHighlightKey({
+  code,
+  lang,
+  theme,
+}: HighlightRequest): string {
+  const hash = hashContent(code);
+  return `v${HIGHLIGHT_CACHE_VERSION}:${lang}:${theme}:${code.length}:${hash}`;
+}
+
+interface CacheEntry {
+  code: string;
+  html: string;
+  bytes: number;
+}
+
+/**
+ * In-memory LRU of highlighted HTML, bounded by approximate byte size.
+ *
+ * Relies on Map insertion order, so lookups, inserts and evictions are O(1).
+ */
+export class HighlightCache {
+  private entries = new Map<string, CacheEntry>();
+  private totalBytes = 0;
+
+  constructor(private maxBytes: number) {}
+
+  /** Approximate bytes currently held */
+  get size(): number {
+    return this.totalBytes;
+  }
+
+  get(key: string, code: string): string | null {
+    const entry = this.entries.get(key);
+    if (!entry || entry.code !== code) {
+      return null;
+    }
+    // Move to most recently used
+    this.entries.delete(key);
+    this.entries.set(key, entry);
+    return entry.html;
+  }
+
+  set(key: string, code: string, html: string): void {
+    // UTF-16: two bytes per code unit
+    const bytes = (code.length + html.length) * 2;
+    this.delete(key);
+    if (bytes > this.maxBytes) {
+      return;
+    }
+
+    this.entries.set(key, { code, html, bytes });
+    this.totalBytes += bytes;
+
+    for (const [oldest, entry] of this.entries) {
+      if (this.totalBytes <= this.maxBytes) break;
+      this.entries.delete(oldest);
+      this.totalBytes -= entry.bytes;
+    }
+  }
+
+  delete(key: string): void {
+    const entry = this.entries.get(key);
+    if (entry) {
+      this.entries.delete(key);
+      this.totalBytes -= entry.bytes;
+    }
+  }
+
+  /** Change the byte budget, evicting as needed */
+  resize(maxBytes: number): void {
+    this.maxBytes = maxBytes;
+    for (const [oldest, entry] of this.entries) {
+      if (this.totalBytes <= this.maxBytes) break;
+      this.entries.delete(oldest);
+      this.totalBytes -= entry.bytes;
+    }
+  }
+
+  clear(): void {
+    this.entries.clear();
+    this.totalBytes = 0;
+  }
+}
+
+const DB_NAME = "chat2poster-shiki";
+/** Upgrading the database clears HTML stored by older versions */
+const DB_VERSION = HIGHLIGHT_CACHE_VERSION;
+const STORE_NAME = "highlights";
+const STORED_AT_INDEX = "storedAt";
+
+interface StoredHighlight {
+  key: string;
+  code: string;
+  html: string;
+  storedAt: number;
+}
+
+interface PendingRead {
+  key: string;
+  code: string;
+  resolve: (html: string | null) => void;
+}
+
+function requestToPromise<T>(request: IDBRequest<T>): Promise<T> {
+  return new Promise((resolve, reject) => {
+    request.onsuccess = () => resolve(request.result);
+    request.onerror = () => reject(request.error);
+  });
+}
+
+/**
+ * IndexedDB-backed highlight cache that survives reloads.
+ *
+ * Reads and writes issued in the same task are grouped into a single
+ * transaction. All failures degrade to cache misses.
+ */
+export class PersistentHighlightStore {
+  private db: Promise<IDBDatabase | null> | null = null;
+  private reads: PendingRead[] = [];
+  private writes: StoredHighlight[] = [];
+  private writesSincePrune = 0;
+
+  constructor(private maxEntries: number) {}
+
+  /** Whether IndexedDB exists in this environment */
+  static isSupported(): boolean {
+    return typeof indexedDB !== "undefined";
+  }
+
+  get(key: string, code: string): Promise<string | null> {
+    return new Promise((resolve) => {
+      if (this.reads.push({ key, code, resolve }) === 1) {
+        queueMicrotask(() => void this.flushReads());
+      }
+    });
+  }
+
+  put(key: string, code: string, html: string): void {
+    if (this.writes.push({ key, code, html, storedAt: Date.now() }) === 1) {
+      queueMicrotask(() => void this.flushWrites());
+    }
+  }
+
+  /** Delete every stored entry */
+  async clear(): Promise<void> {
+    const db = await this.open();
+    if (!db) return;
+    const tx = db.transaction(STORE_NAME, "readwrite");
+    await requestToPromise(tx.objectStore(STORE_NAME).clear()).catch(
+      () => undefined,
+    );
+  }
+
+  private open(): Promise<IDBDatabase | null> {
+    this.db ??= new Promise<IDBDatabase | null>((resolve) => {
+      const request = indexedDB.open(DB_NAME, DB_VERSION);
+      request.onupgradeneeded = () => {
+        const db = request.result;
+        if (db.objectStoreNames.contains(STORE_NAME)) {
+          db.deleteObjectStore(STORE_NAME);
+        }
+        const store = db.createObjectStore(STORE_NAME, { keyPath: "key" });
+        store.createIndex(STORED_AT_INDEX, "storedAt");
+      };
+      request.onsuccess = () => resolve(request.result);
+      request.onerror = () => resolve(null);
+      request.onblocked = () => resolve(null);
+    });
+    return this.db;
+  }
+
+  private async flushReads(): Promise<void> {
+    const reads = this.reads;
+    this.reads = [];
+
+    try {
+      const db = await this.open();
+      if (!db) throw new Error("IndexedDB unavailable");
+      const store = db
+        .transaction(STORE_NAME, "readonly")
+        .objectStore(STORE_NAME);
+      await Promise.all(
+        reads.map(async ({ key, code, resolve }) => {
+          const record = (await requestToPromise(store.get(key))) as
+            | StoredHighlight
+            | undefined;
+          resolve(record?.code === code ? record.html : null);
+        }),
+      );
+    } catch {
+      for (const { resolve } of reads) resolve(null);
+    }
+  }
+
+  private async flushWrites(): Promise<void> {
+    const writes = this.writes;
+    this.writes = [];
+
+    try {
+      const db = await this.open();
+      if (!db) return;
+      const tx = db.transaction(STORE_NAME, "readwrite");
+      const store = tx.objectStore(STORE_NAME);
+      for (const record of writes) {
+        store.put(record);
+      }
+
+      this.writesSincePrune += writes.length;
+      if (this.writesSincePrune >= Math.ceil(this.maxEntries / 10)) {
+        this.writesSincePrune = 0;
+        await this.prune(store);
+      }
+    } catch {
+      // Persistence is best effort
+    }
+  }
+
+  /** Drop the oldest entries beyond maxEntries */
+  private async prune(store: IDBObjectStore): Promise<void> {
+    let excess = (await requestToPromise(store.count())) - this.maxEntries;
+    if (excess <= 0) return;
+
+    const cursorRequest = store.index(STORED_AT_INDEX).openCursor();
+    cursorRequest.onsuccess = () => {
+      const cursor = cursorRequest.result;
+      if (!cursor || excess-- <= 0) return;
+      cursor.delete();
+      cursor.continue();
+    };
+  }
+}
@@ -0,0 +1,179 @@
+import {
+  bundledLanguages,
+  createHighlighter,
+  type Highlighter,
+  type BundledLanguage,
+  type BundledTheme,
+} from "shiki";
+
+/**
+ * A single highlight job
+ */
+export interface HighlightRequest {
+  code: string;
+  /** Normalized language id (see normalizeLanguage) */
+  lang: string;
+  theme: BundledTheme;
+}
+
+/**
+ * Shiki highlighter that loads grammars and themes on first use.
+ *
+ * Shared by the main thread fallback and the highlighting worker, so a
+ * conversation only pays for the languages it actually contains.
+ */
+export class LazyHighlighter {
+  private instance: Highlighter | null = null;
+  private instancePromise: Promise<Highlighter> | null = null;
+  private languages = new Map<string, Promise<string>>();
+  private themes = new Map<string, Promise<void>>();
+
+  /** The highlighter, if it has been created */
+  get current(): Highlighter | null {
+    return this.instance;
+  }
+
+  /**
+   * Create the highlighter without any grammars
+   */
+  load(): Promise<Highlighter> {
+    this.instancePromise ??= createHighlighter({ themes: [], langs: [] }).then(
+      (hl) => (this.instance = hl),
+    );
+    return this.instancePromise;
+  }
+
+  /**
+   * Load a theme (once)
+   */
+  async loadTheme(theme: BundledTheme): Promise<void> {
+    const hl = await this.load();
+    let pending = this.themes.get(theme);
+    if (!pending) {
+      pending = hl.loadTheme(theme);
+      this.themes.set(theme, pending);
+    }
+    return pending;
+  }
+
+  /**
+   * Load a grammar (once), resolving to the language to highlight with.
+   * Unknown or failing languages resolve to "text".
+   */
+  async loadLanguage(lang: string): Promise<string> {
+    const hl = await this.load();
+    let pending = this.languages.get(lang);
+    if (!pending) {
+      pending =
+        lang === "text" || !(lang in bundledLanguages)
+          ? Promise.resolve("text")
+          : hl.loadLanguage(lang as BundledLanguage).then(
+              () => lang,
+              () => "text",
+            );
+      this.languages.set(lang, pending);
+    }
+    return pending;
+  }
+
+  /**
+   * Highlight code, loading its grammar and theme if needed
+   */
+  async highlight({ code, lang, theme }: HighlightRequest): Promise<string> {
+    const [hl, resolved] = await Promise.all([
+      this.load(),
+      this.loadLanguage(lang),
+      this.loadTheme(theme),
+    ]);
+    return sanitizeShikiHtml(hl.codeToHtml(code, { lang: resolved, theme }));
+  }
+
+  /**
+   * Highlight code only with what is already loaded.
+   * Returns null if the theme is not loaded yet; unloaded languages
+   * are rendered as plain text.
+   */
+  highlightSync({ code, lang, theme }: HighlightRequest): string | null {
+    const hl = this.instance;
+    if (!hl?.getLoadedThemes().includes(theme)) {
+      return null;
+    }
+    const resolved = hl.getLoadedLanguages().includes(lang) ? lang : "text";
+    return sanitizeShikiHtml(hl.codeToHtml(code, { lang: resolved, theme }));
+  }
+}
+
+/**
+ * Normalize language aliases
+ */
+export function normalizeLanguage(lang: string): string {
+  const normalized = lang.toLowerCase().trim();
+
+  const aliases: Record<string, string> = {
+    js: "javascript",
+    ts: "typescript",
+    py: "python",
+    rb: "ruby",
+    cs: "csharp",
+    "c++": "cpp",
+    "c#": "csharp",
+    sh: "bash",
+    zsh: "bash",
+    yml: "yaml",
+    md: "markdown",
+    plaintext: "text",
+    plain: "text",
+    "": "text",
+  };
+
+  return aliases[normalized] ?? normalized;
+}
+
+/**
+ * Escape HTML for fallback rendering
+ */
+export function escapeHtml(str: string): string {
+  return str
+    .replace(/&/g, "&amp;")
+    .replace(/</g, "&lt;")
+    .replace(/>/g, "&gt;")
+    .replace(/"/g, "&quot;")
+    .replace(/'/g, "&#039;");
+}
+
+/**
+ * Remove Shiki pre background styles so code block background is controlled
+ * by chat2poster theme tokens consistently in preview/export.
+ */
+export function sanitizeShikiHtml(html: string): string {
+  return html.replace(
+    /<pre([^>]*\bclass="[^"]*\bshiki\b[^"]*"[^>]*)>/g,
+    (match, attrs: string) => {
+      const styleRegex = /\sstyle="([^"]*)"/;
+      const styleMatch = styleRegex.exec(attrs);
+      if (!styleMatch) return match;
+
+      const styleValue = styleMatch[1];
+      if (typeof styleValue !== "string") return match;
+
+      const cleanedStyle = styleValue
+        .split(";")
+        .map((item) => item.trim())
+        .filter(Boolean)
+        .filter((decl) => {
+          const lowerDecl = decl.toLowerCase();
+          return (
+            !lowerDecl.startsWith("background:") &&
+            !lowerDecl.startsWith("background-color:")
+          );
+        })
+        .join("; ");
+
+      if (!cleanedStyle) {
+        return `<pre${attrs.replace(styleRegex, "")}>`;
+      }
+
+      return `<pre${attrs.replace(styleRegex, ` style="${cleanedStyle}"`)}>`;
+    },
+  );
+}
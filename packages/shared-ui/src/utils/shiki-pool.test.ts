@@ -0,0 +1,168 @@
+import { describe, it, expect, vi, afterEach } from "vitest";
+import { DEFAULT_MAX_WORKER_CRASHES, ShikiWorkerPool } from "./shiki-pool";
+import type { ShikiWorkerRequest, ShikiWorkerResponse } from "./shiki-worker";
+
+type Listener = (event: unknown) => void;
+
+class FakeWorker {
+  posted: ShikiWorkerRequest[] = [];
+  terminated = false;
+  private listeners = new Map<string, Listener[]>();
+
+  addEventListener(type: string, listener: Listener): void {
+    this.listeners.set(type, [...(this.listeners.get(type) ?? []), listener]);
+  }
+
+  postMessage(message: ShikiWorkerRequest): void {
+    this.posted.push(message);
+  }
+
+  terminate(): void {
+    this.terminated = true;
+  }
+
+  /** Answer a posted batch */
+  respond({ id, items }: ShikiWorkerRequest): void {
+    const data: ShikiWorkerResponse = {
+      id,
+      results: items.map((item) => ({ html: `<${item.lang}>${item.code}` })),
+    };
+    this.emit("message", { data });
+  }
+
+  crash(): void {
+    this.emit("error", { message: "boom", preventDefault: () => undefined });
+  }
+
+  private emit(type: string, event: unknown): void {
+    for (const listener of this.listeners.get(type) ?? []) listener(event);
+  }
+}
+
+function createPool(size: number, timeoutMs?: number) {
+  const workers: FakeWorker[] = [];
+  const pool = new ShikiWorkerPool(
+    () => {
+      const worker = new FakeWorker();
+      workers.push(worker);
+      return worker as unknown as Worker;
+    },
+    size,
+    timeoutMs,
+  );
+  return { pool, workers };
+}
+
+function request(code: string, lang = "ts") {
+  return { code, lang, theme: "github-dark" } as const;
+}
+
+describe("ShikiWorkerPool", () => {
+  afterEach(() => {
+    vi.useRealTimers();
+  });
+
+  it("should post requests made in the same task as one batch", async () => {
+    const { pool, workers } = createPool(1);
+
+    const results = Promise.all([
+      pool.highlight(request("a")),
+      pool.highlight(request("b")),
+      pool.highlight(request("c", "py")),
+    ]);
+    await Promise.resolve();
+
+    expect(workers).toHaveLength(1);
+    const worker = workers[0]!;
+    expect(worker.posted).toHaveLength(1);
+    expect(worker.posted[0]!.items).toHaveLength(3);
+
+    worker.respond(worker.posted[0]!);
+    await expect(results).resolves.toEqual(["<ts>a", "<ts>b", "<py>c"]);
+  });
+
+  it("should send every request for a language to the same worker", async () => {
+    const { pool, workers } = createPool(4);
+
+    const first = pool.highlight(request("a"));
+    await Promise.resolve();
+    const second = pool.highlight(request("b"));
+    await Promise.resolve();
+
+    expect(workers).toHaveLength(1);
+    const worker = workers[0]!;
+    expect(worker.posted).toHaveLength(2);
+
+    worker.posted.forEach((batch) => worker.respond(batch));
+    await expect(Promise.all([first, second])).resolves.toEqual([
+      "<ts>a",
+      "<ts>b",
+    ]);
+  });
+
+  it("should reject and replace a worker that does not answer", async () => {
+    vi.useFakeTimers({ toFake: ["setTimeout", "clearTimeout"] });
+    const { pool, workers } = createPool(1, 100);
+
+    const result = pool.highlight(request("a"));
+    const rejection = expect(result).rejects.toThrow("timed out");
+    await Promise.resolve();
+    vi.advanceTimersByTime(100);
+    await rejection;
+
+    expect(workers[0]!.terminated).toBe(true);
+    expect(pool.healthy).toBe(true);
+
+    const retry = pool.highlight(request("a"));
+    await Promise.resolve();
+    expect(workers).toHaveLength(2);
+    workers[1]!.respond(workers[1]!.posted[0]!);
+    await expect(retry).resolves.toBe("<ts>a");
+  });
+
+  it("should not time out batches that were answered", async () => {
+    vi.useFakeTimers({ toFake: ["setTimeout", "clearTimeout"] });
+    const { pool, workers } = createPool(1, 100);
+
+    const result = pool.highlight(request("a"));
+    await Promise.resolve();
+    workers[0]!.respond(workers[0]!.posted[0]!);
+    vi.advanceTimersByTime(100);
+
+    await expect(result).resolves.toBe("<ts>a");
+    expect(workers[0]!.terminated).toBe(false);
+  });
+
+  it("should reject and replace a worker that crashes", async () => {
+    const { pool, workers } = createPool(1);
+
+    const result = pool.highlight(request("a"));
+    await Promise.resolve();
+    workers[0]!.crash();
+
+    await expect(result).rejects.toThrow("boom");
+    expect(workers[0]!.terminated).toBe(true);
+    expect(pool.healthy).toBe(true);
+
+    const retry = pool.highlight(request("a"));
+    await Promise.resolve();
+    expect(workers).toHaveLength(2);
+    workers[1]!.respond(workers[1]!.posted[0]!);
+    await expect(retry).resolves.toBe("<ts>a");
+  });
+
+  it("should stop after repeated crashes", async () => {
+    const { pool, workers } = createPool(1);
+
+    for (let crash = 0; crash < DEFAULT_MAX_WORKER_CRASHES; crash++) {
+      const result = pool.highlight(request("a"));
+      await Promise.resolve();
+      workers[crash]!.crash();
+      await expect(result).rejects.toThrow("boom");
+    }
+
+    expect(pool.healthy).toBe(false);
+    await expect(pool.highlight(request("b"))).rejects.toThrow();
+    expect(workers).toHaveLength(DEFAULT_MAX_WORKER_CRASHES);
+  });
+});
@@ -0,0 +1,186 @@
+import type { HighlightRequest } from "./shiki-core";
+import type { ShikiWorkerRequest, ShikiWorkerResponse } from "./shiki-worker";
+
+interface PendingItem {
+  request: HighlightRequest;
+  resolve: (html: string) => void;
+  reject: (error: Error) => void;
+}
+
+interface PostedBatch {
+  items: PendingItem[];
+  timeoutId: ReturnType<typeof setTimeout>;
+}
+
+interface PoolWorker {
+  worker: Worker;
+  /** Items waiting for the next batch */
+  queue: PendingItem[];
+  /** Batches posted to the worker, by id */
+  inFlight: Map<number, PostedBatch>;
+}
+
+/**
+ * How long a batch may take before its worker is considered hung
+ */
+export const DEFAULT_WORKER_TIMEOUT_MS = 15000;
+
+/**
+ * Worker crashes after which the pool gives up on workers altogether
+ */
+export const DEFAULT_MAX_WORKER_CRASHES = 3;
+
+/**
+ * Pool of Shiki highlighting workers.
+ *
+ * Requests are routed by language so each grammar is loaded by one worker,
+ * and all requests made in the same task (e.g. every code block of one
+ * render) are posted to each worker as a single batch. A worker that does
+ * not answer a batch within the timeout, or that crashes, is terminated and
+ * replaced on the next request; its pending requests are rejected. After
+ * repeated crashes the pool stops and reports itself unhealthy.
+ */
+export class ShikiWorkerPool {
+  private workers: (PoolWorker | null)[];
+  private nextBatchId = 0;
+  private flushScheduled = false;
+  private failed = false;
+  private crashes = 0;
+
+  constructor(
+    private createWorker: () => Worker,
+    size: number,
+    private timeoutMs = DEFAULT_WORKER_TIMEOUT_MS,
+    private maxCrashes = DEFAULT_MAX_WORKER_CRASHES,
+  ) {
+    this.workers = Array.from({ length: Math.max(1, size) }, () => null);
+  }
+
+  /**
+   * False once workers crashed `maxCrashes` times or the pool was
+   * terminated; callers should stop using the pool
+   */
+  get healthy(): boolean {
+    return !this.failed;
+  }
+
+  highlight(request: HighlightRequest): Promise<string> {
+    if (this.failed) {
+      return Promise.reject(new Error("Shiki worker pool failed"));
+    }
+
+    return new Promise((resolve, reject) => {
+      const target = this.getWorker(request.lang);
+      target.queue.push({ request, resolve, reject });
+
+      if (!this.flushScheduled) {
+        this.flushScheduled = true;
+        queueMicrotask(() => this.flush());
+      }
+    });
+  }
+
+  terminate(): void {
+    this.failed = true;
+    for (const entry of this.workers) {
+      if (entry) this.retire(entry, new Error("Shiki worker pool terminated"));
+    }
+  }
+
+  private getWorker(lang: string): PoolWorker {
+    let slot = 0;
+    for (let i = 0; i < lang.length; i++) {
+      slot = (slot * 31 + lang.charCodeAt(i)) >>> 0;
+    }
+    slot %= this.workers.length;
+
+    const existing = this.workers[slot];
+    if (existing) return existing;
+
+    const entry: PoolWorker = {
+      worker: this.createWorker(),
+      queue: [],
+      inFlight: new Map(),
+    };
+    entry.worker.addEventListener(
+      "message",
+      (event: MessageEvent<ShikiWorkerResponse>) =>
+        this.handleResponse(entry, event.data),
+    );
+    entry.worker.addEventListener("error", (event) => {
+      event.preventDefault();
+      this.crash(entry, new Error(event.message || "Shiki worker error"));
+    });
+    this.workers[slot] = entry;
+    return entry;
+  }
+
+  private flush(): void {
+    this.flushScheduled = false;
+
+    for (const entry of this.workers) {
+      if (!entry || entry.queue.length === 0) continue;
+
+      const items = entry.queue;
+      entry.queue = [];
+      const id = this.nextBatchId++;
+      const timeoutId = setTimeout(
+        () => this.retire(entry, new Error("Shiki worker timed out")),
+        this.timeoutMs,
+      );
+      entry.inFlight.set(id, { items, timeoutId });
+
+      const message: ShikiWorkerRequest = {
+        id,
+        items: items.map((item) => item.request),
+      };
+      entry.worker.postMessage(message);
+    }
+  }
+
+  private handleResponse(
+    entry: PoolWorker,
+    response: ShikiWorkerResponse,
+  ): void {
+    const batch = entry.inFlight.get(response.id);
+    if (!batch) return;
+    entry.inFlight.delete(response.id);
+    clearTimeout(batch.timeoutId);
+
+    batch.items.forEach((item, index) => {
+      const result = response.results[index];
+      if (result && "html" in result) {
+        item.resolve(result.html);
+      } else {
+        item.reject(new Error(result?.error ?? "Missing highlight result"));
+      }
+    });
+  }
+
+  /** Replace a crashed worker, or stop the pool after repeated crashes */
+  private crash(entry: PoolWorker, error: Error): void {
+    this.retire(entry, error);
+    if (++this.crashes >= this.maxCrashes) {
+      this.terminate();
+    }
+  }
+
+  /**
+   * Terminate a worker and reject everything it owns. Its slot gets a
+   * fresh worker on the next request.
+   */
+  private retire(entry: PoolWorker, error: Error): void {
+    entry.worker.terminate();
+
+    for (const item of entry.queue) item.reject(error);
+    for (const { items, timeoutId } of entry.inFlight.values()) {
+      clearTimeout(timeoutId);
+      for (const item of items) item.reject(error);
+    }
+    entry.queue = [];
+    entry.inFlight.clear();
+
+    const slot = this.workers.indexOf(entry);
+    if (slot !== -1) this.workers[slot] = null;
+  }
+}
@@ -0,0 +1,56 @@
+import { LazyHighlighter, type HighlightRequest } from "./shiki-core";
+
+/**
+ * Batch of highlight jobs sent to a worker
+ */
+export interface ShikiWorkerRequest {
+  id: number;
+  items: HighlightRequest[];
+}
+
+/**
+ * Worker reply, with one result per request item (in order)
+ */
+export interface ShikiWorkerResponse {
+  id: number;
+  results: ({ html: string } | { error: string })[];
+}
+
+/**
+ * The parts of a dedicated worker global scope used here
+ */
+interface ShikiWorkerScope {
+  addEventListener(
+    type: "message",
+    listener: (event: MessageEvent<ShikiWorkerRequest>) => void,
+  ): void;
+  postMessage(message: ShikiWorkerResponse): void;
+}
+
+/**
+ * Start serving highlight batches from a Web Worker.
+ *
+ * Call from the app's worker entry, e.g.
+ * `startShikiWorker()` in `shiki.worker.ts`, and pass a factory for that
+ * worker to `configureShiki`.
+ */
+export function startShikiWorker(
+  scope: ShikiWorkerScope = globalThis as unknown as ShikiWorkerScope,
+): void {
+  const highlighter = new LazyHighlighter();
+
+  scope.addEventListener("message", (event) => {
+    const { id, items } = event.data;
+
+    void Promise.all(
+      items.map((item) =>
+        highlighter.highlight(item).then(
+          (html) => ({ html }),
+          (error: unknown) => ({
+            error: error instanceof Error ? error.message : String(error),
+          }),
+        ),
+      ),
+    ).then((results) => scope.postMessage({ id, results }));
+  });
+}
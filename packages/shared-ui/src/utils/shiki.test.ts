@@ -0,0 +1,142 @@
+import { describe, it, expect, vi, beforeEach, afterEach } from "vitest";
+import {
+  clearHighlightCache,
+  configureShiki,
+  highlightCode,
+  waitForPendingHighlights,
+} from "./shiki";
+import { DEFAULT_MAX_WORKER_CRASHES } from "./shiki-pool";
+import type { ShikiWorkerRequest, ShikiWorkerResponse } from "./shiki-worker";
+
+vi.mock("./shiki-core", () => ({
+  LazyHighlighter: class {
+    current = null;
+    highlight = async ({ code, lang }: { code: string; lang: string }) =>
+      `<main:${lang}>${code}`;
+    highlightSync = () => null;
+  },
+  normalizeLanguage: (lang: string) => lang,
+  escapeHtml: (str: string) => str,
+}));
+
+type Behavior = "respond" | "crash" | "hang";
+
+/**
+ * Worker that answers, crashes or never answers each batch it receives
+ */
+function createWorker(behavior: Behavior) {
+  const listeners = new Map<string, (event: unknown) => void>();
+  const worker = {
+    addEventListener: (type: string, listener: (event: unknown) => void) =>
+      listeners.set(type, listener),
+    terminate: vi.fn(),
+    postMessage({ id, items }: ShikiWorkerRequest) {
+      queueMicrotask(() => {
+        if (behavior === "respond") {
+          const data: ShikiWorkerResponse = {
+            id,
+            results: items.map(({ code, lang }) => ({
+              html: `<worker:${lang}>${code}`,
+            })),
+          };
+          listeners.get("message")?.({ data });
+        } else if (behavior === "crash") {
+          listeners.get("error")?.({
+            message: "boom",
+            preventDefault: () => undefined,
+          });
+        }
+      });
+    },
+  };
+  return worker as unknown as Worker;
+}
+
+describe("highlightCode", () => {
+  beforeEach(() => {
+    vi.stubGlobal("Worker", class {});
+  });
+
+  afterEach(async () => {
+    vi.unstubAllGlobals();
+    await clearHighlightCache();
+  });
+
+  it("should highlight in the worker pool", async () => {
+    configureShiki({
+      createWorker: () => createWorker("respond"),
+      poolSize: 1,
+    });
+
+    await expect(highlightCode("a", "ts")).resolves.toBe("<worker:ts>a");
+  });
+
+  it("should fall back to the main thread when a worker crashes", async () => {
+    let created = 0;
+    configureShiki({
+      createWorker: () => createWorker(created++ === 0 ? "crash" : "respond"),
+      poolSize: 1,
+    });
+
+    await expect(highlightCode("b", "ts")).resolves.toBe("<main:ts>b");
+    // The crashed worker is replaced
+    await expect(highlightCode("c", "ts")).resolves.toBe("<worker:ts>c");
+  });
+
+  it("should stop using workers after repeated crashes", async () => {
+    const factory = vi.fn(() => createWorker("crash"));
+    configureShiki({ createWorker: factory, poolSize: 1 });
+
+    for (let crash = 0; crash < DEFAULT_MAX_WORKER_CRASHES; crash++) {
+      await expect(highlightCode(`b${crash}`, "ts")).resolves.toBe(
+        `<main:ts>b${crash}`,
+      );
+    }
+    // Later requests skip the failed pool
+    await expect(highlightCode("c", "ts")).resolves.toBe("<main:ts>c");
+    expect(factory).toHaveBeenCalledTimes(DEFAULT_MAX_WORKER_CRASHES);
+  });
+
+  it("should fall back to the main thread when a worker hangs", async () => {
+    configureShiki({
+      createWorker: () => createWorker("hang"),
+      poolSize: 1,
+      workerTimeoutMs: 10,
+    });
+
+    await expect(highlightCode("d", "ts")).resolves.toBe("<main:ts>d");
+  });
+});
+
+describe("waitForPendingHighlights", () => {
+  afterEach(() => {
+    vi.unstubAllGlobals();
+  });
+
+  it("should resolve right away when nothing is pending", async () => {
+    const requestAnimationFrame = vi.fn();
+    vi.stubGlobal("requestAnimationFrame", requestAnimationFrame);
+
+    await waitForPendingHighlights();
+
+    expect(requestAnimationFrame).not.toHaveBeenCalled();
+  });
+
+  it("should wait for a frame after pending highlights settle", async () => {
+    const events: string[] = [];
+    vi.stubGlobal("requestAnimationFrame", (callback: () => void) => {
+      events.push("frame");
+      setTimeout(callback, 0);
+      return 0;
+    });
+    configureShiki({ createWorker: undefined });
+
+    const highlight = highlightCode("f", "ts").then(() => {
+      events.push("highlighted");
+    });
+    await waitForPendingHighlights();
+    await highlight;
+
+    expect(events).toEqual(["highlighted", "frame", "frame"]);
+  });
+});
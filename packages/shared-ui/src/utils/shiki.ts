@@ -1,151 +1,221 @@
+import type { Highlighter, BundledTheme } from "shiki";
 import {
-  createHighlighter,
-  type Highlighter,
-  type BundledLanguage,
-  type BundledTheme,
-} from "shiki";
-
-let highlighterPromise: Promise<Highlighter> | null = null;
-let highlighter: Highlighter | null = null;
-
-// LRU Cache for highlighted code
-const CACHE_SIZE = 100;
-const highlightCache = new Map<string, string>();
-const cacheOrder: string[] = [];
+  HighlightCache,
+  PersistentHighlightStore,
+  getHighlightKey,
+} from "./shiki-cache";
+import {
+  LazyHighlighter,
+  escapeHtml,
+  normalizeLanguage,
+  type HighlightRequest,
+} from "./shiki-core";
+import { ShikiWorkerPool } from "./shiki-pool";
 
 /**
- * Simple hash function for cache keys
+ * Highlighting configuration
  */
-function simpleHash(str: string): number {
-  let hash = 0;
-  for (let i = 0; i < str.length; i++) {
-    const char = str.charCodeAt(i);
-    hash = (hash << 5) - hash + char;
-    hash |= 0;
-  }
-  return hash;
+export interface ShikiConfig {
+  /**
+   * Create a highlighting worker whose entry calls `startShikiWorker`.
+   * Without it (or where workers are unavailable, e.g. content scripts)
+   * highlighting runs on the main thread.
+   */
+  createWorker?: () => Worker;
+  /** Number of workers (default: up to 2, leaving a core for the UI) */
+  poolSize?: number;
+  /**
+   * Time a worker may take for one batch before it is replaced and the
+   * batch is highlighted on the main thread
+   */
+  workerTimeoutMs?: number;
+  /** Memory cache budget in bytes */
+  maxCacheBytes?: number;
+  /** Persist highlighted HTML in IndexedDB across sessions */
+  persistentCache?: boolean;
+  /** Maximum number of persisted entries */
+  maxPersistentEntries?: number;
 }
 
+const DEFAULT_SHIKI_CONFIG = {
+  maxCacheBytes: 8 * 1024 * 1024,
+  persistentCache: false,
+  maxPersistentEntries: 2000,
+} satisfies ShikiConfig;
+
 /**
- * Generate cache key from code, language, and theme
+ * Themes loaded up front by initHighlighter
  */
-function getCacheKey(code: string, lang: string, theme: string): string {
-  return `${lang}:${theme}:${simpleHash(code)}`;
-}
+const DEFAULT_THEMES: BundledTheme[] = ["github-dark", "github-light"];
+
+let config: ShikiConfig & typeof DEFAULT_SHIKI_CONFIG = DEFAULT_SHIKI_CONFIG;
+const mainThread = new LazyHighlighter();
+const memoryCache = new HighlightCache(DEFAULT_SHIKI_CONFIG.maxCacheBytes);
+const inFlight = new Map<string, { code: string; promise: Promise<string> }>();
+let store: PersistentHighlightStore | null = null;
+let pool: ShikiWorkerPool | null | undefined;
 
 /**
- * Common languages to pre-load for better performance
+ * Configure workers and caching. Call once on the client before rendering.
  */
-const COMMON_LANGUAGES: BundledLanguage[] = [
-  "javascript",
-  "typescript",
-  "jsx",
-  "tsx",
-  "python",
-  "java",
-  "c",
-  "cpp",
-  "csharp",
-  "go",
-  "rust",
-  "ruby",
-  "php",
-  "swift",
-  "kotlin",
-  "sql",
-  "html",
-  "css",
-  "json",
-  "yaml",
-  "markdown",
-  "bash",
-  "shell",
-];
+export function configureShiki(next: ShikiConfig): void {
+  config = { ...config, ...next };
+  memoryCache.resize(config.maxCacheBytes);
+
+  // Recreated lazily on the next highlight
+  pool?.terminate();
+  pool = undefined;
+
+  store =
+    config.persistentCache && PersistentHighlightStore.isSupported()
+      ? new PersistentHighlightStore(config.maxPersistentEntries)
+      : null;
+}
 
 /**
- * Default themes to pre-load
+ * Default pool size: up to 2 workers, leaving a core for the UI
  */
-const DEFAULT_THEMES: BundledTheme[] = ["github-dark", "github-light"];
+function getDefaultPoolSize(): number {
+  const cores = navigator.hardwareConcurrency || 2;
+  return Math.min(2, Math.max(1, cores - 1));
+}
+
+function getPool(): ShikiWorkerPool | null {
+  if (pool === undefined) {
+    const { createWorker, poolSize, workerTimeoutMs } = config;
+    pool =
+      createWorker && typeof Worker !== "undefined"
+        ? new ShikiWorkerPool(
+            createWorker,
+            poolSize ?? getDefaultPoolSize(),
+            workerTimeoutMs,
+          )
+        : null;
+  }
+  return pool?.healthy ? pool : null;
+}
 
 /**
- * Initialize the Shiki highlighter
+ * Highlight in a worker if possible, otherwise on the main thread
  */
-export async function initHighlighter(): Promise<Highlighter> {
-  if (highlighter) {
-    return highlighter;
+async function render(request: HighlightRequest): Promise<string> {
+  const workers = getPool();
+  if (!workers) {
+    return mainThread.highlight(request);
   }
 
-  if (highlighterPromise) {
-    return highlighterPromise;
+  try {
+    return await workers.highlight(request);
+  } catch {
+    if (!workers.healthy) {
+      workers.terminate();
+    }
+    return mainThread.highlight(request);
   }
+}
 
-  highlighterPromise = createHighlighter({
-    themes: DEFAULT_THEMES,
-    langs: COMMON_LANGUAGES,
-  });
-
-  highlighter = await highlighterPromise;
-  return highlighter;
+/**
+ * Initialize the main thread Shiki highlighter with the default themes.
+ * Grammars are loaded on demand.
+ */
+export async function initHighlighter(): Promise<Highlighter> {
+  await Promise.all(
+    DEFAULT_THEMES.map((theme) => mainThread.loadTheme(theme)),
+  );
+  return mainThread.load();
 }
 
 /**
- * Get the current highlighter instance (must call initHighlighter first)
+ * Get the main thread highlighter instance (must call initHighlighter first)
  */
 export function getHighlighter(): Highlighter | null {
-  return highlighter;
+  return mainThread.current;
 }
 
 /**
- * Highlight code with Shiki (with LRU caching)
+ * Get already highlighted HTML from the memory cache, if any
  */
-export async function highlightCode(
+export function getCachedHighlight(
+  code: string,
+  language: string,
+  theme: BundledTheme = "github-dark",
+): string | null {
+  const request = { code, lang: normalizeLanguage(language), theme };
+  return memoryCache.get(getHighlightKey(request), code);
+}
+
+/**
+ * Highlight code with Shiki.
+ *
+ * Checks the memory cache, then the persistent cache, then highlights in
+ * the worker pool. Concurrent requests for the same code share one job.
+ */
+export function highlightCode(
   code: string,
   language: string,
   theme: BundledTheme = "github-dark",
 ): Promise<string> {
-  // Normalize language name
-  const lang = normalizeLanguage(language);
-  const key = getCacheKey(code, lang, theme);
+  const request = { code, lang: normalizeLanguage(language), theme };
+  const key = getHighlightKey(request);
 
-  // Check cache first
-  if (highlightCache.has(key)) {
-    return highlightCache.get(key)!;
+  const cached = memoryCache.get(key, code);
+  if (cached !== null) {
+    return Promise.resolve(cached);
   }
 
-  const hl = await initHighlighter();
-
-  // Check if language is loaded
-  const loadedLangs = hl.getLoadedLanguages();
-  if (!loadedLangs.includes(lang as BundledLanguage)) {
-    // Try to load the language dynamically
-    try {
-      await hl.loadLanguage(lang as BundledLanguage);
-    } catch {
-      // Fall back to plaintext if language is not supported
-      const html = hl.codeToHtml(code, { lang: "text", theme });
-      const sanitized = sanitizeShikiHtml(html);
-      addToCache(key, sanitized);
-      return sanitized;
-    }
+  const pending = inFlight.get(key);
+  if (pending?.code === code) {
+    return pending.promise;
   }
 
-  const html = hl.codeToHtml(code, { lang, theme });
-  const sanitized = sanitizeShikiHtml(html);
-  addToCache(key, sanitized);
-  return sanitized;
+  const persistent = store;
+  const promise = (async () => {
+    const stored = persistent ? await persistent.get(key, code) : null;
+    const html = stored ?? (await render(request));
+
+    memoryCache.set(key, code, html);
+    if (stored === null) {
+      persistent?.put(key, code, html);
+    }
+    return html;
+  })().finally(() => {
+    if (inFlight.get(key)?.promise === promise) {
+      inFlight.delete(key);
+    }
+  });
+
+  inFlight.set(key, { code, promise });
+  return promise;
 }
 
 /**
- * Add entry to cache with LRU eviction
+ * Resolve after the next frame has been rendered
  */
-function addToCache(key: string, html: string): void {
-  // LRU eviction
-  if (cacheOrder.length >= CACHE_SIZE) {
-    const oldest = cacheOrder.shift()!;
-    highlightCache.delete(oldest);
+async function waitForNextFrame(): Promise<void> {
+  if (typeof requestAnimationFrame === "undefined") {
+    await new Promise((resolve) => setTimeout(resolve, 0));
+    return;
+  }
+  // A callback queued from a frame callback runs after that frame
+  await new Promise<void>((resolve) =>
+    requestAnimationFrame(() => requestAnimationFrame(() => resolve())),
+  );
+}
+
+/**
+ * Resolve once no highlight jobs are pending and the components waiting on
+ * them have re-rendered, e.g. before capturing an export of freshly
+ * rendered code blocks
+ */
+export async function waitForPendingHighlights(): Promise<void> {
+  while (inFlight.size > 0) {
+    await Promise.allSettled(
+      Array.from(inFlight.values(), (pending) => pending.promise),
+    );
+    // Results are applied with a state update; let it commit, which may
+    // also start highlighting newly rendered blocks
+    await waitForNextFrame();
   }
-  highlightCache.set(key, html);
-  cacheOrder.push(key);
 }
 
 /**
@@ -156,91 +226,18 @@ export function highlightCodeSync(
   language: string,
   theme: BundledTheme = "github-dark",
 ): string {
-  if (!highlighter) {
-    return escapeHtml(code);
-  }
-
-  const lang = normalizeLanguage(language);
-  const loadedLangs = highlighter.getLoadedLanguages();
-
-  if (!loadedLangs.includes(lang as BundledLanguage)) {
-    return highlighter.codeToHtml(code, { lang: "text", theme });
-  }
-
-  return highlighter.codeToHtml(code, { lang, theme });
-}
-
-/**
- * Normalize language aliases
- */
-function normalizeLanguage(lang: string): string {
-  const normalized = lang.toLowerCase().trim();
-
-  const aliases: Record<string, string> = {
-    js: "javascript",
-    ts: "typescript",
-    py: "python",
-    rb: "ruby",
-    cs: "csharp",
-    "c++": "cpp",
-    "c#": "csharp",
-    sh: "bash",
-    zsh: "bash",
-    yml: "yaml",
-    md: "markdown",
-    plaintext: "text",
-    plain: "text",
-    "": "text",
-  };
-
-  return aliases[normalized] ?? normalized;
-}
-
-/**
- * Escape HTML for fallback rendering
- */
-function escapeHtml(str: string): string {
-  return str
-    .replace(/&/g, "&amp;")
-    .replace(/</g, "&lt;")
-    .replace(/>/g, "&gt;")
-    .replace(/"/g, "&quot;")
-    .replace(/'/g, "&#039;");
+  const request = { code, lang: normalizeLanguage(language), theme };
+  return (
+    memoryCache.get(getHighlightKey(request), code) ??
+    mainThread.highlightSync(request) ??
+    escapeHtml(code)
+  );
 }
 
 /**
- * Remove Shiki pre background styles so code block background is controlled
- * by chat2poster theme tokens consistently in preview/export.
+ * Drop all cached highlights, including persisted ones
  */
-function sanitizeShikiHtml(html: string): string {
-  return html.replace(
-    /<pre([^>]*\bclass="[^"]*\bshiki\b[^"]*"[^>]*)>/g,
-    (match, attrs: string) => {
-      const styleRegex = /\sstyle="([^"]*)"/;
-      const styleMatch = styleRegex.exec(attrs);
-      if (!styleMatch) return match;
-
-      const styleValue = styleMatch[1];
-      if (typeof styleValue !== "string") return match;
-
-      const cleanedStyle = styleValue
-        .split(";")
-        .map((item) => item.trim())
-        .filter(Boolean)
-        .filter((decl) => {
-          const lowerDecl = decl.toLowerCase();
-          return (
-            !lowerDecl.startsWith("background:") &&
-            !lowerDecl.startsWith("background-color:")
-          );
-        })
-        .join("; ");
-
-      if (!cleanedStyle) {
-        return `<pre${attrs.replace(styleRegex, "")}>`;
-      }
-
-      return `<pre${attrs.replace(styleRegex, ` style="${cleanedStyle}"`)}>`;
-    },
-  );
+export async function clearHighlightCache(): Promise<void> {
+  memoryCache.clear();
+  await store?.clear();
 }
@@ -0,0 +1,16 @@
+import { fileURLToPath } from "node:url";
+import { defineConfig } from "vitest/config";
+
+export default defineConfig({
+  resolve: {
+    alias: {
+      "@ui": fileURLToPath(new URL("./src", import.meta.url)),
+    },
+  },
+  test: {
+    name: "shared-ui",
+    globals: true,
+    environment: "node",
+    include: ["src/**/*.test.ts"],
+  },
+});